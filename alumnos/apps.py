@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class AlumnosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'alumnos'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from .sqlite import aplicar_pragmas
+
+        connection_created.connect(aplicar_pragmas, dispatch_uid='alumnos.sqlite')
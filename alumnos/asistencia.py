@@ -0,0 +1,112 @@
+# alumnos/asistencia.py
+import time
+
+from django.db import transaction
+from django.db.models import Case, F, PositiveIntegerField, Value, When
+from django.utils import timezone
+
+from .models import Alumno, AsistenciaMensual, DiasClaseMensual
+from .resumenes import actualizar_resumen
+
+
+MAX_CAMBIOS_LOTE = 2000
+
+
+def porcentaje_fila(presentes, dias_curso):
+    """% del alumno respecto a los DÍAS DEL CURSO (no a presentes + inasistentes)."""
+    return round((presentes / dias_curso) * 100, 1) if dias_curso > 0 else 0.0
+
+
+def rebalancear_asistencias(curso, mes_date, dias):
+    """
+    Ajusta al nuevo total de días, en un solo UPDATE, las filas del (curso, mes) que no cuadran:
+    presentes = min(presentes, dias); inasistentes = dias - presentes.
+    Devuelve la cantidad de filas modificadas.
+    """
+    dias = Value(dias, output_field=PositiveIntegerField())
+    presentes_ajustados = Case(
+        When(presentes__gt=dias, then=dias),
+        default=F('presentes'),
+    )
+    return (
+        AsistenciaMensual.objects
+        .filter(curso=curso, mes=mes_date)
+        .alias(total=F('presentes') + F('inasistentes'))
+        .exclude(total=dias)
+        .update(
+            presentes=presentes_ajustados,
+            inasistentes=dias - presentes_ajustados,
+            actualizado=timezone.now(),
+        )
+    )
+
+
+def guardar_lote(curso, mes_date, cambios, dias_clases=None):
+    """
+    Aplica en una transacción un lote de cambios de la grilla de un (curso, mes).
+    `cambios`: lista de dicts {alumno_id, presentes, inasistentes, seq} (enteros >= 0).
+    `seq` (opcional) es la marca en ms de la edición en el navegador; sin ella se usa
+    la hora actual. Un cambio cuya marca no supera la ya guardada para esa fila se
+    ignora: así un lote viejo que llega tarde (reintento, envío al cerrar la página)
+    no pisa uno más nuevo.
+    `dias_clases`: si viene, también se guardan los días del curso y se rebalancean
+    todas las filas del (curso, mes) que no cuadran con ellos, incluidas las del lote
+    (presentes se recorta a los días).
+    Alumnos que no pertenecen al curso se ignoran.
+    Devuelve (n_guardados, n_ajustados, dias_curso, {alumno_id: porcentaje}); los
+    porcentajes salen de lo que quedó guardado, ya rebalanceado, también para las
+    filas cuyo cambio se ignoró.
+    """
+    ahora = int(time.time() * 1000)
+    ultimos = {int(c['alumno_id']): c for c in cambios}  # si un alumno viene repetido, gana el último
+    validos = set(
+        Alumno.objects.filter(curso=curso, id__in=ultimos).values_list('id', flat=True)
+    )
+    filas = [
+        AsistenciaMensual(
+            alumno_id=alumno_id,
+            curso=curso,
+            mes=mes_date,
+            presentes=int(c['presentes']),
+            inasistentes=int(c['inasistentes']),
+            secuencia=int(c.get('seq') or ahora),
+        )
+        for alumno_id, c in ultimos.items() if alumno_id in validos
+    ]
+
+    with transaction.atomic():
+        if dias_clases is not None:
+            DiasClaseMensual.objects.update_or_create(
+                curso=curso, mes=mes_date, defaults={'dias_clases': dias_clases}
+            )
+            dias_curso = dias_clases
+        else:
+            dias_curso = (
+                DiasClaseMensual.objects
+                .filter(curso=curso, mes=mes_date)
+                .values_list('dias_clases', flat=True)
+                .first()
+            ) or 0
+
+        secuencias = dict(
+            AsistenciaMensual.objects
+            .filter(mes=mes_date, alumno_id__in=validos)
+            .values_list('alumno_id', 'secuencia')
+        )
+        nuevas = [f for f in filas if f.secuencia > secuencias.get(f.alumno_id, -1)]
+        AsistenciaMensual.objects.bulk_create(
+            nuevas,
+            update_conflicts=True,
+            unique_fields=['alumno', 'mes'],
+            update_fields=['presentes', 'inasistentes', 'curso', 'secuencia', 'actualizado'],
+        )
+        ajustados = rebalancear_asistencias(curso, mes_date, dias_curso) if dias_clases is not None else 0
+        guardados = (
+            AsistenciaMensual.objects
+            .filter(mes=mes_date, alumno_id__in=validos)
+            .values_list('alumno_id', 'presentes')
+        )
+        porcentajes = {alumno_id: porcentaje_fila(p, dias_curso) for alumno_id, p in guardados}
+        actualizar_resumen(curso.id, mes_date)
+
+    return len(nuevas), ajustados, dias_curso, porcentajes
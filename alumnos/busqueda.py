@@ -0,0 +1,148 @@
+# alumnos/busqueda.py
+from django.db.models import Exists, OuterRef
+
+from .models import Alumno, PalabraAlumno
+from .normalizacion import normalizar
+
+
+LARGO_PALABRA = 100
+LIMITE_SUGERENCIAS = 10
+TAMANO_LOTE = 1000
+# Cota superior para convertir "empieza con" en un rango (palabra >= t AND palabra < t + _FIN),
+# que cualquier motor resuelve con el índice (LIKE 'x%' no siempre lo usa en SQLite).
+_FIN = '\U0010ffff'
+
+
+def palabras(texto):
+    """Palabras normalizadas y sin repetir de un nombre o de una búsqueda."""
+    return sorted({p[:LARGO_PALABRA] for p in normalizar(texto).split()})
+
+
+def _filas(alumnos, modelo):
+    return [
+        modelo(alumno_id=alumno_id, palabra=palabra)
+        for alumno_id, nombre in alumnos
+        for palabra in palabras(nombre)
+    ]
+
+
+def indexar(alumnos):
+    """
+    (Re)indexa alumnos recién creados o editados. Llamar tras guardarlos
+    (idealmente en la misma transacción); al borrar un alumno sus palabras caen en cascada.
+    """
+    pares = [(a.id, a.nombre_completo) for a in alumnos]
+    if not pares:
+        return
+    PalabraAlumno.objects.filter(alumno_id__in=[i for i, _ in pares]).delete()
+    PalabraAlumno.objects.bulk_create(_filas(pares, PalabraAlumno), batch_size=TAMANO_LOTE)
+
+
+def reindexar():
+    """Reconstruye todo el índice de palabras."""
+    PalabraAlumno.objects.all().delete()
+    lote, total = [], 0
+    for par in Alumno.objects.values_list('id', 'nombre_completo').iterator(chunk_size=5000):
+        lote.append(par)
+        if len(lote) >= 5000:
+            PalabraAlumno.objects.bulk_create(_filas(lote, PalabraAlumno), batch_size=TAMANO_LOTE)
+            total += len(lote)
+            lote = []
+    PalabraAlumno.objects.bulk_create(_filas(lote, PalabraAlumno), batch_size=TAMANO_LOTE)
+    return total + len(lote)
+
+
+def _rango(termino):
+    return {'palabra__gte': termino, 'palabra__lt': termino + _FIN}
+
+
+def _tiene_palabra(termino, columna_alumno):
+    """EXISTS correlacionado: el alumno de `columna_alumno` tiene una palabra que empieza con `termino`."""
+    return Exists(PalabraAlumno.objects.filter(alumno_id=OuterRef(columna_alumno), **_rango(termino)))
+
+
+def filtrar(queryset, texto, acotado=False):
+    """
+    Restringe un queryset de Alumno a los que tienen, por cada palabra buscada,
+    alguna palabra en el nombre que empiece con ella ("gonz mar" → GONZALEZ ... MARIA).
+    - acotado=False: la palabra más larga (la más selectiva) acota con el índice
+      y las demás se comprueban por alumno.
+    - acotado=True: el queryset ya es chico (p. ej. un curso); todas se comprueban
+      por alumno, sin materializar las coincidencias de todo el colegio.
+    """
+    terminos = palabras(texto)
+    if not terminos:
+        return queryset
+    guia = None if acotado else max(terminos, key=len)
+    if guia:
+        queryset = queryset.filter(
+            id__in=PalabraAlumno.objects.filter(**_rango(guia)).values('alumno_id')
+        )
+    for termino in terminos:
+        if termino != guia:
+            queryset = queryset.filter(_tiene_palabra(termino, 'pk'))
+    return queryset
+
+
+_CAMPOS_SUGERENCIA = ('id', 'nombre_completo', 'curso_id', 'curso__nombre')
+
+
+def _sugerencias_curso(texto, curso_id, limite):
+    return (
+        filtrar(Alumno.objects.filter(curso_id=curso_id), texto, acotado=True)
+        .order_by('nombre_completo', 'id')
+        .values(*_CAMPOS_SUGERENCIA)[:limite]
+    )
+
+
+def _candidatas(terminos, limite):
+    """ids de alumnos en el orden del índice de palabras, desde el término más largo (con holgura)."""
+    guia = max(terminos, key=len)
+    candidatas = PalabraAlumno.objects.filter(**_rango(guia))
+    for termino in terminos:
+        if termino != guia:
+            candidatas = candidatas.filter(_tiene_palabra(termino, 'alumno_id'))
+    # Un alumno puede aparecer con varias palabras del mismo prefijo: se pide holgura y se deduplica
+    return candidatas.order_by('palabra', 'alumno_id').values_list('alumno_id', flat=True)[:limite * 4]
+
+
+def _sin_repetir(ids, limite):
+    unicos = []
+    for alumno_id in ids:
+        if alumno_id not in unicos:
+            unicos.append(alumno_id)
+            if len(unicos) == limite:
+                break
+    return unicos
+
+
+def sugerencias(texto, curso_id=None, limite=LIMITE_SUGERENCIAS):
+    """
+    Hasta `limite` alumnos que calzan con `texto`, para autocompletar.
+    - Con curso: pocos alumnos, se ordenan por nombre.
+    - Sin curso: se recorre el índice de palabras en orden desde la palabra buscada
+      más larga (la más selectiva) y se corta al llegar al límite; así un prefijo
+      corto ("ma") no obliga a ordenar miles de coincidencias. El orden es por palabra.
+    """
+    terminos = palabras(texto)
+    if not terminos:
+        return []
+    if curso_id:
+        return list(_sugerencias_curso(texto, curso_id, limite))
+
+    ids = _sin_repetir(_candidatas(terminos, limite), limite)
+    por_id = {a['id']: a for a in Alumno.objects.filter(id__in=ids).values(*_CAMPOS_SUGERENCIA)}
+    return [por_id[i] for i in ids if i in por_id]
+
+
+async def asugerencias(texto, curso_id=None, limite=LIMITE_SUGERENCIAS):
+    """Versión async de `sugerencias` (mismas consultas, con el ORM async)."""
+    terminos = palabras(texto)
+    if not terminos:
+        return []
+    if curso_id:
+        return [a async for a in _sugerencias_curso(texto, curso_id, limite)]
+
+    ids = _sin_repetir([i async for i in _candidatas(terminos, limite)], limite)
+    por_id = {a['id']: a async for a in Alumno.objects.filter(id__in=ids).values(*_CAMPOS_SUGERENCIA)}
+    return [por_id[i] for i in ids if i in por_id]
@@ -0,0 +1,157 @@
+# alumnos/cache_estadisticas.py
+import time
+from datetime import date
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import routers
+
+
+PREFIJO = 'estadisticas'
+_CLAVE_GENERACION = f'{PREFIJO}:generacion'
+_CLAVE_CONTADOR = f'{PREFIJO}:contador:{{}}'
+TIPOS = ('estadisticas_mes', 'dashboard')
+
+
+def _timeout(mes):
+    """Meses pasados casi no cambian; el mes en curso expira antes por si hay varios procesos."""
+    hoy = date.today().replace(day=1)
+    if mes < hoy:
+        return getattr(settings, 'ESTADISTICAS_CACHE_TIMEOUT', 60 * 60 * 24)
+    return getattr(settings, 'ESTADISTICAS_CACHE_TIMEOUT_MES_ACTUAL', 60)
+
+
+def _generacion_nueva():
+    # Si la clave de generación se pierde (desalojo del backend, reinicio), la nueva no
+    # debe coincidir con una anterior: las entradas viejas quedarían vigentes otra vez
+    return time.time_ns()
+
+
+def _generacion():
+    return cache.get_or_set(_CLAVE_GENERACION, _generacion_nueva, timeout=None)
+
+
+async def _ageneracion():
+    return await cache.aget_or_set(_CLAVE_GENERACION, _generacion_nueva, timeout=None)
+
+
+def _clave(tipo, mes, generacion=None):
+    return f"{PREFIJO}:{generacion or _generacion()}:{tipo}:{mes:%Y-%m}"
+
+
+def _contar(evento):
+    clave = _CLAVE_CONTADOR.format(evento)
+    cache.add(clave, 0, timeout=None)
+    try:
+        cache.incr(clave)
+    except ValueError:
+        # La clave expiró entre add e incr
+        cache.set(clave, 1, timeout=None)
+
+
+async def _acontar(evento):
+    clave = _CLAVE_CONTADOR.format(evento)
+    await cache.aadd(clave, 0, timeout=None)
+    try:
+        await cache.aincr(clave)
+    except ValueError:
+        await cache.aset(clave, 1, timeout=None)
+
+
+def obtener(tipo, mes, calcular):
+    """
+    Devuelve el valor cacheado de (tipo, mes) o lo calcula con `calcular()` y lo guarda.
+    Lo calculado desde la copia de reportes no se guarda: puede estar atrasado respecto
+    de la generación vigente y quedaría en caché hasta expirar.
+    """
+    clave = _clave(tipo, mes)
+    valor = cache.get(clave)
+    if valor is not None:
+        _contar('hits')
+        return valor
+    _contar('misses')
+    valor = calcular()
+    if not routers.leyendo_copia():
+        cache.set(clave, valor, timeout=_timeout(mes))
+    return valor
+
+
+def obtener_global(tipo, calcular):
+    """
+    Como `obtener`, para valores que no dependen del mes (p. ej. matrícula por curso).
+    Se descartan con `invalidar_todo`; expiran como el mes en curso por si hay varios procesos.
+    """
+    clave = f"{PREFIJO}:{_generacion()}:{tipo}"
+    valor = cache.get(clave)
+    if valor is not None:
+        _contar('hits')
+        return valor
+    _contar('misses')
+    valor = calcular()
+    cache.set(clave, valor, timeout=getattr(settings, 'ESTADISTICAS_CACHE_TIMEOUT_MES_ACTUAL', 60))
+    return valor
+
+
+async def aobtener(tipo, mes, calcular):
+    """Versión async de `obtener`: `calcular` es una función async."""
+    clave = _clave(tipo, mes, await _ageneracion())
+    valor = await cache.aget(clave)
+    if valor is not None:
+        await _acontar('hits')
+        return valor
+    await _acontar('misses')
+    valor = await calcular()
+    if not routers.leyendo_copia():
+        await cache.aset(clave, valor, timeout=_timeout(mes))
+    return valor
+
+
+async def aobtener_global(tipo, calcular):
+    """Versión async de `obtener_global`: `calcular` es una función async."""
+    clave = f"{PREFIJO}:{await _ageneracion()}:{tipo}"
+    valor = await cache.aget(clave)
+    if valor is not None:
+        await _acontar('hits')
+        return valor
+    await _acontar('misses')
+    valor = await calcular()
+    await cache.aset(clave, valor, timeout=getattr(settings, 'ESTADISTICAS_CACHE_TIMEOUT_MES_ACTUAL', 60))
+    return valor
+
+
+def invalidar_mes(mes):
+    """Asistencia o días de clases del mes cambiaron."""
+    generacion = _generacion()
+    cache.delete_many([_clave(tipo, mes, generacion) for tipo in TIPOS])
+
+
+def invalidar_todo():
+    """Cambió la matrícula (afecta a todos los meses): se descartan todas las claves."""
+    try:
+        cache.incr(_CLAVE_GENERACION)
+    except ValueError:
+        cache.set(_CLAVE_GENERACION, _generacion_nueva(), timeout=None)
+
+
+def _ratio(hits, misses):
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'ratio': round(hits / total, 3) if total else 0.0,
+    }
+
+
+def contadores():
+    return _ratio(
+        cache.get(_CLAVE_CONTADOR.format('hits'), 0),
+        cache.get(_CLAVE_CONTADOR.format('misses'), 0),
+    )
+
+
+async def acontadores():
+    return _ratio(
+        await cache.aget(_CLAVE_CONTADOR.format('hits'), 0),
+        await cache.aget(_CLAVE_CONTADOR.format('misses'), 0),
+    )
@@ -0,0 +1,100 @@
+# alumnos/cache_exportaciones.py
+"""
+Exportaciones ya generadas, guardadas en disco y direccionadas por contenido:
+el nombre del archivo es un hash de (versión de datos, formato, filtro).
+Mientras nadie escriba, pedir lo mismo devuelve el mismo archivo sin regenerarlo.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from contextlib import suppress
+from pathlib import Path
+
+from django.conf import settings
+
+from . import versiones
+from .exportacion import FORMATOS, generar_archivo
+
+
+def _directorio():
+    directorio = Path(getattr(settings, 'EXPORTACION_CACHE_DIR', Path(settings.MEDIA_ROOT) / 'exportaciones'))
+    directorio.mkdir(parents=True, exist_ok=True)
+    return directorio
+
+
+def clave(formato, filtro=None):
+    """
+    Hash de lo que define el contenido del archivo. Sirve también como ETag.
+    La versión se lee antes de generar: si los datos cambian durante la generación,
+    la versión sube y nadie vuelve a pedir esta clave.
+    """
+    base = json.dumps(
+        {'version': versiones.version_actual(), 'formato': formato, 'filtro': filtro or {}},
+        sort_keys=True,
+    )
+    return hashlib.sha256(base.encode('utf-8')).hexdigest()[:32]
+
+
+def _ruta(clave_archivo, formato):
+    return _directorio() / f"{clave_archivo}.{FORMATOS[formato][1]}"
+
+
+def abrir(formato, filtro=None, clave_archivo=None, al_avanzar=None):
+    """
+    Devuelve (archivo abierto en binario, clave) para estos parámetros, generándolo si no existe.
+    Un acierto renueva la fecha de uso del archivo (para el desalojo LRU).
+    Se devuelve ya abierto para que un desalojo concurrente no lo borre antes de leerlo.
+    """
+    clave_archivo = clave_archivo or clave(formato, filtro)
+    ruta = _ruta(clave_archivo, formato)
+    try:
+        archivo = open(ruta, 'rb')
+    except FileNotFoundError:
+        pass
+    else:
+        with suppress(FileNotFoundError):
+            os.utime(ruta)
+        return archivo, clave_archivo
+
+    # Se escribe en un temporal del mismo directorio y se renombra: quien lea
+    # nunca ve un archivo a medias, y dos generaciones simultáneas no se pisan.
+    with generar_archivo(al_avanzar=al_avanzar, formato=formato, filtro=filtro) as tmp:
+        fd, temporal = tempfile.mkstemp(dir=_directorio(), suffix='.parcial')
+        with os.fdopen(fd, 'wb') as destino:
+            shutil.copyfileobj(tmp, destino)
+    os.replace(temporal, ruta)
+    archivo = open(ruta, 'rb')
+    desalojar(conservar=ruta)
+    return archivo, clave_archivo
+
+
+def desalojar(max_bytes=None, conservar=None):
+    """
+    Borra los archivos usados hace más tiempo hasta quedar bajo EXPORTACION_CACHE_MAX_BYTES.
+    `conservar`: ruta que no se borra (el archivo recién generado).
+    """
+    if max_bytes is None:
+        max_bytes = getattr(settings, 'EXPORTACION_CACHE_MAX_BYTES', 512 * 1024 * 1024)
+    archivos = []
+    total = 0
+    for ruta in _directorio().iterdir():
+        if ruta.suffix == '.parcial':
+            continue
+        try:
+            info = ruta.stat()
+        except FileNotFoundError:
+            continue  # lo borró otro proceso
+        total += info.st_size
+        if ruta != conservar:
+            archivos.append((info.st_mtime, info.st_size, ruta))
+
+    borrados = 0
+    for _, tamano, ruta in sorted(archivos):
+        if total <= max_bytes:
+            break
+        ruta.unlink(missing_ok=True)
+        total -= tamano
+        borrados += 1
+    return borrados
@@ -0,0 +1,162 @@
+# alumnos/estadisticas.py
+from django.db.models import Count
+
+from . import cache_estadisticas
+from .models import Alumno, Curso, ResumenCursoMensual
+
+
+MAX_MESES_TENDENCIA = 36
+
+
+def resumenes_del_mes(mes_date):
+    """{curso_id: ResumenCursoMensual} del mes (una consulta)."""
+    return {r.curso_id: r for r in ResumenCursoMensual.objects.filter(mes=mes_date)}
+
+
+def matricula_por_curso(curso_ids):
+    """{curso_id: n_alumnos} en una consulta agrupada (cursos sin resumen en el mes)."""
+    if not curso_ids:
+        return {}
+    return {
+        x['curso_id']: x['n']
+        for x in Alumno.objects.filter(curso_id__in=curso_ids).values('curso_id').annotate(n=Count('id'))
+    }
+
+
+def matricula_cacheada():
+    """
+    {curso_id: n_alumnos} de todos los cursos, desde la caché de estadísticas
+    (se invalida con cada alta, baja o cambio de curso). Evita un COUNT(*) por página.
+    """
+    return cache_estadisticas.obtener_global('matricula', lambda: dict(
+        Alumno.objects.values('curso_id').annotate(n=Count('id')).values_list('curso_id', 'n')
+    ))
+
+
+async def amatricula_cacheada():
+    """Versión async de `matricula_cacheada`."""
+    async def calcular():
+        return {
+            curso_id: n
+            async for curso_id, n in Alumno.objects.values('curso_id').annotate(n=Count('id')).values_list('curso_id', 'n')
+        }
+    return await cache_estadisticas.aobtener_global('matricula', calcular)
+
+
+def promedios_por_curso(mes_date):
+    """
+    Promedio del % de asistencia de los alumnos de cada curso en el mes.
+    Igual que el dashboard original: solo cuentan alumnos con registro del mes
+    y cursos con días de clases definidos; cada % individual se redondea a 1 decimal.
+    Devuelve {curso_id: promedio}.
+    """
+    return {
+        curso_id: round(r.suma_porcentajes / r.n_registros, 1)
+        for curso_id, r in resumenes_del_mes(mes_date).items()
+        if r.dias_clases > 0 and r.n_registros > 0
+    }
+
+
+def porcentaje_curso(presentes_total, dias, n_alumnos):
+    """% de asistencia del curso: presentes / (días * alumnos), acotado a 0..100 con 1 decimal."""
+    if dias <= 0 or n_alumnos <= 0:
+        return 0.0
+    porcentaje = (presentes_total / (dias * n_alumnos)) * 100.0
+    return round(max(0.0, min(100.0, porcentaje)), 1)
+
+
+def _filas_estadisticas(cursos, resumenes, matricula):
+    """Arma las filas de `estadisticas_mes` a partir de [(id, nombre)], resúmenes y matrícula."""
+    data_cursos = []
+    for curso_id, nombre in cursos:
+        r = resumenes.get(curso_id)
+        n_alumnos = r.n_alumnos if r else matricula.get(curso_id, 0)
+        dias = r.dias_clases if r else 0
+        presentes_total = r.presentes_total if r else 0
+        data_cursos.append({
+            'curso_id': curso_id,
+            'curso': nombre,
+            'porcentaje': porcentaje_curso(presentes_total, dias, n_alumnos),
+            'alumnos': n_alumnos,
+            'presentes_total': presentes_total,
+            'dias_clases': dias,
+        })
+    return data_cursos
+
+
+def estadisticas_mes(mes_date):
+    """
+    Filas de `ajax_estadisticas_mes`, una por curso (ordenadas por nombre):
+    {"curso_id", "curso", "porcentaje", "alumnos", "presentes_total", "dias_clases"}
+    """
+    cursos = list(Curso.objects.order_by('nombre').values_list('id', 'nombre'))
+    resumenes = resumenes_del_mes(mes_date)
+    matricula = matricula_por_curso([c for c, _ in cursos if c not in resumenes])
+    return _filas_estadisticas(cursos, resumenes, matricula)
+
+
+async def aestadisticas_mes(mes_date):
+    """Versión async de `estadisticas_mes` (ORM async, para vistas servidas por ASGI)."""
+    cursos = [c async for c in Curso.objects.order_by('nombre').values_list('id', 'nombre')]
+    resumenes = {r.curso_id: r async for r in ResumenCursoMensual.objects.filter(mes=mes_date).aiterator()}
+    faltan = [c for c, _ in cursos if c not in resumenes]
+    matricula = {}
+    if faltan:
+        matricula = {
+            x['curso_id']: x['n']
+            async for x in Alumno.objects.filter(curso_id__in=faltan).values('curso_id').annotate(n=Count('id'))
+        }
+    return _filas_estadisticas(cursos, resumenes, matricula)
+
+
+def meses_entre(desde, hasta):
+    """Primeros de mes de `desde` a `hasta`, ambos incluidos."""
+    meses = []
+    mes = desde.replace(day=1)
+    while mes <= hasta:
+        meses.append(mes)
+        mes = mes.replace(year=mes.year + mes.month // 12, month=mes.month % 12 + 1)
+    return meses
+
+
+def _resumenes_rango(meses):
+    # La tabla de resúmenes ya está agrupada por (curso, mes) con los días de clases:
+    # una consulta por el índice de mes para todo el rango
+    return ResumenCursoMensual.objects.filter(mes__range=(meses[0], meses[-1])).values_list(
+        'curso_id', 'mes', 'presentes_total', 'dias_clases', 'n_alumnos'
+    )
+
+
+def _matriz_tendencia(cursos, meses, filas):
+    """Arma la respuesta columnar de `tendencia` desde [(id, nombre)] y las filas de resúmenes."""
+    columna = {mes: j for j, mes in enumerate(meses)}
+    fila = {curso_id: i for i, (curso_id, _) in enumerate(cursos)}
+    porcentajes = [[None] * len(meses) for _ in cursos]
+    for curso_id, mes, presentes_total, dias, n_alumnos in filas:
+        if curso_id in fila and dias > 0 and n_alumnos > 0:
+            porcentajes[fila[curso_id]][columna[mes]] = porcentaje_curso(presentes_total, dias, n_alumnos)
+    return {
+        'meses': [f'{mes:%Y-%m}' for mes in meses],
+        'curso_ids': [curso_id for curso_id, _ in cursos],
+        'cursos': [nombre for _, nombre in cursos],
+        'porcentajes': porcentajes,
+    }
+
+
+def tendencia(desde, hasta):
+    """
+    % de asistencia por curso y mes entre `desde` y `hasta` (dos consultas), en columnas:
+    {"meses": ["YYYY-MM", ...], "curso_ids": [...], "cursos": [...],
+     "porcentajes": [[% o null por mes] por curso]}
+    Mismo cálculo que `estadisticas_mes`; null = mes sin días de clases o sin alumnos.
+    """
+    meses = meses_entre(desde, hasta)
+    cursos = list(Curso.objects.order_by('nombre').values_list('id', 'nombre'))
+    return _matriz_tendencia(cursos, meses, _resumenes_rango(meses))
+
+
+async def atendencia(desde, hasta):
+    """Versión async de `tendencia`."""
+    meses = meses_entre(desde, hasta)
+    cursos = [c async for c in Curso.objects.order_by('nombre').values_list('id', 'nombre')]
+    return _matriz_tendencia(cursos, meses, [f async for f in _resumenes_rango(meses)])
@@ -0,0 +1,68 @@
+# alumnos/eventos.py
+"""
+Pub/sub en memoria del proceso para empujar cambios a las conexiones SSE abiertas.
+Las vistas que escriben (síncronas, en cualquier hilo) publican; cada conexión
+suscrita tiene una cola en su event loop. Otros procesos (otro worker ASGI,
+`procesar_trabajos`) no llegan por aquí: para eso la conexión compara
+periódicamente la versión de datos (ver `views.sse_estadisticas_mes`).
+"""
+import asyncio
+import threading
+from collections import defaultdict
+
+from django.db import transaction
+
+
+MAX_PENDIENTES = 100
+
+_lock = threading.Lock()
+_suscriptores = defaultdict(set)  # canal -> {(loop, cola)}
+
+
+def canal_mes(mes):
+    return f"estadisticas:{mes:%Y-%m}"
+
+
+def suscribir(canal):
+    """Registra una cola para `canal` en el event loop actual. Devuelve (loop, cola)."""
+    entrada = (asyncio.get_running_loop(), asyncio.Queue(maxsize=MAX_PENDIENTES))
+    with _lock:
+        _suscriptores[canal].add(entrada)
+    return entrada
+
+
+def desuscribir(canal, entrada):
+    with _lock:
+        _suscriptores[canal].discard(entrada)
+        if not _suscriptores[canal]:
+            del _suscriptores[canal]
+
+
+def hay_suscriptores(canal):
+    return canal in _suscriptores
+
+
+def _entregar(cola, evento):
+    try:
+        cola.put_nowait(evento)
+    except asyncio.QueueFull:
+        # Cliente que no lee: se pierde el delta; el respaldo por versión lo repone
+        pass
+
+
+def publicar(canal, evento):
+    """Entrega `evento` a los suscriptores de `canal`. Se puede llamar desde cualquier hilo."""
+    with _lock:
+        destinos = list(_suscriptores.get(canal, ()))
+    for loop, cola in destinos:
+        try:
+            loop.call_soon_threadsafe(_entregar, cola, evento)
+        except RuntimeError:
+            pass  # el loop de esa conexión ya se cerró
+    return len(destinos)
+
+
+def publicar_al_confirmar(canal, evento):
+    """Publica cuando se confirme la transacción en curso (de inmediato si no hay)."""
+    if hay_suscriptores(canal):
+        transaction.on_commit(lambda: publicar(canal, evento))
@@ -0,0 +1,363 @@
+# alumnos/exportacion.py
+import multiprocessing
+import os
+import tempfile
+import zipfile
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Font, PatternFill, Border, Side, NamedStyle
+from openpyxl.chart import BarChart, Reference
+from openpyxl.utils import get_column_letter
+
+from .estadisticas import resumenes_del_mes
+from .hojas import mes_label, filas_hoja_curso, csv_curso, nombre_archivo_curso
+from .models import Alumno, Curso, AsistenciaMensual, DiasClaseMensual
+
+
+CONTENT_TYPE_XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+CONTENT_TYPE_ZIP = "application/zip"
+# Hasta este tamaño el archivo temporal vive en memoria; sobre eso pasa a disco
+MAX_EN_MEMORIA = 8 * 1024 * 1024
+
+
+def _estilos():
+    """
+    Estilos con nombre, creados una vez por libro y compartidos por todas las celdas
+    (evita crear Font/Alignment/Border por celda).
+    """
+    thin = Side(style="thin", color="CCCCCC")
+    border_all = Border(left=thin, right=thin, top=thin, bottom=thin)
+    header_fill = PatternFill("solid", fgColor="E9ECEF")
+    centro = Alignment(horizontal="center")
+
+    definiciones = {
+        "titulo": dict(font=Font(bold=True, size=14), alignment=centro),
+        "encabezado": dict(font=Font(bold=True), fill=header_fill, border=border_all, alignment=centro),
+        "subencabezado": dict(
+            font=Font(bold=True), fill=header_fill, border=border_all,
+            alignment=Alignment(horizontal="center", vertical="center", wrap_text=True),
+        ),
+        "alumno": dict(border=border_all, alignment=Alignment(vertical="center")),
+        "dato": dict(border=border_all, alignment=centro),
+        "porcentaje": dict(number_format="0.00%", border=border_all, alignment=centro),
+        "porcentaje_simple": dict(number_format="0.00%"),
+        "negrita": dict(font=Font(bold=True)),
+        "vacio": dict(font=Font(italic=True, color="888888")),
+    }
+    return [NamedStyle(name=nombre, **attrs) for nombre, attrs in definiciones.items()]
+
+
+def _mes_param(valor, nombre):
+    try:
+        return datetime.strptime(valor, "%Y-%m").date()
+    except ValueError:
+        raise ValueError(f"`{nombre}` debe tener formato AAAA-MM.")
+
+
+def leer_filtro(params):
+    """
+    Valida los parámetros de recorte de la exportación (p. ej. request.GET):
+    - desde / hasta: meses AAAA-MM, inclusive
+    - cursos: ids separados por coma
+    - modificado_desde: fecha-hora ISO; solo los (curso, mes) con filas modificadas después
+    Devuelve un dict serializable en JSON (se guarda en Trabajo.parametros).
+    Lanza ValueError con un mensaje para el usuario si algo no es válido.
+    """
+    filtro = {}
+    for nombre in ("desde", "hasta"):
+        valor = (params.get(nombre) or "").strip()
+        if valor:
+            _mes_param(valor, nombre)
+            filtro[nombre] = valor
+    if "desde" in filtro and "hasta" in filtro and filtro["desde"] > filtro["hasta"]:
+        raise ValueError("`desde` no puede ser posterior a `hasta`.")
+
+    cursos = (params.get("cursos") or "").strip()
+    if cursos:
+        try:
+            filtro["cursos"] = sorted({int(c) for c in cursos.split(",") if c.strip()})
+        except ValueError:
+            raise ValueError("`cursos` debe ser una lista de ids separados por coma.")
+
+    modificado = (params.get("modificado_desde") or "").strip()
+    if modificado:
+        try:
+            momento = parse_datetime(modificado)
+        except ValueError:
+            momento = None
+        if momento is None:
+            raise ValueError("`modificado_desde` debe ser una fecha-hora ISO 8601.")
+        if timezone.is_naive(momento):
+            momento = timezone.make_aware(momento)
+        filtro["modificado_desde"] = momento.isoformat()
+    return filtro
+
+
+def cargar_datos(filtro=None):
+    """
+    Primera pasada: todo lo que necesita el libro, en pocas consultas,
+    indexado en memoria para no consultar dentro de los bucles.
+    `filtro` es el dict de `leer_filtro` (sin filtro: todos los cursos y meses).
+    Devuelve (meses, cursos, tareas), con una tarea por curso en el mismo orden:
+    (nombre_curso, meses_del_curso, alumnos, dias, asis), solo datos planos
+    (ver `hojas.filas_hoja_curso`), para poder enviarla a otro proceso.
+    """
+    filtro = filtro or {}
+    asistencias = AsistenciaMensual.objects.all()
+    dias_clase = DiasClaseMensual.objects.all()
+    cursos_qs = Curso.objects.all()
+    alumnos_qs = Alumno.objects.all()
+
+    if "desde" in filtro:
+        desde = _mes_param(filtro["desde"], "desde")
+        asistencias = asistencias.filter(mes__gte=desde)
+        dias_clase = dias_clase.filter(mes__gte=desde)
+    if "hasta" in filtro:
+        hasta = _mes_param(filtro["hasta"], "hasta")
+        asistencias = asistencias.filter(mes__lte=hasta)
+        dias_clase = dias_clase.filter(mes__lte=hasta)
+    if "cursos" in filtro:
+        # Los registros se agrupan por el curso actual del alumno (igual que las hojas)
+        asistencias = asistencias.filter(alumno__curso_id__in=filtro["cursos"])
+        dias_clase = dias_clase.filter(curso_id__in=filtro["cursos"])
+        cursos_qs = cursos_qs.filter(id__in=filtro["cursos"])
+        alumnos_qs = alumnos_qs.filter(curso_id__in=filtro["cursos"])
+
+    meses_por_curso = None
+    if "modificado_desde" in filtro:
+        # Modo incremental: solo los (curso, mes) con alguna fila modificada después del corte
+        momento = parse_datetime(filtro["modificado_desde"])
+        meses_por_curso = defaultdict(set)
+        for curso_id, mes in (
+            dias_clase.filter(actualizado__gt=momento).values_list("curso_id", "mes").distinct()
+        ):
+            meses_por_curso[curso_id].add(mes)
+        for curso_id, mes in (
+            asistencias.filter(actualizado__gt=momento).values_list("alumno__curso_id", "mes").distinct()
+        ):
+            meses_por_curso[curso_id].add(mes)
+
+        meses = sorted(set().union(*meses_por_curso.values()))
+        asistencias = asistencias.filter(mes__in=meses, alumno__curso_id__in=meses_por_curso)
+        dias_clase = dias_clase.filter(mes__in=meses, curso_id__in=meses_por_curso)
+        cursos_qs = cursos_qs.filter(id__in=meses_por_curso)
+        alumnos_qs = alumnos_qs.filter(curso_id__in=meses_por_curso)
+    else:
+        # Meses con cualquier dato
+        meses_asistencia = asistencias.values_list("mes", flat=True).distinct()
+        meses_dias = dias_clase.values_list("mes", flat=True).distinct()
+        meses = sorted(set(meses_asistencia) | set(meses_dias))
+
+    cursos = list(cursos_qs.order_by("nombre"))
+
+    alumnos_por_curso = defaultdict(list)
+    curso_de_alumno = {}
+    for alumno_id, nombre, curso_id in (
+        alumnos_qs.order_by("nombre_completo")
+        .values_list("id", "nombre_completo", "curso_id")
+        .iterator(chunk_size=5000)
+    ):
+        alumnos_por_curso[curso_id].append((alumno_id, nombre))
+        curso_de_alumno[alumno_id] = curso_id
+
+    dias_por_curso = defaultdict(dict)
+    for curso_id, mes, dias in dias_clase.values_list("curso_id", "mes", "dias_clases"):
+        dias_por_curso[curso_id][mes] = dias
+
+    # Cada registro va a la tarea del curso actual del alumno
+    asis_por_curso = defaultdict(dict)
+    for alumno_id, mes, pres, inas in (
+        asistencias
+        .values_list("alumno_id", "mes", "presentes", "inasistentes")
+        .iterator(chunk_size=5000)
+    ):
+        asis_por_curso[curso_de_alumno.get(alumno_id)][(alumno_id, mes)] = (pres, inas)
+
+    tareas = [
+        (
+            curso.nombre,
+            sorted(meses_por_curso[curso.id]) if meses_por_curso is not None else meses,
+            alumnos_por_curso.get(curso.id, []),
+            dias_por_curso.get(curso.id, {}),
+            asis_por_curso.get(curso.id, {}),
+        )
+        for curso in cursos
+    ]
+    return meses, cursos, tareas
+
+
+def numero_workers(workers=None):
+    """
+    Procesos para preparar los cursos: argumento, o settings.EXPORTACION_WORKERS.
+    0 = uno por CPU; 1 = todo en el proceso actual (sin pool).
+    """
+    if workers is None:
+        workers = getattr(settings, "EXPORTACION_WORKERS", 1)
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    return workers
+
+
+def _en_paralelo(funcion, tareas, workers):
+    """
+    Aplica `funcion` a cada tarea en un pool de procesos y entrega los resultados
+    en el orden de las tareas, a medida que están listos. Mantiene como mucho
+    2 × workers tareas en vuelo para no acumular en memoria el libro completo
+    si el escritor va más lento que los workers.
+    Los workers se crean con 'spawn': hacer fork de un servidor con hilos
+    (gunicorn con threads, uvicorn) puede copiar locks tomados o conexiones
+    abiertas. `funcion` tiene que vivir en un módulo sin Django (ver hojas.py).
+    """
+    if workers <= 1 or len(tareas) <= 1:
+        yield from map(funcion, tareas)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        pendientes = deque()
+        for tarea in tareas:
+            pendientes.append(pool.submit(funcion, tarea))
+            if len(pendientes) >= 2 * workers:
+                yield pendientes.popleft().result()
+        while pendientes:
+            yield pendientes.popleft().result()
+
+
+def _escribir_filas(ws, filas):
+    for fila in filas:
+        celdas = []
+        for item in fila:
+            if item is None:
+                celdas.append(None)
+                continue
+            valor, estilo = item
+            celda = WriteOnlyCell(ws, value=valor)
+            if estilo:
+                celda.style = estilo
+            celdas.append(celda)
+        ws.append(celdas)
+
+
+def _hoja_graficos(wb, cursos, meses):
+    """Tabla de % por curso del último mes con datos + gráfico de barras."""
+    ws = wb.create_sheet(title="Gráficos")
+    ws.column_dimensions['A'].width = 30
+    ws.column_dimensions['B'].width = 22
+
+    # Último mes con datos
+    mes_seleccionado = meses[-1] if meses else None
+    etiqueta_mes = mes_label(mes_seleccionado) if mes_seleccionado else "SIN DATOS"
+    resumenes = resumenes_del_mes(mes_seleccionado) if mes_seleccionado else {}
+
+    filas = [[("Curso", "negrita"), (f"% Asistencia {etiqueta_mes}", "negrita")]]
+    for curso in cursos:
+        pct = 0.0
+        r = resumenes.get(curso.id)
+        if r and r.dias_clases > 0 and r.n_alumnos > 0:
+            pct = r.presentes_total / float(r.dias_clases * r.n_alumnos)
+        filas.append([(curso.nombre, None), (pct, "porcentaje_simple")])
+    _escribir_filas(ws, filas)
+
+    # Configurar gráfico de barras (simple y funcional)
+    num_cursos = len(cursos)
+    if num_cursos > 0:
+        chart = BarChart()
+        chart.title = f"Asistencia por Curso - {etiqueta_mes}"
+        chart.y_axis.title = "Porcentaje de asistencia"
+        chart.y_axis.number_format = "0%"
+        chart.x_axis.title = "Curso"
+        chart.style = 2
+
+        data = Reference(ws, min_col=2, min_row=1, max_row=num_cursos + 1)
+        cats = Reference(ws, min_col=1, min_row=2, max_row=num_cursos + 1)
+        chart.add_data(data, titles_from_data=True)
+        chart.set_categories(cats)
+        ws.add_chart(chart, "D2")
+
+
+def escribir_libro(destino, al_avanzar=None, workers=None, filtro=None):
+    """
+    Escribe el libro de asistencia en `destino` (archivo binario) con un Workbook
+    write-only: las filas se vuelcan a medida que se generan.
+    Hoja "Gráficos" primero (activa) + una hoja por curso, recortadas según `filtro`.
+    Las filas de cada curso se preparan en paralelo (`workers`, ver `numero_workers`);
+    este proceso es el único que escribe el libro, en el orden de los cursos.
+    `al_avanzar(hechos, total)` se llama tras cada hoja de curso (progreso de trabajos).
+    """
+    wb = Workbook(write_only=True)
+    for estilo in _estilos():
+        wb.add_named_style(estilo)
+
+    # Primera pasada: índices en memoria; la segunda solo lee de ellos
+    meses, cursos, tareas = cargar_datos(filtro)
+
+    _hoja_graficos(wb, cursos, meses)
+
+    # ========= Hojas por curso =========
+    filas_por_curso = _en_paralelo(filas_hoja_curso, tareas, numero_workers(workers))
+    for n_curso, (curso, tarea, filas) in enumerate(zip(cursos, tareas, filas_por_curso), start=1):
+        ws = wb.create_sheet(title=curso.nombre[:31])
+        end_col = 1 + len(tarea[1]) * 4  # en modo incremental cada curso tiene sus meses
+
+        # En write-only, anchos, paneles y celdas combinadas se definen antes de escribir
+        if end_col > 1:
+            ws.merged_cells.add(f"A1:{get_column_letter(end_col)}1")
+        for col in range(2, end_col, 4):
+            ws.merged_cells.add(f"{get_column_letter(col)}2:{get_column_letter(col + 3)}2")
+        if tarea[2]:
+            ws.column_dimensions['A'].width = 40
+            for c in range(2, end_col):
+                ws.column_dimensions[get_column_letter(c)].width = 14
+            ws.freeze_panes = "A4"
+
+        _escribir_filas(ws, filas)
+
+        if al_avanzar:
+            al_avanzar(n_curso, len(cursos))
+
+    wb.save(destino)
+
+
+def escribir_zip(destino, al_avanzar=None, workers=None, filtro=None):
+    """
+    Variante sin formato para análisis: un ZIP con un CSV por curso (ver `hojas.csv_curso`).
+    Cada CSV se genera completo en un worker; aquí solo se agregan al ZIP.
+    """
+    _, cursos, tareas = cargar_datos(filtro)
+    usados = set()
+    with zipfile.ZipFile(destino, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        contenidos = _en_paralelo(csv_curso, tareas, numero_workers(workers))
+        for n_curso, (curso, contenido) in enumerate(zip(cursos, contenidos), start=1):
+            nombre = nombre_archivo_curso(curso.nombre)
+            if nombre in usados:
+                nombre = f"{nombre}_{curso.id}"
+            usados.add(nombre)
+            zf.writestr(f"{nombre}.csv", contenido)
+            if al_avanzar:
+                al_avanzar(n_curso, len(cursos))
+
+
+FORMATOS = {
+    # formato: (función que escribe, extensión, content type)
+    "xlsx": (escribir_libro, "xlsx", CONTENT_TYPE_XLSX),
+    "zip": (escribir_zip, "zip", CONTENT_TYPE_ZIP),
+}
+
+
+def generar_archivo(al_avanzar=None, formato="xlsx", workers=None, filtro=None):
+    """
+    Genera la exportación en un archivo temporal (en memoria hasta MAX_EN_MEMORIA, luego en disco)
+    y lo devuelve rebobinado. Quien lo use debe cerrarlo.
+    """
+    escribir = FORMATOS[formato][0]
+    tmp = tempfile.SpooledTemporaryFile(max_size=MAX_EN_MEMORIA)
+    escribir(tmp, al_avanzar=al_avanzar, workers=workers, filtro=filtro)
+    tmp.seek(0)
+    return tmp
@@ -0,0 +1,114 @@
+# alumnos/hojas.py
+"""
+Construcción del contenido de cada curso para la exportación, sin Django:
+solo recibe datos planos (tuplas y dicts), así los workers de un pool de
+procesos pueden importarlo y ejecutarlo sin cargar el ORM.
+"""
+import csv
+import io
+import re
+
+from openpyxl.utils import get_column_letter
+
+
+MESES_ES = {
+    1: "ENERO", 2: "FEBRERO", 3: "MARZO", 4: "ABRIL",
+    5: "MAYO", 6: "JUNIO", 7: "JULIO", 8: "AGOSTO",
+    9: "SEPTIEMBRE", 10: "OCTUBRE", 11: "NOVIEMBRE", 12: "DICIEMBRE"
+}
+
+def mes_label(fecha):
+    # fecha es date (día = 1)
+    return f"{MESES_ES[fecha.month]} {fecha.year}"
+
+
+COLUMNAS_CSV = ["alumno", "mes", "dias_clases", "presentes", "inasistentes", "porcentaje_asistencia"]
+
+
+def filas_hoja_curso(tarea):
+    """
+    Filas de la hoja de un curso como listas de (valor, estilo); None = celda vacía.
+    `tarea` = (nombre_curso, meses, alumnos, dias, asis) con:
+    - alumnos: [(alumno_id, nombre_completo)] ya ordenados
+    - dias[mes] = días de clases del curso
+    - asis[(alumno_id, mes)] = (presentes, inasistentes)
+    """
+    nombre_curso, meses, alumnos, dias_por_mes, asis = tarea
+    filas = [[(f"LISTA Y ASISTENCIA - {nombre_curso}", "titulo")]]
+
+    encabezado = [("ALUMNO", "encabezado")]
+    subencabezado = [None]
+    for m in meses:
+        encabezado += [(mes_label(m), "encabezado"), None, None, None]
+        subencabezado += [(txt, "subencabezado") for txt in ["DÍAS CLASE", "PRESENTES", "INASISTENTES", "% ASISTENCIA"]]
+    filas += [encabezado, subencabezado]
+
+    if not alumnos:
+        filas.append([("(Sin alumnos en este curso)", "vacio")])
+        return filas
+
+    # Datos por alumno
+    first_data_row = 4
+    for r, (alumno_id, nombre_completo) in enumerate(alumnos, start=first_data_row):
+        fila = [(nombre_completo, "alumno")]
+        col = 2
+        for m in meses:
+            dias = dias_por_mes.get(m, 0)
+            pres, inas = asis.get((alumno_id, m), (0, 0))
+            # % = IF(dias>0, presentes/dias, 0)
+            dias_addr = f"{get_column_letter(col)}{r}"
+            pres_addr = f"{get_column_letter(col + 1)}{r}"
+            fila += [
+                (dias, "dato"), (pres, "dato"), (inas, "dato"),
+                (f"=IF({dias_addr}>0,{pres_addr}/{dias_addr},0)", "porcentaje"),
+            ]
+            col += 4
+        filas.append(fila)
+    last_data_row = first_data_row + len(alumnos) - 1
+    total_alumnos = len(alumnos)
+
+    # Fila: Total alumnos (tras una fila en blanco)
+    resumen_row_2 = last_data_row + 3
+    filas.append([])
+    filas.append([("Total alumnos", "negrita"), (total_alumnos, None)])
+
+    # Fila: Resumen por mes (DÍAS CLASE y % ASISTENCIA DEL CURSO)
+    resumen = [("Resumen por mes", "negrita")]
+    col = 2
+    for m in meses:
+        dias = dias_por_mes.get(m, 0)
+        # % asistencia del curso = SUM(presentes) / (dias * total_alumnos)
+        pres_col_letter = get_column_letter(col + 1)
+        sum_pres = f"=SUM({pres_col_letter}{first_data_row}:{pres_col_letter}{last_data_row})"
+        dias_addr = f"{get_column_letter(col)}{resumen_row_2}"
+        if dias > 0 and total_alumnos > 0:
+            pct = f"=IF({dias_addr}>0,({sum_pres})/({dias_addr}*{total_alumnos}),0)"
+        else:
+            pct = 0
+        resumen += [(dias, "dato"), None, None, (pct, "porcentaje")]
+        col += 4
+    filas.append(resumen)
+    return filas
+
+
+def csv_curso(tarea):
+    """
+    CSV (UTF-8 con BOM, para Excel) de un curso en formato largo:
+    una fila por alumno y mes, con el % ya calculado. Misma `tarea` que `filas_hoja_curso`.
+    """
+    _, meses, alumnos, dias_por_mes, asis = tarea
+    salida = io.StringIO()
+    writer = csv.writer(salida)
+    writer.writerow(COLUMNAS_CSV)
+    for alumno_id, nombre_completo in alumnos:
+        for m in meses:
+            dias = dias_por_mes.get(m, 0)
+            pres, inas = asis.get((alumno_id, m), (0, 0))
+            pct = round(pres * 100.0 / dias, 2) if dias > 0 else 0
+            writer.writerow([nombre_completo, m.strftime("%Y-%m"), dias, pres, inas, pct])
+    return salida.getvalue().encode("utf-8-sig")
+
+
+def nombre_archivo_curso(nombre_curso):
+    """Nombre de archivo seguro para el CSV de un curso."""
+    return re.sub(r"[^\w\- ]+", "_", nombre_curso).strip() or "curso"
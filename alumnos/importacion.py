@@ -0,0 +1,113 @@
+# alumnos/importacion.py
+import pandas as pd
+from django.db import transaction
+
+from . import busqueda
+from .models import Alumno, Curso
+from .normalizacion import normalizar_serie, unir_partes_serie
+from .resumenes import actualizar_resumenes_curso
+
+
+FECHA_SIN_RETIRO = pd.to_datetime('1900-01-01')
+TAMANO_LOTE = 1000
+
+
+def preparar_filas(df):
+    """
+    Normaliza el DataFrame del SIS columna por columna.
+    Devuelve (DataFrame con columnas nombre_completo / nombre_curso, n_retirados).
+    """
+    total = len(df)
+    df = df[df['Fecha Retiro'] == FECHA_SIN_RETIRO]
+    retirados = total - len(df)
+
+    nombre = normalizar_serie(df['Nombres'])
+    apellido_paterno = normalizar_serie(df['Apellido Paterno'])
+    apellido_materno = normalizar_serie(df['Apellido Materno'])
+    desc_grado = normalizar_serie(df['Desc Grado'])
+    letra_curso = normalizar_serie(df['Letra Curso'])
+
+    filas = pd.DataFrame({
+        'nombre_completo': unir_partes_serie(apellido_paterno, apellido_materno, nombre),
+        'nombre_curso': unir_partes_serie(desc_grado, letra_curso),
+    })
+    return filas, retirados
+
+
+def _resolver_cursos(nombres_curso):
+    """Devuelve {nombre: id} creando en lote los cursos que no existan."""
+    cursos = dict(
+        Curso.objects.filter(nombre__in=nombres_curso).values_list('nombre', 'id')
+    )
+    nuevos = [n for n in nombres_curso if n not in cursos]
+    if nuevos:
+        Curso.objects.bulk_create(
+            [Curso(nombre=n) for n in nuevos],
+            batch_size=TAMANO_LOTE,
+            ignore_conflicts=True,
+        )
+        cursos.update(
+            Curso.objects.filter(nombre__in=nuevos).values_list('nombre', 'id')
+        )
+    return cursos, len(nuevos)
+
+
+def importar_bloques(bloques, al_avanzar=None):
+    """
+    Importa alumnos desde bloques (DataFrames) del SIS.
+    - Filtra retirados (`Fecha Retiro` distinta de 1900-01-01).
+    - Resuelve cursos y alumnos existentes con una consulta por cada curso nuevo visto.
+    - Crea lo nuevo con `bulk_create` por lotes, una transacción por bloque.
+      Reimportar el mismo archivo es seguro: lo ya existente se omite.
+    `al_avanzar(filas_procesadas)` se llama tras confirmar cada bloque.
+    Devuelve un dict con: insertados, omitidos, retirados, cursos_creados.
+    """
+    totales = {'insertados': 0, 'omitidos': 0, 'retirados': 0, 'cursos_creados': 0}
+    cursos = {}
+    existentes = set()
+    cursos_con_altas = set()
+    procesadas = 0
+
+    for df in bloques:
+        with transaction.atomic():
+            filas, retirados = preparar_filas(df)
+            totales['retirados'] += retirados
+
+            sin_resolver = [n for n in filas['nombre_curso'].unique().tolist() if n not in cursos]
+            if sin_resolver:
+                resueltos, creados = _resolver_cursos(sin_resolver)
+                cursos.update(resueltos)
+                totales['cursos_creados'] += creados
+                existentes.update(
+                    Alumno.objects
+                    .filter(curso_id__in=resueltos.values())
+                    .values_list('nombre_completo', 'curso_id')
+                )
+
+            nuevos = []
+            for nombre_completo, nombre_curso in filas.itertuples(index=False, name=None):
+                clave = (nombre_completo, cursos[nombre_curso])
+                if clave not in existentes:
+                    existentes.add(clave)
+                    nuevos.append(Alumno(nombre_completo=nombre_completo, curso_id=clave[1]))
+
+            Alumno.objects.bulk_create(nuevos, batch_size=TAMANO_LOTE)
+            busqueda.indexar(nuevos)
+            cursos_con_altas.update(a.curso_id for a in nuevos)
+            totales['insertados'] += len(nuevos)
+            totales['omitidos'] += len(filas) - len(nuevos)
+
+        procesadas += len(df)
+        if al_avanzar:
+            al_avanzar(procesadas)
+
+    # La matrícula cambió: recalcular los resúmenes mensuales de esos cursos
+    for curso_id in cursos_con_altas:
+        actualizar_resumenes_curso(curso_id)
+
+    return totales
+
+
+def importar_alumnos(df):
+    """Importa un DataFrame completo (atajo de `importar_bloques`)."""
+    return importar_bloques([df])
@@ -0,0 +1,90 @@
+# alumnos/lectura.py
+import csv
+
+import pandas as pd
+from openpyxl import load_workbook
+
+
+COLUMNAS_IMPORTACION = [
+    'Nombres', 'Apellido Paterno', 'Apellido Materno',
+    'Desc Grado', 'Letra Curso', 'Fecha Retiro',
+]
+TAMANO_BLOQUE = 5000
+
+
+def _validar_encabezado(encabezado):
+    faltantes = [c for c in COLUMNAS_IMPORTACION if c not in encabezado]
+    if faltantes:
+        raise ValueError(f"Faltan columnas en el archivo: {', '.join(faltantes)}")
+
+
+def _a_fecha(bloque):
+    bloque['Fecha Retiro'] = pd.to_datetime(
+        bloque['Fecha Retiro'], errors='coerce', dayfirst=True, format='mixed'
+    )
+    return bloque
+
+
+def _bloques_xlsx(archivo, tamano):
+    """Lee la primera hoja en modo read-only, fila a fila, solo con las columnas necesarias."""
+    wb = load_workbook(archivo, read_only=True, data_only=True)
+    try:
+        filas = wb.worksheets[0].iter_rows(values_only=True)
+        encabezado = [str(c).strip() if c is not None else '' for c in next(filas, ())]
+        _validar_encabezado(encabezado)
+        indices = [encabezado.index(c) for c in COLUMNAS_IMPORTACION]
+
+        bloque = []
+        for fila in filas:
+            if not fila or all(v is None for v in fila):
+                continue
+            bloque.append([fila[i] if i < len(fila) else None for i in indices])
+            if len(bloque) >= tamano:
+                yield _a_fecha(pd.DataFrame(bloque, columns=COLUMNAS_IMPORTACION))
+                bloque = []
+        if bloque:
+            yield _a_fecha(pd.DataFrame(bloque, columns=COLUMNAS_IMPORTACION))
+    finally:
+        wb.close()
+
+
+def _bloques_csv(archivo, tamano):
+    primera = archivo.readline().decode('utf-8-sig', errors='replace')
+    archivo.seek(0)
+    try:
+        separador = csv.Sniffer().sniff(primera, delimiters=',;\t').delimiter
+    except csv.Error:
+        separador = ','
+    _validar_encabezado([c.strip() for c in primera.strip().split(separador)])
+
+    lector = pd.read_csv(
+        archivo,
+        sep=separador,
+        usecols=lambda c: c.strip() in COLUMNAS_IMPORTACION,
+        dtype=str,
+        encoding='utf-8-sig',
+        chunksize=tamano,
+    )
+    for bloque in lector:
+        bloque.columns = [c.strip() for c in bloque.columns]
+        yield _a_fecha(bloque)
+
+
+def _bloques_excel_antiguo(archivo, tamano):
+    # .xls no tiene lector en streaming; al menos se limita a las columnas necesarias
+    df = pd.read_excel(archivo, usecols=COLUMNAS_IMPORTACION)
+    for inicio in range(0, len(df), tamano):
+        yield df.iloc[inicio:inicio + tamano]
+
+
+def leer_bloques(archivo, tamano=TAMANO_BLOQUE):
+    """
+    Recorre un archivo subido (.xlsx, .csv o .xls) en bloques de `tamano` filas.
+    Cada bloque es un DataFrame con COLUMNAS_IMPORTACION y `Fecha Retiro` como fecha.
+    """
+    nombre = (getattr(archivo, 'name', '') or '').lower()
+    if nombre.endswith('.csv'):
+        return _bloques_csv(archivo, tamano)
+    if nombre.endswith('.xls'):
+        return _bloques_excel_antiguo(archivo, tamano)
+    return _bloques_xlsx(archivo, tamano)
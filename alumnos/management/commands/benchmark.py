@@ -0,0 +1,222 @@
+"""
+Mide las vistas y los caminos de importación/exportación sobre datos sintéticos
+a varias escalas, en una base de pruebas aparte (la real no se toca):
+
+    python manage.py benchmark --escalas chica,mediana --salida bench.json
+    python manage.py benchmark --comparar bench_main.json --salida bench_rama.json
+
+Por caso se guarda: mediana y mínimo del tiempo (ms), consultas SQL y pico de memoria
+de Python (tracemalloc, en una corrida aparte para no inflar los tiempos).
+Los casos "_frio" vacían antes la caché correspondiente.
+"""
+import json
+import platform
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import (
+    override_settings, setup_databases, setup_test_environment, teardown_databases, teardown_test_environment,
+)
+from django.urls import reverse
+
+from alumnos import perfilado, sinteticos
+from alumnos.models import Alumno, Curso, Trabajo
+from alumnos.trabajos import ejecutar, tomar_siguiente
+
+
+ESCALAS = {
+    'chica': {'cursos': 8, 'alumnos': 250, 'meses': 3},
+    'mediana': {'cursos': 40, 'alumnos': 1500, 'meses': 10},
+    'grande': {'cursos': 120, 'alumnos': 5000, 'meses': 10},
+    'comuna': {'cursos': 400, 'alumnos': 15000, 'meses': 10},
+}
+
+
+def _consumir(response):
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+    else:
+        response.content
+    if response.status_code >= 400:
+        raise CommandError(f"{response.request['PATH_INFO']} respondió {response.status_code}.")
+    return response
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, timeout=10,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = "Benchmark de vistas e importación/exportación con datos sintéticos; resultados en JSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--escalas', default='chica,mediana', help=f"Separadas por coma: {', '.join(ESCALAS)}.")
+        parser.add_argument('--repeticiones', type=int, default=5)
+        parser.add_argument('--semilla', type=int, default=1)
+        parser.add_argument('--salida', metavar='ARCHIVO', help="Escribe los resultados en este JSON.")
+        parser.add_argument('--comparar', metavar='ARCHIVO', help="JSON de una corrida anterior para mostrar la variación.")
+
+    def handle(self, *args, **opts):
+        escalas = [e.strip() for e in opts['escalas'].split(',') if e.strip()]
+        desconocidas = [e for e in escalas if e not in ESCALAS]
+        if desconocidas or not escalas:
+            raise CommandError(f"Escalas desconocidas: {', '.join(desconocidas)}. Opciones: {', '.join(ESCALAS)}.")
+        if opts['repeticiones'] < 1:
+            raise CommandError("--repeticiones debe ser positivo.")
+        anterior = None
+        if opts['comparar']:
+            try:
+                anterior = json.loads(Path(opts['comparar']).read_text(encoding='utf-8'))
+            except (OSError, ValueError) as e:
+                raise CommandError(f"No se pudo leer {opts['comparar']}: {e}")
+
+        resultado = {
+            'fecha': datetime.now().isoformat(timespec='seconds'),
+            'commit': _commit(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'repeticiones': opts['repeticiones'],
+            'escalas': {},
+        }
+        self.repeticiones = opts['repeticiones']
+
+        setup_test_environment()
+        bases = setup_databases(verbosity=0, interactive=False, aliases={'default'}, serialized_aliases=set())
+        temporal = Path(tempfile.mkdtemp(prefix='benchmark_'))
+        try:
+            with override_settings(
+                MEDIA_ROOT=temporal / 'media',
+                EXPORTACION_CACHE_DIR=temporal / 'exportaciones',
+                PERFILADO_ESTRICTO=False,
+            ):
+                for escala in escalas:
+                    self.stdout.write(f"→ {escala} {ESCALAS[escala]}")
+                    resultado['escalas'][escala] = self._escala(escala, opts['semilla'], temporal)
+        finally:
+            shutil.rmtree(temporal, ignore_errors=True)
+            teardown_databases(bases, verbosity=0)
+            teardown_test_environment()
+
+        self._tabla(resultado, anterior)
+        if opts['salida']:
+            Path(opts['salida']).write_text(json.dumps(resultado, indent=2, ensure_ascii=False), encoding='utf-8')
+            self.stdout.write(self.style.SUCCESS(f"✓ Resultados en {opts['salida']}"))
+
+    def _medir(self, funcion, preparar=None):
+        tiempos, consultas = [], 0
+        for _ in range(self.repeticiones):
+            if preparar:
+                preparar()
+            with perfilado.medir() as perfil:
+                inicio = time.perf_counter()
+                funcion()
+                tiempos.append(time.perf_counter() - inicio)
+            consultas = perfil['consultas']
+
+        if preparar:
+            preparar()
+        tracemalloc.start()
+        try:
+            funcion()
+            pico = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        return {
+            'mediana_ms': round(statistics.median(tiempos) * 1000, 2),
+            'min_ms': round(min(tiempos) * 1000, 2),
+            'consultas': consultas,
+            'pico_kb': round(pico / 1024),
+        }
+
+    def _escala(self, escala, semilla, temporal):
+        p = ESCALAS[escala]
+        inicio = time.perf_counter()
+        datos = sinteticos.generar(p['cursos'], p['alumnos'], p['meses'], semilla=semilla, reemplazar=True)
+        generacion_s = round(time.perf_counter() - inicio, 2)
+        planilla = temporal / f"sis_{escala}.xlsx"
+        sinteticos.escribir_xlsx(planilla, sinteticos.filas_sis(p['cursos'], p['alumnos'], semilla))
+
+        usuario, _ = get_user_model().objects.get_or_create(username='benchmark', defaults={'is_staff': True})
+        client = Client()
+        client.force_login(usuario)
+        curso_id = Curso.objects.order_by('id').values_list('id', flat=True).first()
+        meses = sinteticos.meses_desde(date(2025, 3, 1), p['meses'])
+        mes = meses[p['meses'] // 2].strftime('%Y-%m')
+
+        def get(nombre, **params):
+            url = reverse(nombre)
+            return lambda: _consumir(client.get(url, params))
+
+        def vaciar_exportaciones():
+            shutil.rmtree(settings.EXPORTACION_CACHE_DIR, ignore_errors=True)
+
+        def cargar_excel():
+            with open(planilla, 'rb') as f:
+                subida = SimpleUploadedFile(planilla.name, f.read())
+            _consumir(client.post(reverse('cargar_excel'), {'excel_file': subida}))
+            trabajo = ejecutar(tomar_siguiente())
+            if trabajo.estado != Trabajo.TERMINADO:
+                raise CommandError(f"La importación falló: {trabajo.error}")
+
+        def base_vacia():
+            Alumno.objects.all().delete()
+            Curso.objects.all().delete()
+
+        casos = [
+            ('dashboard_frio', get('dashboard', mes=mes), cache.clear),
+            ('dashboard', get('dashboard', mes=mes), None),
+            ('lista_alumnos', get('lista_alumnos'), None),
+            ('lista_alumnos_curso', get('lista_alumnos', curso=curso_id), None),
+            ('asistencia_mensual', get('asistencia_mensual', curso=curso_id, mes=mes), None),
+            ('estadisticas_mes_frio', get('ajax_estadisticas_mes', mes=mes), cache.clear),
+            ('estadisticas_mes', get('ajax_estadisticas_mes', mes=mes), None),
+            ('reporte_cursos_mes', get('reporte_cursos_mes', mes=mes), None),
+            ('tendencia', get('ajax_tendencia', desde=f'{meses[0]:%Y-%m}', hasta=f'{meses[-1]:%Y-%m}'), None),
+            ('buscar_alumnos', get('ajax_buscar_alumnos', q='gonz ma'), None),
+            ('ajax_lista_alumnos', get('ajax_lista_alumnos'), None),
+            ('exportar_xlsx_frio', get('exportar_excel', modo='directo'), vaciar_exportaciones),
+            ('exportar_xlsx', get('exportar_excel', modo='directo'), None),
+            ('exportar_zip_frio', get('exportar_excel', modo='directo', formato='zip'), vaciar_exportaciones),
+            # Al final: la importación nueva deja la base sin asistencia
+            ('importar_repetido', cargar_excel, None),
+            ('importar_nuevo', cargar_excel, base_vacia),
+        ]
+        resultados = {}
+        for nombre, funcion, preparar in casos:
+            resultados[nombre] = self._medir(funcion, preparar)
+            self.stdout.write(f"   {nombre:<24} {resultados[nombre]['mediana_ms']:>10} ms")
+        return {'parametros': {**p, 'semilla': semilla}, 'datos': datos, 'generacion_s': generacion_s, 'casos': resultados}
+
+    def _tabla(self, resultado, anterior):
+        for escala, datos in resultado['escalas'].items():
+            previos = ((anterior or {}).get('escalas', {}).get(escala) or {}).get('casos', {})
+            self.stdout.write(f"\n{escala}: {datos['datos']}")
+            self.stdout.write(f"{'caso':<24} {'mediana ms':>11} {'mín ms':>9} {'consultas':>9} {'pico KB':>8}"
+                              + (f" {'vs. anterior':>13}" if anterior else ""))
+            for caso, r in datos['casos'].items():
+                linea = f"{caso:<24} {r['mediana_ms']:>11} {r['min_ms']:>9} {r['consultas']:>9} {r['pico_kb']:>8}"
+                previo = previos.get(caso)
+                if previo and previo.get('mediana_ms'):
+                    cambio = (r['mediana_ms'] - previo['mediana_ms']) / previo['mediana_ms'] * 100
+                    linea += f" {cambio:>+12.1f}%"
+                self.stdout.write(linea)
@@ -0,0 +1,228 @@
+"""
+Autoguardado concurrente: N editores (hilos, cada uno con su conexión) enviando lotes
+pequeños a `ajax_guardar_lote` durante un tiempo fijo, con el perfil de SQLite por
+defecto, con el de producción (settings_produccion) y con producción más la copia de
+reportes (settings_reportes), sobre bases temporales:
+
+    python manage.py benchmark_concurrencia --editores 20 --duracion 15
+    python manage.py benchmark_concurrencia --lectores 4 --perfiles produccion,reportes
+
+Reporta lotes guardados por segundo, errores "database is locked" y latencias. Con
+--lectores, además hay usuarios pidiendo reportes (reporte por curso y exportación)
+sin pausa, como a fin de mes.
+"""
+import json
+import logging
+import random
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from datetime import date
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from alumnos import routers, sinteticos
+from alumnos.management.commands.prueba_carga import percentil
+from alumnos.management.commands.snapshot_reportes import snapshot
+from alumnos.models import Alumno
+
+
+ALUMNOS_POR_CURSO = 35
+
+
+def _perfiles():
+    """nombre -> (config de `default`, SQLITE_PRAGMAS, config de `reporting` o None)."""
+    from asistencia_escolar import settings_produccion, settings_reportes
+    produccion = settings_produccion.DATABASES['default']
+    produccion = {k: produccion[k] for k in ('CONN_MAX_AGE', 'CONN_HEALTH_CHECKS', 'OPTIONS')}
+    return {
+        'base': ({'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False, 'OPTIONS': {}}, {}, None),
+        'produccion': (produccion, settings_produccion.SQLITE_PRAGMAS, None),
+        'reportes': (produccion, settings_produccion.SQLITE_PRAGMAS, settings_reportes.DATABASES[routers.ALIAS]),
+    }
+
+
+class Command(BaseCommand):
+    help = "Throughput de autoguardado con editores concurrentes, perfil SQLite base vs. producción."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--editores', type=int, default=20)
+        parser.add_argument('--duracion', type=float, default=15, help="Segundos por perfil.")
+        parser.add_argument('--lectores', type=int, default=0, help="Usuarios pidiendo reportes a la vez.")
+        parser.add_argument('--perfiles', default='base,produccion')
+        parser.add_argument('--semilla', type=int, default=1)
+        parser.add_argument('--salida', metavar='ARCHIVO', help="Escribe los resultados en este JSON.")
+
+    def handle(self, *args, **opts):
+        perfiles = _perfiles()
+        elegidos = [p.strip() for p in opts['perfiles'].split(',') if p.strip()]
+        if not elegidos or any(p not in perfiles for p in elegidos):
+            raise CommandError(f"Perfiles válidos: {', '.join(perfiles)}.")
+        if opts['editores'] < 1 or opts['duracion'] <= 0 or opts['lectores'] < 0:
+            raise CommandError("--editores y --duracion deben ser positivos y --lectores, no negativo.")
+        if connections['default'].vendor != 'sqlite':
+            raise CommandError("Este benchmark es para SQLite.")
+
+        config = connections.settings['default']
+        original = dict(config)
+        # Solo el perfil 'reportes' lee de una copia (la suya, temporal)
+        reportes_original = connections.settings.pop(routers.ALIAS, None)
+        temporal = Path(tempfile.mkdtemp(prefix='concurrencia_'))
+        resultados = {}
+        # Cada lote rechazado por "database is locked" es un 400: no se registra uno por uno
+        registro = logging.getLogger('django.request')
+        nivel = registro.level
+        registro.setLevel(logging.ERROR)
+        try:
+            for nombre in elegidos:
+                base_datos, pragmas, reportes = perfiles[nombre]
+                # Todas las conexiones nuevas (una por hilo) usan esta configuración
+                connections.close_all()
+                config.update(original, NAME=str(temporal / f'{nombre}.sqlite3'), **base_datos)
+                del connections['default']
+                copia = None
+                ajustes = {'SQLITE_PRAGMAS': pragmas}
+                if reportes:
+                    copia = temporal / f'{nombre}_reportes.sqlite3'
+                    connections.settings[routers.ALIAS] = connections.configure_settings({
+                        'default': dict(config),
+                        routers.ALIAS: {**reportes, 'NAME': f'file:{copia}?mode=ro&immutable=1'},
+                    })[routers.ALIAS]
+                    ajustes.update(
+                        DATABASE_ROUTERS=['alumnos.routers.ReportesRouter'],
+                        MIDDLEWARE=[*settings.MIDDLEWARE, 'alumnos.routers.ReportesMiddleware'],
+                    )
+                with override_settings(**ajustes):
+                    self.stdout.write(
+                        f"→ {nombre}: {opts['editores']} editores, {opts['lectores']} lectores, {opts['duracion']:g} s…"
+                    )
+                    resultados[nombre] = self._correr(
+                        opts['editores'], opts['lectores'], opts['duracion'], opts['semilla'], copia,
+                    )
+                connections.close_all()
+                connections.settings.pop(routers.ALIAS, None)
+        finally:
+            registro.setLevel(nivel)
+            connections.close_all()
+            connections.settings.pop(routers.ALIAS, None)
+            if reportes_original:
+                connections.settings[routers.ALIAS] = reportes_original
+            config.clear()
+            config.update(original)
+            del connections['default']
+            shutil.rmtree(temporal, ignore_errors=True)
+
+        self.stdout.write(
+            f"\n{'perfil':<12} {'lotes':>7} {'lotes/s':>8} {'errores':>8} {'locked':>7} {'p50 ms':>8} {'p99 ms':>8}"
+            f" {'reportes':>9} {'rep. p50 ms':>12}"
+        )
+        for nombre, r in resultados.items():
+            self.stdout.write(
+                f"{nombre:<12} {r['lotes']:>7} {r['lotes_s']:>8} {r['errores']:>8} {r['bloqueos']:>7} "
+                f"{r['p50_ms']:>8} {r['p99_ms']:>8} {r['reportes']:>9} {r['reportes_p50_ms']:>12}"
+            )
+        if opts['salida']:
+            Path(opts['salida']).write_text(json.dumps(resultados, indent=2), encoding='utf-8')
+
+    def _correr(self, editores, lectores, duracion, semilla, copia=None):
+        call_command('migrate', verbosity=0, interactive=False)
+        mes = date(2025, 3, 1)
+        sinteticos.generar(editores, editores * ALUMNOS_POR_CURSO, 1, desde=mes, semilla=semilla)
+        usuario = get_user_model().objects.create_user('benchmark')
+        cursos = {}
+        for alumno_id, curso_id in Alumno.objects.values_list('id', 'curso_id'):
+            cursos.setdefault(curso_id, []).append(alumno_id)
+        cursos = list(cursos.items())
+        if copia:
+            snapshot(copia)
+        connections.close_all()
+
+        url = reverse('ajax_guardar_lote')
+        reportes_urls = [
+            f"{reverse('reporte_cursos_mes')}?mes={mes.strftime('%Y-%m')}",
+            f"{reverse('exportar_excel')}?modo=directo",
+        ]
+        latencias, errores, bloqueos, reportes = [], [0], [0], []
+        lock = threading.Lock()
+        inicio = threading.Barrier(editores + lectores + 1)
+        fin = [0.0]
+
+        def editor(i):
+            rng = random.Random(semilla * 1000 + i)
+            curso_id, alumnos = cursos[i % len(cursos)]
+            client = Client()
+            client.force_login(usuario)
+            propias, fallidas, locked = [], 0, 0
+            inicio.wait()
+            while time.perf_counter() < fin[0]:
+                # Como el autoguardado de la grilla: pocas celdas cambiadas por lote
+                cambios = []
+                for alumno_id in rng.sample(alumnos, min(len(alumnos), rng.randint(1, 5))):
+                    presentes = rng.randint(10, 20)
+                    cambios.append({'alumno_id': alumno_id, 'presentes': presentes, 'inasistentes': 20 - presentes})
+                cuerpo = json.dumps({'curso_id': curso_id, 'mes': mes.strftime('%Y-%m'), 'cambios': cambios})
+                t0 = time.perf_counter()
+                respuesta = client.post(url, cuerpo, content_type='application/json')
+                duracion_lote = time.perf_counter() - t0
+                datos = respuesta.json()
+                if respuesta.status_code == 200 and datos.get('ok'):
+                    propias.append(duracion_lote)
+                else:
+                    fallidas += 1
+                    locked += 'locked' in datos.get('error', '')
+            connections.close_all()
+            with lock:
+                latencias.extend(propias)
+                errores[0] += fallidas
+                bloqueos[0] += locked
+
+        def lector(i):
+            client = Client()
+            client.force_login(usuario)
+            propias = []
+            inicio.wait()
+            while time.perf_counter() < fin[0]:
+                t0 = time.perf_counter()
+                respuesta = client.get(reportes_urls[len(propias) % len(reportes_urls)])
+                if respuesta.streaming:
+                    for _ in respuesta.streaming_content:
+                        pass
+                if respuesta.status_code == 200:
+                    propias.append(time.perf_counter() - t0)
+            connections.close_all()
+            with lock:
+                reportes.extend(propias)
+
+        hilos = [threading.Thread(target=editor, args=(i,)) for i in range(editores)]
+        hilos += [threading.Thread(target=lector, args=(i,)) for i in range(lectores)]
+        for hilo in hilos:
+            hilo.start()
+        fin[0] = time.perf_counter() + duracion
+        inicio.wait()
+        for hilo in hilos:
+            hilo.join()
+
+        latencias.sort()
+        return {
+            'editores': editores,
+            'lectores': lectores,
+            'duracion_s': duracion,
+            'lotes': len(latencias),
+            'lotes_s': round(len(latencias) / duracion, 1),
+            'errores': errores[0],
+            'bloqueos': bloqueos[0],
+            'p50_ms': round(statistics.median(latencias) * 1000, 1) if latencias else 0.0,
+            'p99_ms': round(percentil(latencias, 99) * 1000, 1),
+            'reportes': len(reportes),
+            'reportes_p50_ms': round(statistics.median(reportes) * 1000, 1) if reportes else 0.0,
+        }
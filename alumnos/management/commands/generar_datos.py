@@ -0,0 +1,53 @@
+from datetime import datetime
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from alumnos import sinteticos
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera datos sintéticos reproducibles (cursos, alumnos, días de clases y asistencia) "
+        "y, opcionalmente, la planilla del SIS equivalente para probar `cargar_excel`."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cursos', type=int, default=40)
+        parser.add_argument('--alumnos', type=int, default=1500, help="Total, repartido entre los cursos.")
+        parser.add_argument('--meses', type=int, default=10)
+        parser.add_argument('--desde', default='2025-03', help="Primer mes (YYYY-MM).")
+        parser.add_argument('--semilla', type=int, default=1)
+        parser.add_argument('--reemplazar', action='store_true', help="Borra antes todos los cursos y alumnos.")
+        parser.add_argument('--excel', metavar='RUTA', help="Además escribe la planilla del SIS (.xlsx) en RUTA.")
+        parser.add_argument('--solo-excel', action='store_true', help="Solo escribe la planilla, sin tocar la base.")
+
+    def handle(self, *args, **opts):
+        if min(opts['cursos'], opts['alumnos'], opts['meses']) < 1:
+            raise CommandError("--cursos, --alumnos y --meses deben ser positivos.")
+        try:
+            desde = datetime.strptime(opts['desde'], '%Y-%m').date()
+        except ValueError:
+            raise CommandError("--desde debe tener formato YYYY-MM.")
+        if opts['solo_excel'] and not opts['excel']:
+            raise CommandError("--solo-excel requiere --excel.")
+
+        if opts['excel']:
+            ruta = Path(opts['excel'])
+            ruta.parent.mkdir(parents=True, exist_ok=True)
+            sinteticos.escribir_xlsx(ruta, sinteticos.filas_sis(opts['cursos'], opts['alumnos'], opts['semilla']))
+            self.stdout.write(f"Planilla: {ruta}")
+        if opts['solo_excel']:
+            return
+
+        try:
+            n = sinteticos.generar(
+                opts['cursos'], opts['alumnos'], opts['meses'],
+                desde=desde, semilla=opts['semilla'], reemplazar=opts['reemplazar'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ {n['cursos']} cursos, {n['alumnos']} alumnos, {n['meses']} meses: "
+            f"{n['dias_clases']} días de clases y {n['asistencias']} registros de asistencia."
+        ))
@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from alumnos.trabajos import ejecutar, recuperar_colgados, tomar_siguiente
+
+
+class Command(BaseCommand):
+    help = "Worker de importaciones/exportaciones encoladas (modelo Trabajo)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--intervalo', type=float, default=2.0,
+                            help="Segundos de espera cuando no hay trabajos pendientes.")
+        parser.add_argument('--una-vez', action='store_true',
+                            help="Procesa los pendientes y termina (útil en cron).")
+
+    def handle(self, *args, **opts):
+        reencolados, fallidos = recuperar_colgados()
+        if reencolados or fallidos:
+            self.stdout.write(f"Trabajos interrumpidos: {reencolados} vueltos a la cola, {fallidos} marcados con error.")
+        while True:
+            close_old_connections()
+            trabajo = tomar_siguiente()
+            if trabajo is None:
+                if opts['una_vez']:
+                    return
+                time.sleep(opts['intervalo'])
+                continue
+
+            self.stdout.write(f"Procesando {trabajo}…")
+            ejecutar(trabajo)
+            if trabajo.estado == trabajo.ERROR:
+                self.stderr.write(f"  ✗ {trabajo.error}")
+            else:
+                self.stdout.write(self.style.SUCCESS(f"  ✓ {trabajo.resultado}"))
@@ -0,0 +1,187 @@
+"""
+Prueba de carga: N usuarios concurrentes pidiendo una URL durante un tiempo fijo.
+Sirve para comparar el mismo endpoint servido por WSGI y por ASGI, p. ej.:
+
+    gunicorn asistencia_escolar.wsgi -w 4 --threads 8 -b 127.0.0.1:8001
+    uvicorn asistencia_escolar.asgi:application --workers 4 --port 8002
+
+    python manage.py prueba_carga \\
+        wsgi=http://127.0.0.1:8001/ajax/estadisticas_mes/?mes=2025-03 \\
+        asgi=http://127.0.0.1:8002/ajax/estadisticas_mes/?mes=2025-03 \\
+        --usuarios 300 --duracion 30
+
+Cada usuario es una conexión HTTP/1.1 keep-alive (se reabre si el servidor la cierra).
+Solo usa la biblioteca estándar; el cliente corre en un solo hilo, así que conviene
+lanzarlo en otra máquina (o con CPUs libres) para no medir al propio cliente.
+No sirve para respuestas que no terminan (SSE).
+"""
+import asyncio
+import json
+import time
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management.base import BaseCommand, CommandError
+
+
+def percentil(valores_ordenados, p):
+    if not valores_ordenados:
+        return 0.0
+    i = min(len(valores_ordenados) - 1, max(0, round(p / 100 * len(valores_ordenados)) - 1))
+    return valores_ordenados[i]
+
+
+async def _leer_respuesta(lector):
+    """Lee una respuesta HTTP/1.1 completa. Devuelve (status, debe_cerrar)."""
+    linea = await lector.readline()
+    if not linea:
+        raise ConnectionError("El servidor cerró la conexión.")
+    status = int(linea.split()[1])
+    largo, chunked, cerrar = None, False, False
+    while True:
+        linea = await lector.readline()
+        if linea in (b'\r\n', b'\n', b''):
+            break
+        nombre, _, valor = linea.decode('latin-1').partition(':')
+        nombre, valor = nombre.strip().lower(), valor.strip().lower()
+        if nombre == 'content-length':
+            largo = int(valor)
+        elif nombre == 'transfer-encoding' and 'chunked' in valor:
+            chunked = True
+        elif nombre == 'connection' and valor == 'close':
+            cerrar = True
+
+    if chunked:
+        while True:
+            tamano = int((await lector.readline()).split(b';')[0], 16)
+            await lector.readexactly(tamano + 2)
+            if tamano == 0:
+                break
+    elif largo is not None:
+        await lector.readexactly(largo)
+    else:
+        await lector.read()  # sin largo: el cuerpo termina al cerrar
+        cerrar = True
+    return status, cerrar
+
+
+async def _usuario(destino, peticion, fin, medicion_desde, resultado):
+    host, puerto = destino
+    lector = escritor = None
+    while time.perf_counter() < fin:
+        inicio = time.perf_counter()
+        try:
+            if escritor is None:
+                lector, escritor = await asyncio.open_connection(host, puerto)
+            escritor.write(peticion)
+            await escritor.drain()
+            status, cerrar = await _leer_respuesta(lector)
+        except (OSError, ConnectionError, ValueError, IndexError, asyncio.IncompleteReadError):
+            status, cerrar = None, True
+        duracion = time.perf_counter() - inicio
+
+        if inicio >= medicion_desde:
+            if status is not None and 200 <= status < 400:
+                resultado['latencias'].append(duracion)
+            else:
+                resultado['errores'] += 1
+        if cerrar and escritor is not None:
+            escritor.close()
+            lector = escritor = None
+            if status is None:
+                await asyncio.sleep(0.05)  # no martillar un servidor caído
+    if escritor is not None:
+        escritor.close()
+
+
+async def correr(url, usuarios, duracion, calentamiento, cookie=None):
+    partes = urlsplit(url)
+    if partes.scheme != 'http':
+        raise CommandError(f"Solo se admite http:// ({url}).")
+    ruta = partes.path or '/'
+    if partes.query:
+        ruta += '?' + partes.query
+    cabeceras = [f"GET {ruta} HTTP/1.1", f"Host: {partes.netloc}", "Accept: application/json"]
+    if cookie:
+        cabeceras.append(f"Cookie: {cookie}")
+    peticion = ("\r\n".join(cabeceras) + "\r\n\r\n").encode('latin-1')
+
+    resultado = {'latencias': [], 'errores': 0}
+    ahora = time.perf_counter()
+    medicion_desde = ahora + calentamiento
+    fin = medicion_desde + duracion
+    await asyncio.gather(*(
+        _usuario((partes.hostname, partes.port or 80), peticion, fin, medicion_desde, resultado)
+        for _ in range(usuarios)
+    ))
+
+    latencias = sorted(resultado['latencias'])
+    return {
+        'url': url,
+        'usuarios': usuarios,
+        'duracion_s': duracion,
+        'peticiones': len(latencias),
+        'errores': resultado['errores'],
+        'rps': round(len(latencias) / duracion, 1),
+        'p50_ms': round(percentil(latencias, 50) * 1000, 1),
+        'p95_ms': round(percentil(latencias, 95) * 1000, 1),
+        'p99_ms': round(percentil(latencias, 99) * 1000, 1),
+        'max_ms': round(latencias[-1] * 1000, 1) if latencias else 0.0,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Prueba de carga contra una o más URLs (nombre=url para etiquetarlas): "
+        "throughput y latencias p50/p95/p99 con N usuarios concurrentes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('objetivos', nargs='+', help="URL completa, o nombre=URL (p. ej. asgi=http://...).")
+        parser.add_argument('--usuarios', type=int, default=200, help="Conexiones concurrentes (200 por defecto).")
+        parser.add_argument('--duracion', type=float, default=20, help="Segundos medidos por URL (20 por defecto).")
+        parser.add_argument('--calentamiento', type=float, default=3, help="Segundos iniciales sin medir (3 por defecto).")
+        parser.add_argument('--usuario', help="Nombre de usuario para crear una sesión (las vistas piden login).")
+        parser.add_argument('--json', action='store_true', help="Imprime los resultados como JSON.")
+
+    def _sesion(self, username):
+        try:
+            user = get_user_model().objects.get(username=username)
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"No existe el usuario '{username}'.")
+        sesion = SessionStore()
+        sesion[SESSION_KEY] = str(user.pk)
+        sesion[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+        sesion[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        sesion.create()
+        return sesion
+
+    def handle(self, *args, **opts):
+        if opts['usuarios'] < 1 or opts['duracion'] <= 0:
+            raise CommandError("--usuarios y --duracion deben ser positivos.")
+        sesion = self._sesion(opts['usuario']) if opts['usuario'] else None
+        cookie = f"{settings.SESSION_COOKIE_NAME}={sesion.session_key}" if sesion else None
+
+        resultados = []
+        try:
+            for objetivo in opts['objetivos']:
+                nombre, _, url = objetivo.partition('=') if '=' in objetivo.split('?')[0] else ('', '', objetivo)
+                if not opts['json']:
+                    self.stdout.write(f"→ {nombre or url}: {opts['usuarios']} usuarios, {opts['duracion']:g} s…")
+                r = asyncio.run(correr(url, opts['usuarios'], opts['duracion'], opts['calentamiento'], cookie))
+                resultados.append({'nombre': nombre or url, **r})
+        finally:
+            if sesion:
+                sesion.delete()
+
+        if opts['json']:
+            self.stdout.write(json.dumps(resultados, indent=2))
+            return
+        self.stdout.write(f"{'objetivo':<20} {'pet.':>8} {'err.':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+        for r in resultados:
+            self.stdout.write(
+                f"{r['nombre'][:20]:<20} {r['peticiones']:>8} {r['errores']:>6} {r['rps']:>8} "
+                f"{r['p50_ms']:>8} {r['p95_ms']:>8} {r['p99_ms']:>8}"
+            )
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from alumnos.resumenes import reconstruir_resumenes
+
+
+class Command(BaseCommand):
+    help = "Recalcula desde cero la tabla ResumenCursoMensual."
+
+    def handle(self, *args, **opts):
+        n = reconstruir_resumenes()
+        self.stdout.write(self.style.SUCCESS(f"✓ {n} resúmenes (curso, mes) reconstruidos."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from alumnos.busqueda import reindexar
+
+
+class Command(BaseCommand):
+    help = "Reconstruye el índice de palabras usado por la búsqueda de alumnos."
+
+    def handle(self, *args, **opts):
+        n = reindexar()
+        self.stdout.write(self.style.SUCCESS(f"✓ {n} alumnos indexados."))
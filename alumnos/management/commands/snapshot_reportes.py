@@ -0,0 +1,70 @@
+"""
+Renueva la copia de solo lectura de los reportes (alias `reporting`, ver
+asistencia_escolar/settings_reportes.py) desde la base principal:
+
+    python manage.py snapshot_reportes            # una vez (p. ej. desde cron)
+    python manage.py snapshot_reportes --cada 60  # cada 60 s
+
+Usa la API de backup de SQLite (con WAL no bloquea a los escritores) sobre un archivo
+temporal y lo reemplaza de una vez: las peticiones en curso siguen leyendo la copia
+anterior. La fecha de modificación de la copia queda en el instante del snapshot
+(`routers.corte`).
+"""
+import os
+import sqlite3
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connections
+
+from alumnos import routers
+
+
+def snapshot(destino):
+    """Copia `default` a `destino`; devuelve los segundos que tomó."""
+    conexion = connections['default']
+    conexion.ensure_connection()
+    parcial = destino.with_name(destino.name + '.parcial')
+    parcial.unlink(missing_ok=True)
+    inicio = time.time()
+    copia = sqlite3.connect(parcial)
+    try:
+        conexion.connection.backup(copia)
+        # La copia se abre como inmutable: sin WAL, todo tiene que quedar en el archivo
+        copia.execute('PRAGMA journal_mode = DELETE')
+    finally:
+        copia.close()
+    os.utime(parcial, (inicio, inicio))
+    os.replace(parcial, destino)
+    return time.time() - inicio
+
+
+class Command(BaseCommand):
+    help = "Copia la base principal a la copia de solo lectura de los reportes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--destino', metavar='RUTA',
+                            help="Archivo de la copia (por defecto, el del alias `reporting`).")
+        parser.add_argument('--cada', type=float, metavar='SEGUNDOS',
+                            help="Repite el snapshot con este intervalo en vez de terminar.")
+
+    def handle(self, *args, **opts):
+        if connections['default'].vendor != 'sqlite':
+            raise CommandError("snapshot_reportes es para SQLite; con otro motor use la réplica del propio motor.")
+        if opts['destino']:
+            destino = Path(opts['destino'])
+        elif routers.configurado():
+            destino = routers.ruta_copia()
+        else:
+            raise CommandError(f"No hay alias `{routers.ALIAS}` configurado: use --destino o settings_reportes.")
+        if opts['cada'] is not None and opts['cada'] <= 0:
+            raise CommandError("--cada debe ser positivo.")
+
+        while True:
+            close_old_connections()
+            segundos = snapshot(destino)
+            self.stdout.write(self.style.SUCCESS(f"✓ Copia de reportes en {destino} ({segundos:.2f} s)."))
+            if opts['cada'] is None:
+                return
+            time.sleep(opts['cada'])
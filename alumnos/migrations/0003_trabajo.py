@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4 on 2026-10-18 14:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alumnos', '0002_asistenciamensual_diasclasemensual'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Trabajo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('importacion', 'Importación de alumnos'), ('exportacion', 'Exportación de asistencia')], max_length=20)),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('en_curso', 'En curso'), ('terminado', 'Terminado'), ('error', 'Error')], default='pendiente', max_length=20)),
+                ('archivo_entrada', models.FileField(blank=True, upload_to='trabajos/entrada/')),
+                ('archivo_resultado', models.FileField(blank=True, upload_to='trabajos/resultado/')),
+                ('progreso', models.PositiveIntegerField(default=0)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('resultado', models.JSONField(blank=True, default=dict)),
+                ('error', models.TextField(blank=True)),
+                ('creado', models.DateTimeField(auto_now_add=True)),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
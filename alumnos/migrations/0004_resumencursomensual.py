@@ -0,0 +1,83 @@
+# Generated by Django 5.2.4 on 2026-10-18 14:02
+
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+UMBRAL_CRITICO = 85.0
+
+
+def poblar_resumenes(apps, schema_editor):
+    """
+    Llena la tabla nueva con los datos existentes. Copia del cálculo de
+    alumnos.resumenes a la fecha de esta migración, solo con modelos históricos:
+    la migración no debe depender de cómo evolucione ese módulo.
+    """
+    Alumno = apps.get_model('alumnos', 'Alumno')
+    AsistenciaMensual = apps.get_model('alumnos', 'AsistenciaMensual')
+    DiasClaseMensual = apps.get_model('alumnos', 'DiasClaseMensual')
+    ResumenCursoMensual = apps.get_model('alumnos', 'ResumenCursoMensual')
+
+    dias_map = {
+        (curso_id, mes): dias or 0
+        for curso_id, mes, dias in DiasClaseMensual.objects.values_list('curso_id', 'mes', 'dias_clases')
+    }
+    n_alumnos_map = dict(Alumno.objects.values('curso_id').annotate(n=Count('id')).values_list('curso_id', 'n'))
+    presentes_map = defaultdict(list)
+    for curso_id, mes, presentes in (
+        AsistenciaMensual.objects.values_list('alumno__curso_id', 'mes', 'presentes').iterator(chunk_size=5000)
+    ):
+        presentes_map[(curso_id, mes)].append(presentes)
+
+    resumenes = []
+    for curso_id, mes in set(dias_map) | set(presentes_map):
+        dias = dias_map.get((curso_id, mes), 0)
+        n_alumnos = n_alumnos_map.get(curso_id, 0)
+        presentes = presentes_map.get((curso_id, mes), [])
+        resumen = ResumenCursoMensual(
+            curso_id=curso_id, mes=mes, n_alumnos=n_alumnos, n_registros=len(presentes),
+            presentes_total=sum(presentes), dias_clases=dias,
+        )
+        if dias > 0:
+            resumen.suma_porcentajes = sum(round((p / dias) * 100, 1) for p in presentes)
+            for p in presentes:
+                p = min(p, dias)
+                if p == dias:
+                    resumen.n_perfectos += 1
+                elif round((p / dias) * 100.0, 1) < UMBRAL_CRITICO:
+                    resumen.n_criticos += 1
+            resumen.n_criticos += max(0, n_alumnos - len(presentes))
+        resumenes.append(resumen)
+    ResumenCursoMensual.objects.bulk_create(resumenes, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alumnos', '0003_trabajo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenCursoMensual',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mes', models.DateField()),
+                ('n_alumnos', models.PositiveIntegerField(default=0)),
+                ('n_registros', models.PositiveIntegerField(default=0)),
+                ('presentes_total', models.PositiveIntegerField(default=0)),
+                ('dias_clases', models.PositiveIntegerField(default=0)),
+                ('suma_porcentajes', models.FloatField(default=0)),
+                ('n_perfectos', models.PositiveIntegerField(default=0)),
+                ('n_criticos', models.PositiveIntegerField(default=0)),
+                ('curso', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='alumnos.curso')),
+            ],
+            options={
+                'unique_together': {('curso', 'mes')},
+            },
+        ),
+        migrations.RunPython(poblar_resumenes, migrations.RunPython.noop),
+    ]
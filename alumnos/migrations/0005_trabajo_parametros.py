@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 14:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alumnos', '0004_resumencursomensual'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trabajo',
+            name='parametros',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
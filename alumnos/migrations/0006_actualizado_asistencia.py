@@ -0,0 +1,26 @@
+# Generated by Django 5.2.4 on 2026-10-18 14:30
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alumnos', '0005_trabajo_parametros'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='asistenciamensual',
+            name='actualizado',
+            field=models.DateTimeField(auto_now=True, db_index=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='diasclasemensual',
+            name='actualizado',
+            field=models.DateTimeField(auto_now=True, db_index=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
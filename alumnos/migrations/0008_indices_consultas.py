@@ -0,0 +1,33 @@
+# Generated by Django 5.2.4 on 2026-10-18 14:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alumnos', '0007_versiondatos'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='alumno',
+            index=models.Index(fields=['curso', 'nombre_completo'], name='alumno_curso_nombre_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='asistenciamensual',
+            index=models.Index(fields=['mes', 'curso'], name='asis_mes_curso_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='asistenciamensual',
+            index=models.Index(fields=['curso', 'mes'], name='asis_curso_mes_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='diasclasemensual',
+            index=models.Index(fields=['mes'], name='dias_mes_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='resumencursomensual',
+            index=models.Index(fields=['mes'], name='resumen_mes_idx'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.4 on 2026-10-18 14:16
+
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+LARGO_PALABRA = 100
+
+
+def _palabras(nombre):
+    # Igual que alumnos.normalizacion.normalizar + busqueda.palabras a la fecha de esta migración
+    texto = unicodedata.normalize('NFKD', (nombre or '').upper())
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return sorted({p[:LARGO_PALABRA] for p in texto.split()})
+
+
+def poblar_palabras(apps, schema_editor):
+    """Indexa los alumnos existentes (solo modelos históricos)."""
+    Alumno = apps.get_model('alumnos', 'Alumno')
+    PalabraAlumno = apps.get_model('alumnos', 'PalabraAlumno')
+    lote = []
+    for alumno_id, nombre in Alumno.objects.values_list('id', 'nombre_completo').iterator(chunk_size=5000):
+        lote.extend(PalabraAlumno(alumno_id=alumno_id, palabra=p) for p in _palabras(nombre))
+        if len(lote) >= 5000:
+            PalabraAlumno.objects.bulk_create(lote, batch_size=1000)
+            lote = []
+    PalabraAlumno.objects.bulk_create(lote, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alumnos', '0008_indices_consultas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PalabraAlumno',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('palabra', models.CharField(max_length=100)),
+                ('alumno', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='palabras', to='alumnos.alumno')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['palabra', 'alumno'], name='palabra_alumno_idx')],
+            },
+        ),
+        migrations.RunPython(poblar_palabras, migrations.RunPython.noop),
+    ]
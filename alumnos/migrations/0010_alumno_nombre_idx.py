@@ -0,0 +1,17 @@
+# Generated by Django 5.2.4 on 2026-10-18 14:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alumnos', '0009_palabraalumno'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='alumno',
+            index=models.Index(fields=['nombre_completo', 'id'], name='alumno_nombre_id_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 14:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alumnos', '0010_alumno_nombre_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='asistenciamensual',
+            name='secuencia',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.4 on 2026-10-18 15:10
+
+import unicodedata
+
+from django.db import migrations
+from django.db.models import F
+
+
+def _normalizar(texto):
+    # Igual que alumnos.normalizacion.normalizar a la fecha de esta migración
+    texto = unicodedata.normalize('NFKD', (texto or '').upper())
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return " ".join(texto.split())
+
+
+def renormalizar_nombres(apps, schema_editor):
+    """
+    Lleva a la forma normalizada actual los nombres guardados con reglas anteriores
+    (tildes en altas manuales, espacios dobles si faltaba un apellido), para que la
+    importación los reconozca y no cree duplicados. Solo modelos históricos.
+    Un curso cuyo nombre normalizado ya existe se deja como está (el nombre es único).
+    """
+    Curso = apps.get_model('alumnos', 'Curso')
+    Alumno = apps.get_model('alumnos', 'Alumno')
+    VersionDatos = apps.get_model('alumnos', 'VersionDatos')
+
+    nombres = set(Curso.objects.values_list('nombre', flat=True))
+    cambios = 0
+    for curso in Curso.objects.order_by('id'):
+        nuevo = _normalizar(curso.nombre)
+        if nuevo != curso.nombre and nuevo not in nombres:
+            nombres.discard(curso.nombre)
+            nombres.add(nuevo)
+            curso.nombre = nuevo
+            curso.save(update_fields=['nombre'])
+            cambios += 1
+
+    lote = []
+    for alumno in Alumno.objects.only('id', 'nombre_completo').iterator(chunk_size=5000):
+        nuevo = _normalizar(alumno.nombre_completo)
+        if nuevo != alumno.nombre_completo:
+            alumno.nombre_completo = nuevo
+            lote.append(alumno)
+    Alumno.objects.bulk_update(lote, ['nombre_completo'], batch_size=1000)
+    cambios += len(lote)
+
+    # Las exportaciones ya generadas tienen los nombres viejos
+    if cambios and not VersionDatos.objects.filter(pk=1).update(version=F('version') + 1):
+        VersionDatos.objects.get_or_create(pk=1, defaults={'version': 1})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('alumnos', '0011_asistencia_secuencia'),
+    ]
+
+    operations = [
+        migrations.RunPython(renormalizar_nombres, migrations.RunPython.noop),
+    ]
@@ -11,10 +11,32 @@ class Alumno(models.Model):
     nombre_completo = models.CharField(max_length=200)
     curso = models.ForeignKey(Curso, on_delete=models.CASCADE)
 
+    class Meta:
+        indexes = [
+            # Listas de un curso ordenadas por nombre
+            models.Index(fields=['curso', 'nombre_completo'], name='alumno_curso_nombre_idx'),
+            # Listado general paginado por (nombre_completo, id)
+            models.Index(fields=['nombre_completo', 'id'], name='alumno_nombre_id_idx'),
+        ]
+
     def __str__(self):
         return f"{self.nombre_completo} ({self.curso})"
 
 
+class PalabraAlumno(models.Model):
+    """
+    Cada palabra normalizada (sin tildes, MAYÚSCULAS) del nombre de un alumno.
+    Permite buscar por prefijo de palabra con índice; se mantiene desde `busqueda.indexar`.
+    """
+    alumno = models.ForeignKey(Alumno, on_delete=models.CASCADE, related_name='palabras')
+    palabra = models.CharField(max_length=100)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['palabra', 'alumno'], name='palabra_alumno_idx'),
+        ]
+
+
 # modelos.py
 class AsistenciaMensual(models.Model):
     alumno = models.ForeignKey(Alumno, on_delete=models.CASCADE)
@@ -22,14 +44,94 @@ class AsistenciaMensual(models.Model):
     mes = models.DateField()  # Usamos el día 1 del mes para referencia
     presentes = models.PositiveIntegerField(default=0)
     inasistentes = models.PositiveIntegerField(default=0)
+    # Última modificación: la usa la exportación incremental (`modificado_desde`).
+    # Los UPDATE/bulk_create masivos deben fijarlo a mano (auto_now solo actúa en save()).
+    actualizado = models.DateTimeField(auto_now=True, db_index=True)
+    # Marca (ms) de la edición guardada por `guardar_lote`: un lote que llega tarde con
+    # una marca menor o igual no pisa lo que ya se guardó
+    secuencia = models.PositiveBigIntegerField(default=0)
 
     class Meta:
         unique_together = ('alumno', 'mes')
+        indexes = [
+            models.Index(fields=['mes', 'curso'], name='asis_mes_curso_idx'),  # un mes, todos los cursos
+            models.Index(fields=['curso', 'mes'], name='asis_curso_mes_idx'),  # historial de un curso
+        ]
 
 class DiasClaseMensual(models.Model):
     curso = models.ForeignKey(Curso, on_delete=models.CASCADE)
     mes = models.DateField()
     dias_clases = models.PositiveIntegerField(default=0)
+    actualizado = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        unique_together = ('curso', 'mes')
+        indexes = [
+            models.Index(fields=['mes'], name='dias_mes_idx'),
+        ]
+
+
+class Trabajo(models.Model):
+    """Importación/exportación encolada; la procesa `manage.py procesar_trabajos`."""
+    IMPORTACION = 'importacion'
+    EXPORTACION = 'exportacion'
+    TIPOS = [
+        (IMPORTACION, 'Importación de alumnos'),
+        (EXPORTACION, 'Exportación de asistencia'),
+    ]
+
+    PENDIENTE = 'pendiente'
+    EN_CURSO = 'en_curso'
+    TERMINADO = 'terminado'
+    ERROR = 'error'
+    ESTADOS = [
+        (PENDIENTE, 'Pendiente'),
+        (EN_CURSO, 'En curso'),
+        (TERMINADO, 'Terminado'),
+        (ERROR, 'Error'),
+    ]
+
+    tipo = models.CharField(max_length=20, choices=TIPOS)
+    estado = models.CharField(max_length=20, choices=ESTADOS, default=PENDIENTE)
+    archivo_entrada = models.FileField(upload_to='trabajos/entrada/', blank=True)
+    archivo_resultado = models.FileField(upload_to='trabajos/resultado/', blank=True)
+    progreso = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(default=0)  # 0 = desconocido
+    parametros = models.JSONField(default=dict, blank=True)  # p. ej. {'formato': 'zip'}
+    resultado = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True)
+    creado = models.DateTimeField(auto_now_add=True)
+    actualizado = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} #{self.pk} ({self.estado})"
+
+
+class ResumenCursoMensual(models.Model):
+    """
+    Totales por (curso, mes), mantenidos desde las vistas que escriben asistencia.
+    Se reconstruye con `manage.py reconstruir_resumenes`.
+    """
+    curso = models.ForeignKey(Curso, on_delete=models.CASCADE)
+    mes = models.DateField()
+    n_alumnos = models.PositiveIntegerField(default=0)
+    n_registros = models.PositiveIntegerField(default=0)  # alumnos con AsistenciaMensual del mes
+    presentes_total = models.PositiveIntegerField(default=0)
+    dias_clases = models.PositiveIntegerField(default=0)
+    suma_porcentajes = models.FloatField(default=0)  # suma de % individuales (para el promedio del dashboard)
+    n_perfectos = models.PositiveIntegerField(default=0)
+    n_criticos = models.PositiveIntegerField(default=0)
 
     class Meta:
         unique_together = ('curso', 'mes')
+        indexes = [
+            models.Index(fields=['mes'], name='resumen_mes_idx'),
+        ]
+
+
+class VersionDatos(models.Model):
+    """
+    Fila única con un contador que sube con cada escritura de matrícula, asistencia o días.
+    Identifica una "foto" de los datos (p. ej. para reutilizar exportaciones ya generadas).
+    """
+    version = models.PositiveBigIntegerField(default=0)
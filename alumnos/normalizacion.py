@@ -0,0 +1,63 @@
+# alumnos/normalizacion.py
+import unicodedata
+from functools import lru_cache
+
+import pandas as pd
+
+
+_RE_ESPACIOS = r'\s+'
+
+
+def _normalizar_texto(texto: str) -> str:
+    """Única definición de la regla: la usan `normalizar` y `normalizar_serie`."""
+    texto = unicodedata.normalize('NFKD', texto.upper())
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return " ".join(texto.split())
+
+
+_normalizar_con_cache = lru_cache(maxsize=65536)(_normalizar_texto)
+
+
+def normalizar(texto) -> str:
+    """
+    Normaliza un valor suelto: MAYÚSCULAS, sin tildes y con espacios colapsados.
+    Usa caché por valor (nombres y cursos se repiten mucho).
+    """
+    if texto is None or (not isinstance(texto, str) and pd.isna(texto)):
+        return ""
+    return _normalizar_con_cache(str(texto))
+
+
+def normalizar_serie(serie: pd.Series) -> pd.Series:
+    """
+    Versión vectorizada de `normalizar` para una columna completa.
+    Trabaja sobre los valores únicos (factorize) para no repetir trabajo
+    en columnas con muchos duplicados, como cursos o apellidos. Los únicos pasan
+    por la misma función que `normalizar` (sin su caché, que una columna grande
+    solo vaciaría), así ambas rutas no pueden diferir.
+    """
+    codigos, unicos = pd.factorize(serie, use_na_sentinel=True)
+    if len(unicos) == 0:
+        return pd.Series([""] * len(serie), index=serie.index, dtype=object)
+
+    unicos = (
+        pd.Series(unicos, dtype=object).astype(str)
+        .map(_normalizar_texto)
+        .to_numpy(dtype=object)
+    )
+    valores = unicos.take(codigos.clip(min=0))
+    valores[codigos < 0] = ""
+    return pd.Series(valores, index=serie.index, dtype=object)
+
+
+def unir_partes_serie(*series: pd.Series) -> pd.Series:
+    """Une columnas ya normalizadas con un espacio, omitiendo las vacías."""
+    unida = series[0]
+    for s in series[1:]:
+        unida = unida + ' ' + s
+    return unida.str.replace(_RE_ESPACIOS, ' ', regex=True).str.strip()
+
+
+def construir_nombre_completo(ap_paterno, ap_materno, nombres) -> str:
+    partes = [normalizar(p) for p in (ap_paterno, ap_materno, nombres)]
+    return " ".join(p for p in partes if p)
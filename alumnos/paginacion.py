@@ -0,0 +1,78 @@
+# alumnos/paginacion.py
+import base64
+import json
+
+from django.db.models import Q
+
+
+TAMANO_PAGINA = 50
+MAX_TAMANO_PAGINA = 200
+
+
+def codificar_cursor(nombre, alumno_id):
+    datos = json.dumps([nombre, alumno_id], ensure_ascii=False).encode('utf-8')
+    return base64.urlsafe_b64encode(datos).decode('ascii').rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    """Devuelve (nombre_completo, id). Lanza ValueError si el cursor no es válido."""
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        nombre, alumno_id = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+        return str(nombre), int(alumno_id)
+    except (ValueError, TypeError):
+        raise ValueError("Cursor de paginación inválido.")
+
+
+def _consulta(queryset, despues, antes, tamano):
+    """Queryset de la página (con una fila de más para saber si hay otra) y si viene invertido."""
+    if antes:
+        nombre, alumno_id = decodificar_cursor(antes)
+        # nombre <= x AND NOT (nombre = x AND id >= y): deja el rango sobre nombre para el índice
+        return (
+            queryset
+            .filter(nombre_completo__lte=nombre)
+            .exclude(Q(nombre_completo=nombre) & Q(id__gte=alumno_id))
+            .order_by('-nombre_completo', '-id')[:tamano + 1]
+        ), True
+    if despues:
+        nombre, alumno_id = decodificar_cursor(despues)
+        queryset = (
+            queryset
+            .filter(nombre_completo__gte=nombre)
+            .exclude(Q(nombre_completo=nombre) & Q(id__lte=alumno_id))
+        )
+    return queryset.order_by('nombre_completo', 'id')[:tamano + 1], False
+
+
+def _resultado(filas, invertido, despues, tamano):
+    hay_mas = len(filas) > tamano
+    filas = filas[:tamano]
+    if invertido:
+        filas = filas[::-1]
+        hay_anteriores, hay_siguientes = hay_mas, True
+    else:
+        hay_anteriores, hay_siguientes = bool(despues), hay_mas
+
+    if not filas:
+        return [], None, None
+    anterior = codificar_cursor(filas[0].nombre_completo, filas[0].id) if hay_anteriores else None
+    siguiente = codificar_cursor(filas[-1].nombre_completo, filas[-1].id) if hay_siguientes else None
+    return filas, anterior, siguiente
+
+
+def pagina(queryset, despues=None, antes=None, tamano=TAMANO_PAGINA):
+    """
+    Página de alumnos ordenados por (nombre_completo, id), por clave y no por OFFSET:
+    el costo no crece con el número de página.
+    `despues` / `antes`: cursores de la página anterior/siguiente (ver `codificar_cursor`).
+    Devuelve (alumnos, cursor_anterior, cursor_siguiente); un cursor es None si no hay más.
+    """
+    consulta, invertido = _consulta(queryset, despues, antes, tamano)
+    return _resultado(list(consulta), invertido, despues, tamano)
+
+
+async def apagina(queryset, despues=None, antes=None, tamano=TAMANO_PAGINA):
+    """Versión async de `pagina`."""
+    consulta, invertido = _consulta(queryset, despues, antes, tamano)
+    return _resultado([a async for a in consulta], invertido, despues, tamano)
@@ -0,0 +1,250 @@
+# alumnos/perfilado.py
+"""
+Perfilado por vista: cantidad de consultas, tiempo de BD, latencia total y las
+consultas repetidas (huellas SQL) de cada petición.
+- Cabecera `Server-Timing` en cada respuesta (se ve en las herramientas del navegador).
+- Agregados en memoria del proceso, por vista, para `views.ajax_metricas`.
+- Presupuestos por vista (PERFILADO_PRESUPUESTOS): si una petición los excede se
+  registra un warning; con PERFILADO_ESTRICTO (pensado para tests) se lanza
+  `PresupuestoExcedido` y la petición falla.
+"""
+import logging
+import re
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+
+logger = logging.getLogger(__name__)
+
+MAX_LATENCIAS = 1000      # por vista, para los percentiles
+MAX_HUELLAS = 200         # por vista; al pasarse se conservan las más frecuentes
+LARGO_HUELLA = 300
+
+_perfil_actual = ContextVar('perfil_actual', default=None)
+_lock = threading.Lock()
+_metricas = {}
+
+
+class PresupuestoExcedido(AssertionError):
+    """Una vista hizo más consultas (o tardó más en BD) que su presupuesto."""
+
+
+_RE_LISTA = re.compile(r"\((?:\s*%s\s*,)+\s*%s\s*\)")
+_RE_VALUES = re.compile(r"(VALUES\s*\([^)]*\))(?:\s*,\s*\([^)]*\))+", re.IGNORECASE)
+_RE_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+_RE_ESPACIOS = re.compile(r"\s+")
+
+
+def huella(sql):
+    """SQL normalizado: mismas consultas con distintos valores o largo de IN (...) dan la misma huella."""
+    sql = _RE_LISTA.sub('(...)', sql)
+    sql = _RE_VALUES.sub(r'\1, ...', sql)
+    sql = _RE_LITERAL.sub('?', sql)
+    return _RE_ESPACIOS.sub(' ', sql).strip()[:LARGO_HUELLA]
+
+
+def _registrar(execute, sql, params, many, context):
+    """execute_wrapper instalado en cada conexión; solo mide si hay un perfil en curso."""
+    perfil = _perfil_actual.get()
+    if perfil is None:
+        return execute(sql, params, many, context)
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        perfil['db'] += time.perf_counter() - inicio
+        perfil['consultas'] += 1
+        perfil['huellas'][huella(sql)] += 1
+
+
+def _instalar(connection, **kwargs):
+    if _registrar not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_registrar)
+
+
+def activar():
+    """Instala el registro en las conexiones abiertas y en las que se abran después."""
+    connection_created.connect(_instalar, dispatch_uid='alumnos.perfilado')
+    for connection in connections.all(initialized_only=True):
+        _instalar(connection)
+    # Las conexiones de los hilos de sync_to_async heredan el contexto, así que
+    # las consultas del ORM async también se cuentan en el perfil en curso.
+    _instalar(connections['default'])
+
+
+def _nuevo_perfil():
+    return {'consultas': 0, 'db': 0.0, 'huellas': Counter(), 'excesos': []}
+
+
+def _sumar(destino, perfil):
+    destino['consultas'] += perfil['consultas']
+    destino['db'] += perfil['db']
+    destino['huellas'].update(perfil['huellas'])
+
+
+@contextmanager
+def medir():
+    """
+    Perfil de consultas de un bloque de código fuera del middleware (p. ej. `benchmark`):
+    {'consultas', 'db' (s), 'huellas'}. Incluye las peticiones que se hagan dentro.
+    """
+    activar()
+    perfil = _nuevo_perfil()
+    token = _perfil_actual.set(perfil)
+    try:
+        yield perfil
+    finally:
+        _perfil_actual.reset(token)
+
+
+def presupuesto(vista):
+    """{'consultas': n, 'db_ms': t} de la vista (un entero equivale a solo consultas), o None."""
+    valor = getattr(settings, 'PERFILADO_PRESUPUESTOS', {}).get(vista)
+    if valor is None or isinstance(valor, dict):
+        return valor
+    return {'consultas': valor}
+
+
+def _excesos(vista, consultas, db_ms):
+    limite = presupuesto(vista)
+    if not limite:
+        return []
+    excesos = []
+    if consultas > limite.get('consultas', consultas):
+        excesos.append(f"{consultas} consultas (presupuesto {limite['consultas']})")
+    if db_ms > limite.get('db_ms', db_ms):
+        excesos.append(f"{db_ms:.1f} ms de BD (presupuesto {limite['db_ms']})")
+    return excesos
+
+
+def _acumular(vista, perfil, total):
+    with _lock:
+        m = _metricas.get(vista)
+        if m is None:
+            m = _metricas[vista] = {
+                'peticiones': 0, 'consultas': 0, 'consultas_max': 0, 'db': 0.0,
+                'excedidas': 0, 'latencias': deque(maxlen=MAX_LATENCIAS), 'huellas': Counter(),
+            }
+        m['peticiones'] += 1
+        m['consultas'] += perfil['consultas']
+        m['consultas_max'] = max(m['consultas_max'], perfil['consultas'])
+        m['db'] += perfil['db']
+        m['excedidas'] += bool(perfil['excesos'])
+        m['latencias'].append(total)
+        m['huellas'].update(perfil['huellas'])
+        if len(m['huellas']) > MAX_HUELLAS:
+            m['huellas'] = Counter(dict(m['huellas'].most_common(MAX_HUELLAS // 2)))
+
+
+def _percentil(ordenados, p):
+    if not ordenados:
+        return 0.0
+    return ordenados[min(len(ordenados) - 1, max(0, round(p / 100 * len(ordenados)) - 1))]
+
+
+def metricas(top=5):
+    """Agregados por vista desde que arrancó el proceso (o desde `reiniciar`)."""
+    with _lock:
+        copia = {
+            vista: {**m, 'latencias': sorted(m['latencias']), 'huellas': m['huellas'].most_common(top)}
+            for vista, m in _metricas.items()
+        }
+    resultado = {}
+    for vista, m in sorted(copia.items()):
+        n = m['peticiones']
+        resultado[vista] = {
+            'peticiones': n,
+            'consultas_prom': round(m['consultas'] / n, 1),
+            'consultas_max': m['consultas_max'],
+            'db_ms_prom': round(m['db'] * 1000 / n, 1),
+            'p50_ms': round(_percentil(m['latencias'], 50) * 1000, 1),
+            'p95_ms': round(_percentil(m['latencias'], 95) * 1000, 1),
+            'p99_ms': round(_percentil(m['latencias'], 99) * 1000, 1),
+            'excedidas': m['excedidas'],
+            'presupuesto': presupuesto(vista),
+            'repetidas': [{'sql': sql, 'veces': veces} for sql, veces in m['huellas'] if veces > n],
+        }
+    return resultado
+
+
+def reiniciar():
+    with _lock:
+        _metricas.clear()
+
+
+class PerfiladoMiddleware:
+    """
+    Mide cada petición (vistas síncronas y async). Va primero en MIDDLEWARE para
+    que la latencia incluya al resto de middlewares (sesión, autenticación).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        activar()
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        perfil, token, inicio = self._iniciar()
+        try:
+            response = self.get_response(request)
+        finally:
+            self._salir(perfil, token)
+        return self._terminar(request, response, perfil, inicio)
+
+    async def __acall__(self, request):
+        perfil, token, inicio = self._iniciar()
+        try:
+            response = await self.get_response(request)
+        finally:
+            self._salir(perfil, token)
+        return self._terminar(request, response, perfil, inicio)
+
+    def _iniciar(self):
+        _instalar(connections['default'])
+        perfil = _nuevo_perfil()
+        return perfil, _perfil_actual.set(perfil), time.perf_counter()
+
+    def _salir(self, perfil, token):
+        _perfil_actual.reset(token)
+        externo = _perfil_actual.get()
+        if externo is not None:
+            _sumar(externo, perfil)  # petición hecha dentro de `medir()`
+
+    def _terminar(self, request, response, perfil, inicio):
+        total = time.perf_counter() - inicio
+        match = getattr(request, 'resolver_match', None)
+        vista = (match.url_name or match.view_name) if match else None
+        db_ms = perfil['db'] * 1000
+        repetidas = sum(n for n in perfil['huellas'].values() if n > 1)
+
+        response['Server-Timing'] = (
+            f'db;dur={db_ms:.1f};desc="{perfil["consultas"]} consultas, {repetidas} repetidas", '
+            f'total;dur={total * 1000:.1f}'
+        )
+        if vista is None:
+            return response
+
+        perfil['excesos'] = _excesos(vista, perfil['consultas'], db_ms)
+        _acumular(vista, perfil, total)
+        if perfil['excesos']:
+            detalle = '; '.join(perfil['excesos'])
+            mas_repetida = perfil['huellas'].most_common(1)
+            if mas_repetida and mas_repetida[0][1] > 1:
+                detalle += f" — {mas_repetida[0][1]}× {mas_repetida[0][0]}"
+            if getattr(settings, 'PERFILADO_ESTRICTO', False):
+                raise PresupuestoExcedido(f"{vista}: {detalle}")
+            logger.warning("Presupuesto excedido en %s: %s", vista, detalle)
+        return response
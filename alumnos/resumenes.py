@@ -0,0 +1,126 @@
+# alumnos/resumenes.py
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count
+
+from . import cache_estadisticas, eventos, versiones
+from .estadisticas import porcentaje_curso
+from .models import Alumno, AsistenciaMensual, DiasClaseMensual, ResumenCursoMensual
+
+
+UMBRAL_CRITICO = 85.0
+
+
+def _calcular(dias, n_alumnos, presentes):
+    """
+    Totales de un (curso, mes) a partir de la lista de `presentes` de sus alumnos.
+    Mismos criterios que dashboard y reporte_cursos_mes:
+    - % individual = presentes / días del curso, redondeado a 1 decimal.
+    - perfecto: presentes == días; crítico: % < 85 (sin registro cuenta como 0).
+    """
+    datos = {
+        'n_alumnos': n_alumnos,
+        'n_registros': len(presentes),
+        'presentes_total': sum(presentes),
+        'dias_clases': dias,
+        'suma_porcentajes': 0.0,
+        'n_perfectos': 0,
+        'n_criticos': 0,
+    }
+    if dias > 0:
+        datos['suma_porcentajes'] = sum(round((p / dias) * 100, 1) for p in presentes)
+        for p in presentes:
+            p = min(p, dias)
+            if p == dias:
+                datos['n_perfectos'] += 1
+            elif round((p / dias) * 100.0, 1) < UMBRAL_CRITICO:
+                datos['n_criticos'] += 1
+        datos['n_criticos'] += max(0, n_alumnos - len(presentes))
+    return datos
+
+
+def actualizar_resumen(curso_id, mes, invalidar=True):
+    """
+    Recalcula el resumen de un (curso, mes). Llamar tras escribir asistencia o días.
+    Lectura y escritura van en una transacción: las vistas AJAX de una fila no abren
+    ninguna y, sin ella, otra escritura entre ambas dejaría guardado un resumen viejo.
+    """
+    with transaction.atomic():
+        dias = (
+            DiasClaseMensual.objects
+            .filter(curso_id=curso_id, mes=mes)
+            .values_list('dias_clases', flat=True)
+            .first()
+        ) or 0
+        n_alumnos = Alumno.objects.filter(curso_id=curso_id).count()
+        presentes = list(
+            AsistenciaMensual.objects
+            .filter(alumno__curso_id=curso_id, mes=mes)
+            .values_list('presentes', flat=True)
+        )
+        datos = _calcular(dias, n_alumnos, presentes)
+        ResumenCursoMensual.objects.update_or_create(curso_id=curso_id, mes=mes, defaults=datos)
+    # Delta para las páginas de estadísticas abiertas en este mes (mismas claves que estadisticas_mes)
+    eventos.publicar_al_confirmar(eventos.canal_mes(mes), {
+        'curso_id': curso_id,
+        'porcentaje': porcentaje_curso(datos['presentes_total'], dias, n_alumnos),
+        'alumnos': n_alumnos,
+        'presentes_total': datos['presentes_total'],
+        'dias_clases': dias,
+    })
+    if invalidar:
+        # Al confirmar: invalidar antes dejaría que otra petición vuelva a cachear los datos viejos
+        transaction.on_commit(lambda: cache_estadisticas.invalidar_mes(mes))
+        versiones.incrementar()
+
+
+def actualizar_resumenes_curso(curso_id):
+    """Recalcula todos los meses de un curso (cambió la matrícula)."""
+    meses = set(ResumenCursoMensual.objects.filter(curso_id=curso_id).values_list('mes', flat=True))
+    meses.update(DiasClaseMensual.objects.filter(curso_id=curso_id).values_list('mes', flat=True))
+    meses.update(
+        AsistenciaMensual.objects.filter(alumno__curso_id=curso_id)
+        .values_list('mes', flat=True).distinct()
+    )
+    for mes in meses:
+        actualizar_resumen(curso_id, mes, invalidar=False)
+    transaction.on_commit(cache_estadisticas.invalidar_todo)
+    versiones.incrementar()
+
+
+def reconstruir_resumenes():
+    """Borra y recalcula toda la tabla de resúmenes recorriendo cada tabla una vez."""
+    dias_map = {
+        (d['curso_id'], d['mes']): d['dias_clases'] or 0
+        for d in DiasClaseMensual.objects.values('curso_id', 'mes', 'dias_clases')
+    }
+    n_alumnos_map = {
+        x['curso_id']: x['n']
+        for x in Alumno.objects.values('curso_id').annotate(n=Count('id'))
+    }
+    presentes_map = defaultdict(list)
+    for curso_id, mes, presentes in (
+        AsistenciaMensual.objects
+        .values_list('alumno__curso_id', 'mes', 'presentes')
+        .iterator(chunk_size=5000)
+    ):
+        presentes_map[(curso_id, mes)].append(presentes)
+
+    claves = set(dias_map) | set(presentes_map)
+    with transaction.atomic():
+        ResumenCursoMensual.objects.all().delete()
+        ResumenCursoMensual.objects.bulk_create(
+            [
+                ResumenCursoMensual(curso_id=curso_id, mes=mes, **_calcular(
+                    dias_map.get((curso_id, mes), 0),
+                    n_alumnos_map.get(curso_id, 0),
+                    presentes_map.get((curso_id, mes), []),
+                ))
+                for curso_id, mes in claves
+            ],
+            batch_size=1000,
+        )
+    cache_estadisticas.invalidar_todo()
+    versiones.incrementar()
+    return len(claves)
@@ -0,0 +1,158 @@
+# alumnos/routers.py
+"""
+Lecturas de reportes contra una copia de la base (alias `reporting`), para que los
+reportes pesados no compitan con el autoguardado de los docentes.
+- Las vistas marcadas con `@lee_de_reportes` leen los modelos de `alumnos` desde la copia;
+  todo lo demás (sesiones, usuarios, escrituras) va a `default`.
+- Lecturas tras escritura: `ReportesMiddleware` guarda en la sesión la versión de datos
+  después de que la petición cambió datos; mientras la copia no llegue a esa versión, esa
+  sesión lee de `default` (ve lo que acaba de guardar).
+- Si el alias no está configurado o la copia no se puede abrir, se lee de `default`.
+Perfil: asistencia_escolar/settings_reportes.py; la copia se renueva con `snapshot_reportes`.
+"""
+import functools
+import os
+from contextvars import ContextVar
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.db import DatabaseError, connections
+from django.utils import timezone
+
+from . import versiones
+
+
+ALIAS = 'reporting'
+CLAVE_SESION = 'version_escrita'
+
+_lectura = ContextVar('lectura_reportes', default=None)  # alias desde el que se lee
+
+
+def configurado():
+    return ALIAS in connections.settings
+
+
+def ruta_copia():
+    """Ruta del archivo SQLite de la copia (NAME puede ser una URI file:...?mode=ro)."""
+    nombre = str(connections.settings[ALIAS]['NAME'])
+    return Path(urlsplit(nombre).path if nombre.startswith('file:') else nombre)
+
+
+def leyendo_copia():
+    return _lectura.get() == ALIAS
+
+
+def corte():
+    """
+    Instante hasta el que están los datos que se leen: el del snapshot si se lee la copia.
+    Sirve como corte de las exportaciones incrementales (no se pierden cambios posteriores).
+    """
+    if leyendo_copia():
+        try:
+            return datetime.fromtimestamp(os.stat(ruta_copia()).st_mtime, tz=dt_timezone.utc)
+        except OSError:
+            pass
+    return timezone.now()
+
+
+# Modelos que nunca se leen de la copia: la cola de trabajos se consulta para no encolar
+# repetidos y tiene que ver lo encolado después del último snapshot
+SOLO_DEFAULT = {'trabajo'}
+
+
+class ReportesRouter:
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label == 'alumnos' and model._meta.model_name not in SOLO_DEFAULT:
+            return _lectura.get()
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_migrate(self, db, app_label, **hints):
+        # La copia se reemplaza entera con `snapshot_reportes`: nunca se migra
+        return db != ALIAS
+
+
+def _alias_para(version_escrita):
+    """ALIAS si la copia responde y está al día para esta sesión; si no, None (= default)."""
+    if not configurado():
+        return None
+    try:
+        version_copia = versiones.version_actual(using=ALIAS)
+    except DatabaseError:
+        return None
+    if version_escrita and version_copia < version_escrita:
+        return None
+    return ALIAS
+
+
+async def _aalias_para(version_escrita):
+    if not configurado():
+        return None
+    try:
+        version_copia = await versiones.aversion_actual(using=ALIAS)
+    except DatabaseError:
+        return None
+    if version_escrita and version_copia < version_escrita:
+        return None
+    return ALIAS
+
+
+def lee_de_reportes(vista):
+    """Decorador de vistas (síncronas o async) de solo lectura pesada: leen de la copia."""
+    if iscoroutinefunction(vista):
+        @functools.wraps(vista)
+        async def envoltura(request, *args, **kwargs):
+            token = _lectura.set(await _aalias_para(await request.session.aget(CLAVE_SESION)))
+            try:
+                return await vista(request, *args, **kwargs)
+            finally:
+                _lectura.reset(token)
+        return envoltura
+
+    @functools.wraps(vista)
+    def envoltura(request, *args, **kwargs):
+        token = _lectura.set(_alias_para(request.session.get(CLAVE_SESION)))
+        try:
+            return vista(request, *args, **kwargs)
+        finally:
+            _lectura.reset(token)
+    return envoltura
+
+
+class ReportesMiddleware:
+    """
+    Anota en la sesión la versión de datos tras cada petición que cambió datos
+    (llamó a `versiones.incrementar`), para las lecturas tras escritura de
+    `lee_de_reportes`. Va después de SessionMiddleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with versiones.observar() as marca:
+            response = self.get_response(request)
+        if marca['cambio'] and configurado():
+            self._anotar(request)
+        return response
+
+    async def __acall__(self, request):
+        with versiones.observar() as marca:
+            response = await self.get_response(request)
+        if marca['cambio'] and configurado():
+            await sync_to_async(self._anotar)(request)
+        return response
+
+    def _anotar(self, request):
+        if hasattr(request, 'session'):
+            request.session[CLAVE_SESION] = versiones.version_actual()
@@ -0,0 +1,151 @@
+# alumnos/sinteticos.py
+"""
+Datos sintéticos reproducibles (misma semilla = mismos datos) para medir rendimiento:
+planilla del SIS con alumnos (mismo formato que se sube en `cargar_excel`) y
+asistencia mensual / días de clases. Lo usan `generar_datos` y `benchmark`.
+"""
+import random
+from datetime import date
+from itertools import islice
+
+import pandas as pd
+from django.db import transaction
+from openpyxl import Workbook
+
+from .importacion import importar_bloques
+from .lectura import COLUMNAS_IMPORTACION, TAMANO_BLOQUE
+from .models import Alumno, AsistenciaMensual, Curso, DiasClaseMensual
+from .resumenes import reconstruir_resumenes
+
+
+NOMBRES = [
+    "Sofía", "Martín", "Valentina", "Benjamín", "Isidora", "Vicente", "Florencia", "Matías",
+    "Antonia", "Agustín", "Josefa", "Tomás", "Emilia", "Joaquín", "Catalina", "Maximiliano",
+    "Fernanda", "Cristóbal", "Javiera", "Lucas", "Amanda", "José", "Ignacia", "Diego",
+    "Renata", "Gaspar", "Trinidad", "Bastián", "Magdalena", "Ángel",
+]
+APELLIDOS = [
+    "González", "Muñoz", "Rojas", "Díaz", "Pérez", "Soto", "Contreras", "Silva", "Martínez",
+    "Sepúlveda", "Morales", "Rodríguez", "López", "Fuentes", "Hernández", "Torres", "Araya",
+    "Flores", "Espinoza", "Valenzuela", "Castillo", "Tapia", "Reyes", "Gutiérrez", "Castro",
+    "Pizarro", "Álvarez", "Vásquez", "Sánchez", "Fernández", "Ramírez", "Carrasco", "Gómez",
+    "Cortés", "Herrera", "Núñez", "Jara", "Vergara", "Rivera", "Figueroa",
+]
+GRADOS = [
+    "1° Básico", "2° Básico", "3° Básico", "4° Básico", "5° Básico", "6° Básico",
+    "7° Básico", "8° Básico", "1° Medio", "2° Medio", "3° Medio", "4° Medio",
+]
+FECHA_SIN_RETIRO = date(1900, 1, 1)
+TAMANO_LOTE = 5000
+
+
+def cursos_sinteticos(n):
+    """[(Desc Grado, Letra Curso)] de `n` cursos: todos los grados con la letra A, luego B, ..."""
+    cursos = []
+    for i in range(n):
+        vuelta, grado = divmod(i, len(GRADOS))
+        letra = chr(ord('A') + vuelta % 26) + (str(vuelta // 26 + 1) if vuelta >= 26 else '')
+        cursos.append((GRADOS[grado], letra))
+    return cursos
+
+
+def filas_sis(n_cursos, n_alumnos, semilla=1, retirados=0.03):
+    """
+    Filas (tuplas en el orden de COLUMNAS_IMPORTACION) de una planilla del SIS con
+    `n_alumnos` repartidos entre `n_cursos`. Una fracción `retirados` trae fecha de retiro.
+    """
+    rng = random.Random(semilla)
+    cursos = cursos_sinteticos(n_cursos)
+    for i in range(n_alumnos):
+        grado, letra = cursos[i % n_cursos]
+        nombres = f"{rng.choice(NOMBRES)} {rng.choice(NOMBRES)}"
+        retiro = FECHA_SIN_RETIRO
+        if rng.random() < retirados:
+            retiro = date(2025, rng.randint(3, 11), rng.randint(1, 28))
+        yield (nombres, rng.choice(APELLIDOS), rng.choice(APELLIDOS), grado, letra, retiro)
+
+
+def escribir_xlsx(ruta, filas):
+    """Escribe la planilla en modo write-only (memoria constante)."""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Alumnos")
+    ws.append(COLUMNAS_IMPORTACION)
+    for fila in filas:
+        ws.append(list(fila[:-1]) + [fila[-1].strftime('%d-%m-%Y')])
+    wb.save(ruta)
+
+
+def _bloques(filas):
+    filas = iter(filas)
+    while bloque := list(islice(filas, TAMANO_BLOQUE)):
+        df = pd.DataFrame(bloque, columns=COLUMNAS_IMPORTACION)
+        df['Fecha Retiro'] = pd.to_datetime(df['Fecha Retiro'])
+        yield df
+
+
+def meses_desde(desde, n):
+    """Los `n` meses (día 1) a partir de `desde`."""
+    return [
+        date(desde.year + (desde.month - 1 + i) // 12, (desde.month - 1 + i) % 12 + 1, 1)
+        for i in range(n)
+    ]
+
+
+def _en_lotes(modelo, objetos):
+    objetos = iter(objetos)
+    total = 0
+    while lote := list(islice(objetos, TAMANO_LOTE)):
+        modelo.objects.bulk_create(lote)
+        total += len(lote)
+    return total
+
+
+def generar(n_cursos, n_alumnos, n_meses, desde=date(2025, 3, 1), semilla=1, reemplazar=False):
+    """
+    Llena la base con datos sintéticos: alumnos (por el mismo camino que una importación),
+    días de clases por curso y mes (90% de los pares) y asistencia por alumno y mes (90%).
+    Con datos existentes exige `reemplazar`, que borra antes todos los cursos y alumnos.
+    Devuelve {'cursos', 'alumnos', 'meses', 'dias_clases', 'asistencias'}.
+    """
+    if Curso.objects.exists():
+        if not reemplazar:
+            raise ValueError("La base ya tiene datos; usa reemplazar para borrarlos antes.")
+        Alumno.objects.all().delete()
+        Curso.objects.all().delete()
+
+    importar_bloques(_bloques(filas_sis(n_cursos, n_alumnos, semilla)))
+
+    rng = random.Random(semilla)
+    meses = meses_desde(desde, n_meses)
+    cursos = list(Curso.objects.order_by('id').values_list('id', flat=True))
+    alumnos = list(Alumno.objects.order_by('id').values_list('id', 'curso_id'))
+    dias = {
+        (curso_id, mes): rng.randint(16, 22)
+        for mes in meses for curso_id in cursos if rng.random() < 0.9
+    }
+
+    def asistencias():
+        for mes in meses:
+            for alumno_id, curso_id in alumnos:
+                total = dias.get((curso_id, mes), 20)
+                if rng.random() < 0.9:
+                    presentes = min(total, max(0, round(rng.gauss(0.88, 0.1) * total)))
+                    yield AsistenciaMensual(
+                        alumno_id=alumno_id, curso_id=curso_id, mes=mes,
+                        presentes=presentes, inasistentes=total - presentes,
+                    )
+
+    with transaction.atomic():
+        n_dias = _en_lotes(DiasClaseMensual, (
+            DiasClaseMensual(curso_id=c, mes=m, dias_clases=d) for (c, m), d in dias.items()
+        ))
+        n_asistencias = _en_lotes(AsistenciaMensual, asistencias())
+    # También invalida la caché de estadísticas y sube la versión de datos
+    reconstruir_resumenes()
+    return {
+        'cursos': len(cursos),
+        'alumnos': len(alumnos),
+        'meses': len(meses),
+        'dias_clases': n_dias,
+        'asistencias': n_asistencias,
+    }
@@ -0,0 +1,32 @@
+# alumnos/sqlite.py
+"""
+PRAGMAs de SQLite aplicados al abrir cada conexión (señal `connection_created`).
+Se configuran con SQLITE_PRAGMAS; el perfil de producción está en
+asistencia_escolar/settings_produccion.py.
+"""
+import re
+
+from django.conf import settings
+
+
+_RE_NOMBRE = re.compile(r'^[a-z_]+$')
+_RE_VALOR = re.compile(r'^-?\w+$')
+
+
+def _solo_lectura(connection):
+    # La copia de reportes (URI con mode=ro) no escribe ni reutiliza la conexión:
+    # los PRAGMAs de escritura y de caché serían consultas de más en cada petición
+    nombre = str(connection.settings_dict['NAME'])
+    return nombre.startswith('file:') and 'mode=ro' in nombre
+
+
+def aplicar_pragmas(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite' or _solo_lectura(connection):
+        return
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', None) or {}
+    with connection.cursor() as cursor:
+        for nombre, valor in pragmas.items():
+            # PRAGMA no admite parámetros: se valida para no interpolar cualquier cosa
+            if not _RE_NOMBRE.match(nombre) or not _RE_VALOR.match(str(valor)):
+                raise ValueError(f"PRAGMA inválido en SQLITE_PRAGMAS: {nombre}={valor!r}")
+            cursor.execute(f"PRAGMA {nombre} = {valor}")
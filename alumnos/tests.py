@@ -1,3 +1,989 @@
-from django.test import TestCase
+import io
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+from datetime import date, timedelta
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+import pandas as pd
+from asgiref.sync import sync_to_async
+from openpyxl import Workbook, load_workbook
+from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.cache import cache
+from django.db import connection, connections
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import AsyncClient, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import (
+    busqueda, cache_estadisticas, cache_exportaciones, eventos, paginacion, perfilado, routers, sinteticos,
+    versiones, views,
+)
+from .asistencia import guardar_lote, rebalancear_asistencias
+from .estadisticas import estadisticas_mes
+from .exportacion import CONTENT_TYPE_XLSX, generar_archivo, leer_filtro
+from .importacion import importar_bloques
+from .lectura import COLUMNAS_IMPORTACION, leer_bloques
+from .normalizacion import normalizar, normalizar_serie
+from .management.commands.snapshot_reportes import snapshot
+from .models import Alumno, AsistenciaMensual, Curso, DiasClaseMensual, ResumenCursoMensual, Trabajo
+from .resumenes import reconstruir_resumenes
+from .trabajos import encolar_exportacion, ejecutar, recuperar_colgados, tomar_siguiente
+
+
+# La caché por defecto es compartida en disco: cada test usa una propia en memoria
+CACHE_TESTS = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tests'}}
+MARZO = date(2025, 3, 1)
+ABRIL = date(2025, 4, 1)
+
+
+def planilla(filas):
+    """Bloque del SIS como lo entrega `lectura.leer_bloques`."""
+    df = pd.DataFrame(list(filas), columns=COLUMNAS_IMPORTACION)
+    df['Fecha Retiro'] = pd.to_datetime(df['Fecha Retiro'])
+    return [df]
+
+
+@override_settings(CACHES=CACHE_TESTS)
+class BaseTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def crear_curso(self, nombre, n_alumnos):
+        curso = Curso.objects.create(nombre=nombre)
+        alumnos = Alumno.objects.bulk_create([
+            Alumno(nombre_completo=f"{nombre} ALUMNO {i:02d}", curso=curso) for i in range(n_alumnos)
+        ])
+        return curso, alumnos
+
+    def cliente(self):
+        usuario = get_user_model().objects.create_user('docente', password='x')
+        self.client.force_login(usuario)
+        return self.client
+
+
+class ImportacionTests(BaseTests):
+    def test_cuenta_insertados_omitidos_y_retirados(self):
+        filas = list(sinteticos.filas_sis(3, 60, semilla=7, retirados=0.2))
+        retirados = sum(fila[-1] != sinteticos.FECHA_SIN_RETIRO for fila in filas)
+
+        totales = importar_bloques(planilla(filas))
+
+        self.assertEqual(totales['retirados'], retirados)
+        self.assertEqual(totales['cursos_creados'], 3)
+        self.assertEqual(totales['insertados'] + totales['omitidos'], 60 - retirados)
+        self.assertEqual(Alumno.objects.count(), totales['insertados'])
+        self.assertEqual(Curso.objects.count(), 3)
+
+    def test_reimportar_no_duplica(self):
+        filas = list(sinteticos.filas_sis(2, 30, semilla=3, retirados=0))
+        primera = importar_bloques(planilla(filas))
+
+        segunda = importar_bloques(planilla(filas))
+
+        self.assertEqual(segunda['insertados'], 0)
+        self.assertEqual(segunda['omitidos'], 30)
+        self.assertEqual(segunda['cursos_creados'], 0)
+        self.assertEqual(Alumno.objects.count(), primera['insertados'])
+
+    def test_serie_y_valor_suelto_normalizan_igual(self):
+        valores = pd.Series(["  josé  ángel ", "Núñez", "ש\u05b0ל", "1° básico", None, "Ä\tb"])
+
+        self.assertEqual(normalizar_serie(valores).tolist(), [normalizar(v) for v in valores])
+
+    def test_carga_y_estado_piden_la_misma_sesion(self):
+        for url in (reverse('cargar_excel'), reverse('ajax_estado_trabajo', args=[1])):
+            self.assertRedirects(self.client.get(url), f"{reverse('login')}?next={url}")
+
+        respuesta = self.cliente().get(reverse('cargar_excel'))
+        self.assertEqual(respuesta.status_code, 200)
+
+    def test_normaliza_nombres_y_cursos(self):
+        filas = [("José Ángel", "Núñez", "Pérez", "1° Básico", "a", sinteticos.FECHA_SIN_RETIRO)]
+
+        importar_bloques(planilla(filas))
+
+        alumno = Alumno.objects.select_related('curso').get()
+        self.assertEqual(alumno.nombre_completo, "NUNEZ PEREZ JOSE ANGEL")
+        self.assertEqual(alumno.curso.nombre, "1° BASICO A")
+
+    def test_importar_actualiza_matricula_de_resumenes(self):
+        curso = Curso.objects.create(nombre="1° BASICO A")
+        DiasClaseMensual.objects.create(curso=curso, mes=MARZO, dias_clases=20)
+        reconstruir_resumenes()
+        filas = [("Ana", "Soto", "Rojas", "1° Básico", "A", sinteticos.FECHA_SIN_RETIRO)]
+
+        importar_bloques(planilla(filas))
+
+        self.assertEqual(ResumenCursoMensual.objects.get(curso=curso, mes=MARZO).n_alumnos, 1)
+
+
+class LecturaTests(SimpleTestCase):
+    def test_xlsx_en_bloques_con_columnas_en_otro_orden(self):
+        wb = Workbook()
+        ws = wb.active
+        ws.append(['RUN', *reversed(COLUMNAS_IMPORTACION)])   # columna extra y otro orden
+        for i in range(5):
+            ws.append([f'{i}-K', '1900-01-01', 'A', '1° Básico', 'Soto', 'Pérez', f'Ana {i}'])
+            if i == 2:
+                ws.append([None] * 7)   # las filas vacías se saltan
+        contenido = io.BytesIO()
+        wb.save(contenido)
+
+        bloques = list(leer_bloques(SimpleUploadedFile('sis.xlsx', contenido.getvalue()), tamano=2))
+
+        self.assertEqual([len(b) for b in bloques], [2, 2, 1])
+        self.assertEqual(list(bloques[0].columns), COLUMNAS_IMPORTACION)
+        self.assertEqual(bloques[2].iloc[0]['Nombres'], 'Ana 4')
+        self.assertEqual(bloques[0].iloc[0]['Fecha Retiro'], pd.Timestamp('1900-01-01'))
+
+    def test_csv_con_punto_y_coma_bom_y_fechas_dia_primero(self):
+        contenido = '\ufeff' + '\n'.join([
+            ';'.join(COLUMNAS_IMPORTACION),
+            'Ana;Soto;Pérez;1° Básico;A;01/01/1900',
+            'Luis;Rojas;Díaz;1° Básico;B;03/02/2025',
+        ])
+
+        bloques = list(leer_bloques(SimpleUploadedFile('sis.csv', contenido.encode('utf-8')), tamano=1))
+
+        self.assertEqual(len(bloques), 2)
+        self.assertEqual(list(bloques[0].columns), COLUMNAS_IMPORTACION)
+        self.assertEqual(bloques[1].iloc[0]['Fecha Retiro'], pd.Timestamp('2025-02-03'))
+
+    def test_faltan_columnas(self):
+        contenido = 'Nombres,Apellido Paterno\nAna,Soto\n'.encode('utf-8')
+
+        with self.assertRaisesMessage(ValueError, 'Faltan columnas en el archivo: Apellido Materno'):
+            list(leer_bloques(SimpleUploadedFile('sis.csv', contenido)))
+
+
+def media_temporal(test):
+    """MEDIA_ROOT (y la caché de exportaciones) en un directorio propio del test."""
+    media = Path(tempfile.mkdtemp(prefix='tests_media_'))
+    test.addCleanup(shutil.rmtree, media, ignore_errors=True)
+    ajuste = override_settings(MEDIA_ROOT=media, EXPORTACION_CACHE_DIR=media / 'exportaciones')
+    ajuste.enable()
+    test.addCleanup(ajuste.disable)
+    return media
+
+
+class TrabajosTests(BaseTests):
+    def setUp(self):
+        super().setUp()
+        media_temporal(self)
+
+    def test_tomar_siguiente_reserva_en_orden(self):
+        primero = encolar_exportacion({'formato': 'xlsx'})
+        segundo = encolar_exportacion({'formato': 'zip'})
+
+        self.assertEqual(tomar_siguiente().id, primero.id)
+        self.assertEqual(tomar_siguiente().id, segundo.id)
+        self.assertIsNone(tomar_siguiente())
+        self.assertEqual(Trabajo.objects.filter(estado=Trabajo.EN_CURSO).count(), 2)
+
+    def test_encolar_exportacion_reutiliza_la_activa(self):
+        trabajo = encolar_exportacion({'formato': 'zip'})
+        Trabajo.objects.filter(pk=trabajo.pk).update(parametros={'formato': 'zip', 'reintentos': 1})
+
+        self.assertEqual(encolar_exportacion({'formato': 'zip'}).id, trabajo.id)
+        self.assertNotEqual(encolar_exportacion({'formato': 'xlsx'}).id, trabajo.id)
+
+        Trabajo.objects.filter(pk=trabajo.pk).update(estado=Trabajo.TERMINADO)
+        self.assertNotEqual(encolar_exportacion({'formato': 'zip'}).id, trabajo.id)
+
+    def test_recuperar_colgados_reencola_una_vez(self):
+        viejo = timezone.now() - timedelta(hours=1)
+        colgado = Trabajo.objects.create(tipo=Trabajo.EXPORTACION, estado=Trabajo.EN_CURSO, progreso=3)
+        reintentado = Trabajo.objects.create(
+            tipo=Trabajo.EXPORTACION, estado=Trabajo.EN_CURSO, parametros={'reintentos': 1},
+        )
+        activo = Trabajo.objects.create(tipo=Trabajo.EXPORTACION, estado=Trabajo.EN_CURSO)
+        Trabajo.objects.filter(pk__in=[colgado.pk, reintentado.pk]).update(actualizado=viejo)
+
+        self.assertEqual(recuperar_colgados(), (1, 1))
+
+        colgado.refresh_from_db()
+        self.assertEqual(
+            (colgado.estado, colgado.progreso, colgado.parametros), (Trabajo.PENDIENTE, 0, {'reintentos': 1})
+        )
+        self.assertEqual(Trabajo.objects.get(pk=reintentado.pk).estado, Trabajo.ERROR)
+        self.assertEqual(Trabajo.objects.get(pk=activo.pk).estado, Trabajo.EN_CURSO)
+
+    def test_importacion_encolada_de_punta_a_punta(self):
+        cliente = self.cliente()
+        contenido = '\n'.join([
+            ','.join(COLUMNAS_IMPORTACION),
+            'Ana,Soto,Pérez,1° Básico,A,01/01/1900',
+            'Luis,Rojas,Díaz,1° Básico,A,03/02/2025',
+        ]).encode('utf-8')
+
+        respuesta = cliente.post(
+            reverse('cargar_excel'),
+            {'excel_file': SimpleUploadedFile('sis.csv', contenido)},
+            HTTP_ACCEPT='application/json',
+        )
+        trabajo_id = respuesta.json()['trabajo_id']
+        ejecutar(tomar_siguiente())
+
+        estado = cliente.get(reverse('ajax_estado_trabajo', args=[trabajo_id])).json()['trabajo']
+        self.assertEqual(estado['estado'], Trabajo.TERMINADO)
+        self.assertEqual((estado['resultado']['insertados'], estado['resultado']['retirados']), (1, 1))
+        self.assertEqual(Alumno.objects.get().nombre_completo, 'SOTO PEREZ ANA')
+        self.assertEqual(cliente.get(reverse('ajax_estado_trabajo', args=[999])).status_code, 404)
+
+
+def valores(libro):
+    """{hoja: [[valores de la fila]]} de un libro generado."""
+    wb = load_workbook(io.BytesIO(libro.read()))
+    return {ws.title: [list(fila) for fila in ws.iter_rows(values_only=True)] for ws in wb.worksheets}
+
+
+class ExportacionTests(BaseTests):
+    def setUp(self):
+        super().setUp()
+        media_temporal(self)
+        self.curso_a, self.alumnos_a = self.crear_curso("1A", 2)
+        self.curso_b, self.alumnos_b = self.crear_curso("1B", 1)
+        self.curso_c, _ = self.crear_curso("2A", 0)
+        a0, a1 = self.alumnos_a
+        guardar_lote(self.curso_a, MARZO, [
+            {'alumno_id': a0.id, 'presentes': 18, 'inasistentes': 2},
+            {'alumno_id': a1.id, 'presentes': 10, 'inasistentes': 10},
+        ], dias_clases=20)
+        guardar_lote(self.curso_a, ABRIL, [{'alumno_id': a0.id, 'presentes': 9, 'inasistentes': 9}], dias_clases=18)
+        guardar_lote(self.curso_b, MARZO, [
+            {'alumno_id': self.alumnos_b[0].id, 'presentes': 20, 'inasistentes': 0},
+        ], dias_clases=20)
+
+    def test_libro_completo(self):
+        with generar_archivo(workers=1) as libro:
+            hojas = valores(libro)
+
+        self.assertEqual(list(hojas), ['Gráficos', '1A', '1B', '2A'])
+        # Gráficos: % de cada curso en el último mes con datos (abril)
+        self.assertEqual(hojas['Gráficos'][0], ['Curso', '% Asistencia ABRIL 2025'])
+        self.assertEqual(hojas['Gráficos'][1:], [['1A', 0.25], ['1B', 0], ['2A', 0]])
+        filas = hojas['1A']
+        self.assertEqual(filas[0][0], 'LISTA Y ASISTENCIA - 1A')
+        self.assertEqual(filas[1][:2] + filas[1][5:6], ['ALUMNO', 'MARZO 2025', 'ABRIL 2025'])
+        self.assertEqual(filas[3], ['1A ALUMNO 00', 20, 18, 2, '=IF(B4>0,C4/B4,0)', 18, 9, 9, '=IF(F4>0,G4/F4,0)'])
+        self.assertEqual(filas[4][1:4] + filas[4][5:8], [20, 10, 10, 18, 0, 0])   # sin registro en abril
+        self.assertEqual(filas[7][:2], ['Resumen por mes', 20])
+        self.assertEqual(hojas['2A'][3], ['(Sin alumnos en este curso)'] + [None] * 8)
+
+    def test_descarga_directa_en_streaming(self):
+        cliente = self.cliente()
+
+        respuesta = cliente.get(reverse('exportar_excel'), {'modo': 'directo'})
+
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertTrue(respuesta.streaming)
+        self.assertEqual(respuesta['Content-Type'], CONTENT_TYPE_XLSX)
+        self.assertRegex(
+            respuesta['Content-Disposition'], r'^attachment; filename="asistencia_export_\d{8}_\d{4}\.xlsx"$'
+        )
+        self.assertIn('X-Exportacion-Corte', respuesta)
+        hojas = valores(io.BytesIO(b''.join(respuesta.streaming_content)))
+        self.assertEqual(list(hojas), ['Gráficos', '1A', '1B', '2A'])
+
+    def test_zip_con_un_csv_por_curso(self):
+        respuesta = self.cliente().get(reverse('exportar_excel'), {'modo': 'directo', 'formato': 'zip'})
+
+        zf = zipfile.ZipFile(io.BytesIO(b''.join(respuesta.streaming_content)))
+        self.assertEqual(zf.namelist(), ['1A.csv', '1B.csv', '2A.csv'])
+        lineas = zf.read('1A.csv').decode('utf-8-sig').splitlines()
+        self.assertEqual(lineas[0], 'alumno,mes,dias_clases,presentes,inasistentes,porcentaje_asistencia')
+        self.assertEqual(lineas[1:3], ['1A ALUMNO 00,2025-03,20,18,2,90.0', '1A ALUMNO 00,2025-04,18,9,9,50.0'])
+        self.assertEqual(zf.read('2A.csv').decode('utf-8-sig').splitlines()[1:], [])
+
+    def test_formato_no_soportado(self):
+        respuesta = self.cliente().get(reverse('exportar_excel'), {'modo': 'directo', 'formato': 'pdf'})
+
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(respuesta.json(), {'ok': False, 'error': 'Formato no soportado.'})
+
+    def test_en_paralelo_sale_igual_que_en_serie(self):
+        for i in range(4):
+            self.crear_curso(f"3{i}", 3)
+        for formato in ('xlsx', 'zip'):
+            with self.subTest(formato=formato):
+                with generar_archivo(formato=formato, workers=1) as serie, \
+                        generar_archivo(formato=formato, workers=2) as paralelo:
+                    if formato == 'xlsx':
+                        self.assertEqual(valores(paralelo), valores(serie))
+                    else:
+                        a, b = zipfile.ZipFile(serie), zipfile.ZipFile(paralelo)
+                        self.assertEqual(b.namelist(), a.namelist())
+                        self.assertEqual([b.read(n) for n in b.namelist()], [a.read(n) for n in a.namelist()])
+
+    def test_filtro_por_meses_y_cursos(self):
+        filtro = leer_filtro({'desde': '2025-04', 'cursos': f' {self.curso_b.id},{self.curso_a.id},{self.curso_a.id}'})
+        self.assertEqual(filtro, {'desde': '2025-04', 'cursos': sorted([self.curso_a.id, self.curso_b.id])})
+
+        with generar_archivo(workers=1, filtro=filtro) as libro:
+            hojas = valores(libro)
+
+        self.assertEqual(list(hojas), ['Gráficos', '1A', '1B'])
+        self.assertEqual(hojas['1A'][1], ['ALUMNO', 'ABRIL 2025', None, None, None])
+        self.assertEqual(hojas['1A'][3], ['1A ALUMNO 00', 18, 9, 9, '=IF(B4>0,C4/B4,0)'])
+
+    def test_filtro_incremental_solo_lo_modificado(self):
+        antes = timezone.now() - timedelta(hours=1)
+        AsistenciaMensual.objects.update(actualizado=antes)
+        DiasClaseMensual.objects.update(actualizado=antes)
+        corte = antes + timedelta(minutes=30)
+        guardar_lote(self.curso_a, ABRIL, [
+            {'alumno_id': self.alumnos_a[1].id, 'presentes': 18, 'inasistentes': 0},
+        ])
+
+        filtro = leer_filtro({'modificado_desde': corte.replace(tzinfo=None).isoformat()})
+        with generar_archivo(workers=1, filtro=filtro) as libro:
+            hojas = valores(libro)
+
+        self.assertEqual(list(hojas), ['Gráficos', '1A'])
+        self.assertEqual(hojas['1A'][1][1], 'ABRIL 2025')
+        self.assertEqual([fila[2] for fila in hojas['1A'][3:5]], [9, 18])
+
+    def test_filtros_invalidos_responden_400(self):
+        cliente = self.cliente()
+        casos = [
+            ({'desde': '2025-13'}, '`desde` debe tener formato AAAA-MM.'),
+            ({'desde': '2025-05', 'hasta': '2025-03'}, '`desde` no puede ser posterior a `hasta`.'),
+            ({'cursos': '1,a'}, '`cursos` debe ser una lista de ids separados por coma.'),
+            ({'modificado_desde': 'ayer'}, '`modificado_desde` debe ser una fecha-hora ISO 8601.'),
+        ]
+        for params, error in casos:
+            with self.subTest(params=params):
+                respuesta = cliente.get(reverse('exportar_excel'), {'modo': 'directo', **params})
+                self.assertEqual(respuesta.status_code, 400)
+                self.assertEqual(respuesta.json(), {'ok': False, 'error': error})
+        self.assertFalse(Trabajo.objects.exists())
+
+    def test_etag_y_304_mientras_no_cambien_los_datos(self):
+        cliente = self.cliente()
+        url = reverse('exportar_excel')
+
+        primera = cliente.get(url, {'modo': 'directo'})
+        etag = primera['ETag']
+        b''.join(primera.streaming_content)
+        no_modificada = cliente.get(url, {'modo': 'directo'}, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(no_modificada.status_code, 304)
+        self.assertEqual(no_modificada['ETag'], etag)
+        self.assertEqual(no_modificada.content, b'')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            guardar_lote(self.curso_b, ABRIL, [{'alumno_id': self.alumnos_b[0].id, 'presentes': 1, 'inasistentes': 0}])
+        nueva = cliente.get(url, {'modo': 'directo'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(nueva.status_code, 200)
+        self.assertNotEqual(nueva['ETag'], etag)
+        b''.join(nueva.streaming_content)
+
+    def test_reutiliza_el_archivo_generado(self):
+        with mock.patch.object(cache_exportaciones, 'generar_archivo', wraps=generar_archivo) as generar:
+            archivo, clave = cache_exportaciones.abrir('zip')
+            archivo.close()
+            archivo, otra = cache_exportaciones.abrir('zip')
+            archivo.close()
+            cache_exportaciones.abrir('zip', {'cursos': [self.curso_a.id]})[0].close()
+
+        self.assertEqual(clave, otra)
+        self.assertEqual(generar.call_count, 2)
+
+    def test_desalojo_lru_por_tamano(self):
+        directorio = Path(settings.EXPORTACION_CACHE_DIR)
+        directorio.mkdir(parents=True)
+        for i, nombre in enumerate(['a.zip', 'b.zip', 'c.zip', 'd.parcial']):
+            (directorio / nombre).write_bytes(b'x' * 10)
+            os.utime(directorio / nombre, (1000 + i, 1000 + i))
+        os.utime(directorio / 'a.zip')   # usado recién: pasa a ser el más nuevo
+
+        self.assertEqual(cache_exportaciones.desalojar(max_bytes=20), 1)
+        self.assertEqual(sorted(p.name for p in directorio.iterdir()), ['a.zip', 'c.zip', 'd.parcial'])
+
+        self.assertEqual(cache_exportaciones.desalojar(max_bytes=0, conservar=directorio / 'c.zip'), 1)
+        self.assertEqual(sorted(p.name for p in directorio.iterdir()), ['c.zip', 'd.parcial'])
+
+    def test_consultas_no_crecen_con_los_cursos(self):
+        def consultas():
+            with CaptureQueriesContext(connection) as ctx, generar_archivo(workers=1):
+                pass
+            return len(ctx.captured_queries)
+
+        antes = consultas()
+        for i in range(5):
+            self.crear_curso(f"3{i}", 4)
+
+        self.assertEqual(consultas(), antes)
+
+
+class GuardarLoteTests(BaseTests):
+    def setUp(self):
+        super().setUp()
+        self.curso, self.alumnos = self.crear_curso("1A", 3)
+        self.otro_curso, self.otros = self.crear_curso("1B", 1)
+
+    def test_guarda_lote_y_devuelve_porcentajes(self):
+        a, b, _ = self.alumnos
+        cambios = [
+            {'alumno_id': a.id, 'presentes': 10, 'inasistentes': 10},
+            {'alumno_id': b.id, 'presentes': 15, 'inasistentes': 5},
+            {'alumno_id': a.id, 'presentes': 18, 'inasistentes': 2},   # repetido: gana el último
+            {'alumno_id': self.otros[0].id, 'presentes': 1, 'inasistentes': 0},  # otro curso: se ignora
+        ]
+
+        guardados, ajustados, dias, porcentajes = guardar_lote(self.curso, MARZO, cambios, dias_clases=20)
+
+        self.assertEqual((guardados, ajustados, dias), (2, 0, 20))
+        self.assertEqual(porcentajes, {a.id: 90.0, b.id: 75.0})
+        self.assertEqual(AsistenciaMensual.objects.get(alumno=a, mes=MARZO).presentes, 18)
+        self.assertFalse(AsistenciaMensual.objects.filter(alumno=self.otros[0]).exists())
+        self.assertEqual(DiasClaseMensual.objects.get(curso=self.curso, mes=MARZO).dias_clases, 20)
+
+    def test_sin_dias_usa_los_guardados(self):
+        DiasClaseMensual.objects.create(curso=self.curso, mes=MARZO, dias_clases=10)
+        cambios = [{'alumno_id': self.alumnos[0].id, 'presentes': 5, 'inasistentes': 5}]
+
+        _, ajustados, dias, porcentajes = guardar_lote(self.curso, MARZO, cambios)
+
+        self.assertEqual((ajustados, dias), (0, 10))
+        self.assertEqual(porcentajes, {self.alumnos[0].id: 50.0})
+
+    def test_cambiar_dias_rebalancea_las_demas_filas(self):
+        a, b, c = self.alumnos
+        AsistenciaMensual.objects.bulk_create([
+            AsistenciaMensual(alumno=b, curso=self.curso, mes=MARZO, presentes=22, inasistentes=0),
+            AsistenciaMensual(alumno=c, curso=self.curso, mes=MARZO, presentes=10, inasistentes=5),
+        ])
+        cambios = [{'alumno_id': a.id, 'presentes': 20, 'inasistentes': 0}]
+
+        _, ajustados, _, _ = guardar_lote(self.curso, MARZO, cambios, dias_clases=20)
+
+        self.assertEqual(ajustados, 2)
+        filas = dict(
+            (alumno_id, (p, i)) for alumno_id, p, i in
+            AsistenciaMensual.objects.filter(mes=MARZO).values_list('alumno_id', 'presentes', 'inasistentes')
+        )
+        self.assertEqual(filas, {a.id: (20, 0), b.id: (20, 0), c.id: (10, 10)})
+
+    def test_porcentajes_salen_de_las_filas_rebalanceadas(self):
+        a, b, _ = self.alumnos
+        cambios = [
+            {'alumno_id': a.id, 'presentes': 25, 'inasistentes': 0},   # más presentes que días
+            {'alumno_id': b.id, 'presentes': 8, 'inasistentes': 4},
+        ]
+
+        guardados, ajustados, _, porcentajes = guardar_lote(self.curso, MARZO, cambios, dias_clases=20)
+
+        self.assertEqual((guardados, ajustados), (2, 2))
+        self.assertEqual(porcentajes, {a.id: 100.0, b.id: 40.0})
+        self.assertEqual(AsistenciaMensual.objects.get(alumno=a, mes=MARZO).presentes, 20)
+
+    def test_un_cambio_mas_viejo_que_lo_guardado_se_ignora(self):
+        a, b, _ = self.alumnos
+        guardar_lote(self.curso, MARZO, [
+            {'alumno_id': a.id, 'presentes': 18, 'inasistentes': 2, 'seq': 200},
+        ], dias_clases=20)
+
+        # Lote anterior que llega tarde: la fila de `a` no se pisa, la de `b` sí se guarda
+        guardados, _, _, porcentajes = guardar_lote(self.curso, MARZO, [
+            {'alumno_id': a.id, 'presentes': 5, 'inasistentes': 15, 'seq': 100},
+            {'alumno_id': b.id, 'presentes': 10, 'inasistentes': 10, 'seq': 100},
+        ])
+
+        self.assertEqual(guardados, 1)
+        self.assertEqual(porcentajes, {a.id: 90.0, b.id: 50.0})
+        self.assertEqual(AsistenciaMensual.objects.get(alumno=a, mes=MARZO).presentes, 18)
+
+        guardar_lote(self.curso, MARZO, [{'alumno_id': a.id, 'presentes': 7, 'inasistentes': 13, 'seq': 300}])
+        self.assertEqual(AsistenciaMensual.objects.get(alumno=a, mes=MARZO).presentes, 7)
+
+    def test_rebalancear_solo_toca_filas_que_no_cuadran(self):
+        a, b, _ = self.alumnos
+        AsistenciaMensual.objects.bulk_create([
+            AsistenciaMensual(alumno=a, curso=self.curso, mes=MARZO, presentes=12, inasistentes=6),
+            AsistenciaMensual(alumno=b, curso=self.curso, mes=MARZO, presentes=25, inasistentes=0),
+            AsistenciaMensual(alumno=a, curso=self.curso, mes=ABRIL, presentes=1, inasistentes=1),
+        ])
+
+        self.assertEqual(rebalancear_asistencias(self.curso, MARZO, 18), 1)
+        filas = AsistenciaMensual.objects.order_by('mes', 'alumno_id').values_list('presentes', 'inasistentes')
+        self.assertEqual(list(filas), [(12, 6), (18, 0), (1, 1)])
+
+
+class ResumenesTests(BaseTests):
+    CAMPOS = (
+        'curso_id', 'mes', 'n_alumnos', 'n_registros', 'presentes_total', 'dias_clases',
+        'suma_porcentajes', 'n_perfectos', 'n_criticos',
+    )
+
+    def resumenes(self):
+        return sorted(ResumenCursoMensual.objects.values_list(*self.CAMPOS))
+
+    def test_guardar_lote_mantiene_el_resumen(self):
+        curso, (a, b, c) = self.crear_curso("2A", 3)
+        cambios = [
+            {'alumno_id': a.id, 'presentes': 20, 'inasistentes': 0},
+            {'alumno_id': b.id, 'presentes': 16, 'inasistentes': 4},
+        ]
+
+        guardar_lote(curso, MARZO, cambios, dias_clases=20)
+
+        resumen = ResumenCursoMensual.objects.get(curso=curso, mes=MARZO)
+        self.assertEqual(resumen.n_alumnos, 3)
+        self.assertEqual(resumen.n_registros, 2)
+        self.assertEqual(resumen.presentes_total, 36)
+        self.assertEqual(resumen.dias_clases, 20)
+        self.assertEqual(resumen.suma_porcentajes, 180.0)
+        self.assertEqual(resumen.n_perfectos, 1)
+        self.assertEqual(resumen.n_criticos, 2)  # 80% y el alumno sin registro
+
+    def test_mantenidos_coinciden_con_reconstruir(self):
+        curso, alumnos = self.crear_curso("2B", 4)
+        for mes, dias in ((MARZO, 20), (ABRIL, 18)):
+            cambios = [
+                {'alumno_id': alumno.id, 'presentes': dias - i, 'inasistentes': i}
+                for i, alumno in enumerate(alumnos[:3])
+            ]
+            guardar_lote(curso, mes, cambios, dias_clases=dias)
+        mantenidos = self.resumenes()
+
+        reconstruir_resumenes()
+
+        self.assertEqual(self.resumenes(), mantenidos)
+
+
+class BusquedaTests(BaseTests):
+    def setUp(self):
+        super().setUp()
+        self.curso_a = Curso.objects.create(nombre="1A")
+        self.curso_b = Curso.objects.create(nombre="1B")
+        self.alumnos = {
+            nombre: Alumno.objects.create(nombre_completo=nombre, curso=curso)
+            for nombre, curso in [
+                ("GONZALEZ PEREZ MARIA", self.curso_a),
+                ("GONZALEZ SOTO MARCO", self.curso_a),
+                ("MARTINEZ GONZALEZ ANA", self.curso_a),
+                ("PEREZ ROJAS MARIA JOSE", self.curso_b),
+            ]
+        }
+        busqueda.indexar(self.alumnos.values())
+
+    def nombres(self, queryset):
+        return sorted(queryset.values_list('nombre_completo', flat=True))
+
+    def test_filtrar_por_prefijo_de_cada_palabra(self):
+        for acotado in (False, True):
+            with self.subTest(acotado=acotado):
+                encontrados = busqueda.filtrar(Alumno.objects.all(), "  Gónz  mar ", acotado=acotado)
+                self.assertEqual(
+                    self.nombres(encontrados),
+                    ["GONZALEZ PEREZ MARIA", "GONZALEZ SOTO MARCO", "MARTINEZ GONZALEZ ANA"],
+                )
+        self.assertEqual(
+            self.nombres(busqueda.filtrar(Alumno.objects.all(), "maria perez")),
+            ["GONZALEZ PEREZ MARIA", "PEREZ ROJAS MARIA JOSE"],
+        )
+        self.assertFalse(busqueda.filtrar(Alumno.objects.all(), "ez").exists())   # solo prefijos
+        self.assertEqual(busqueda.filtrar(Alumno.objects.all(), "  ").count(), 4)
+
+    def test_indexar_reemplaza_las_palabras_al_editar(self):
+        alumno = self.alumnos["GONZALEZ SOTO MARCO"]
+        alumno.nombre_completo = "GONZALEZ SOTO MARCELO"
+        alumno.save()
+        busqueda.indexar([alumno])
+
+        self.assertEqual(self.nombres(busqueda.filtrar(Alumno.objects.all(), "marce")), ["GONZALEZ SOTO MARCELO"])
+        self.assertFalse(busqueda.filtrar(Alumno.objects.all(), "marco").exists())
+        self.assertEqual(busqueda.reindexar(), 4)
+        self.assertFalse(busqueda.filtrar(Alumno.objects.all(), "marco").exists())
+
+    def test_sugerencias(self):
+        # Sin curso: en el orden del índice (por palabra), sin repetir alumnos
+        sugeridos = busqueda.sugerencias("mar")
+        self.assertEqual(
+            [a['nombre_completo'] for a in sugeridos],
+            ["GONZALEZ SOTO MARCO", "GONZALEZ PEREZ MARIA", "PEREZ ROJAS MARIA JOSE", "MARTINEZ GONZALEZ ANA"],
+        )
+        self.assertEqual(len(busqueda.sugerencias("mar", limite=2)), 2)
+        # Con curso: ordenadas por nombre
+        self.assertEqual(
+            [a['nombre_completo'] for a in busqueda.sugerencias("mar", curso_id=self.curso_b.id)],
+            ["PEREZ ROJAS MARIA JOSE"],
+        )
+        self.assertEqual(busqueda.sugerencias(""), [])
+
+    def test_ajax_buscar_alumnos(self):
+        cliente = self.cliente()
+        url = reverse('ajax_buscar_alumnos')
+
+        respuesta = cliente.get(url, {'q': 'perez mar', 'limite': 1})
+
+        self.assertEqual(respuesta.json(), {'ok': True, 'resultados': [{
+            'id': self.alumnos["GONZALEZ PEREZ MARIA"].id, 'nombre': "GONZALEZ PEREZ MARIA",
+            'curso_id': self.curso_a.id, 'curso': "1A",
+        }]})
+        respuesta = cliente.get(url, {'q': 'maria', 'curso': self.curso_b.id})
+        self.assertEqual([r['nombre'] for r in respuesta.json()['resultados']], ["PEREZ ROJAS MARIA JOSE"])
+        self.assertEqual(cliente.get(url, {'q': 'maria', 'limite': 'diez'}).status_code, 400)
+
+
+class PaginacionTests(BaseTests):
+    def setUp(self):
+        super().setUp()
+        curso = Curso.objects.create(nombre="3A")
+        # Nombres repetidos: el cursor desempata por id
+        nombres = ["ROJAS ANA", "ARAYA LUIS", "ROJAS ANA", "DIAZ EVA", "ROJAS ANA", "BRAVO JUAN", "SOTO TOMAS"]
+        Alumno.objects.bulk_create([Alumno(nombre_completo=n, curso=curso) for n in nombres])
+        self.orden = list(Alumno.objects.order_by('nombre_completo', 'id').values_list('id', flat=True))
+
+    def test_recorre_todo_sin_repetir_ni_saltar(self):
+        vistos, cursor, paginas = [], None, 0
+        while True:
+            filas, _, cursor = paginacion.pagina(Alumno.objects.all(), despues=cursor, tamano=3)
+            vistos += [a.id for a in filas]
+            paginas += 1
+            if cursor is None:
+                break
+
+        self.assertEqual(vistos, self.orden)
+        self.assertEqual(paginas, 3)
+
+    def test_antes_devuelve_la_pagina_anterior(self):
+        primera, _, siguiente = paginacion.pagina(Alumno.objects.all(), tamano=3)
+        segunda, anterior, _ = paginacion.pagina(Alumno.objects.all(), despues=siguiente, tamano=3)
+
+        de_vuelta, anterior_de_vuelta, _ = paginacion.pagina(Alumno.objects.all(), antes=anterior, tamano=3)
+
+        self.assertEqual([a.id for a in segunda], self.orden[3:6])
+        self.assertEqual([a.id for a in de_vuelta], [a.id for a in primera])
+        self.assertIsNone(anterior_de_vuelta)
+
+    def test_cursor_invalido(self):
+        with self.assertRaises(ValueError):
+            paginacion.pagina(Alumno.objects.all(), despues='no-es-un-cursor')
+
+
+class TendenciaTests(BaseTests):
+    def setUp(self):
+        super().setUp()
+        self.a, alumnos_a = self.crear_curso("4A", 2)
+        self.b, alumnos_b = self.crear_curso("4B", 2)
+        self.vacio, _ = self.crear_curso("4C", 0)
+        guardar_lote(self.a, MARZO, [
+            {'alumno_id': alumnos_a[0].id, 'presentes': 20, 'inasistentes': 0},
+            {'alumno_id': alumnos_a[1].id, 'presentes': 10, 'inasistentes': 10},
+        ], dias_clases=20)
+        guardar_lote(self.a, ABRIL, [{'alumno_id': alumnos_a[0].id, 'presentes': 9, 'inasistentes': 9}], dias_clases=18)
+        guardar_lote(self.b, ABRIL, [{'alumno_id': alumnos_b[1].id, 'presentes': 18, 'inasistentes': 0}], dias_clases=18)
+
+    def test_coincide_con_estadisticas_mes(self):
+        respuesta = self.cliente().get(reverse('ajax_tendencia'), {'desde': '2025-03', 'hasta': '2025-05'})
+
+        datos = respuesta.json()
+        self.assertTrue(datos['ok'])
+        self.assertEqual(datos['meses'], ['2025-03', '2025-04', '2025-05'])
+        self.assertEqual(datos['cursos'], ['4A', '4B', '4C'])
+        for j, mes in enumerate((MARZO, ABRIL, date(2025, 5, 1))):
+            for fila in estadisticas_mes(mes):
+                valor = datos['porcentajes'][datos['curso_ids'].index(fila['curso_id'])][j]
+                # null en la tendencia = mes sin días o sin alumnos (0.0 en estadisticas_mes)
+                self.assertEqual(valor if valor is not None else 0.0, fila['porcentaje'])
+        self.assertEqual(datos['porcentajes'][0][:2], [75.0, 25.0])
+        self.assertIsNone(datos['porcentajes'][1][0])
+
+    def test_rango_invalido(self):
+        cliente = self.cliente()
+        for params in ({'desde': '2025-05', 'hasta': '2025-03'}, {'desde': '2020-01', 'hasta': '2025-03'}, {'desde': 'x'}):
+            with self.subTest(params=params):
+                respuesta = cliente.get(reverse('ajax_tendencia'), params)
+                self.assertEqual(respuesta.status_code, 400)
+                self.assertFalse(respuesta.json()['ok'])
+
+
+class CacheEstadisticasTests(BaseTests):
+    def test_aciertos_y_fallos(self):
+        calculos = []
+
+        def calcular():
+            calculos.append(1)
+            return ['valor']
+
+        cache_estadisticas.obtener('estadisticas_mes', MARZO, calcular)
+        cache_estadisticas.obtener('estadisticas_mes', MARZO, calcular)
+        cache_estadisticas.obtener('estadisticas_mes', ABRIL, calcular)
+
+        self.assertEqual(len(calculos), 2)
+        self.assertEqual(cache_estadisticas.contadores(), {'hits': 1, 'misses': 2, 'ratio': 0.333})
+
+    def test_invalidar_mes_solo_afecta_ese_mes(self):
+        cache_estadisticas.obtener('estadisticas_mes', MARZO, lambda: 'marzo')
+        cache_estadisticas.obtener('estadisticas_mes', ABRIL, lambda: 'abril')
+
+        cache_estadisticas.invalidar_mes(MARZO)
+
+        self.assertEqual(cache_estadisticas.obtener('estadisticas_mes', MARZO, lambda: 'nuevo'), 'nuevo')
+        self.assertEqual(cache_estadisticas.obtener('estadisticas_mes', ABRIL, lambda: 'nuevo'), 'abril')
+
+    def test_invalidar_todo(self):
+        cache_estadisticas.obtener('dashboard', MARZO, lambda: 'viejo')
+        cache_estadisticas.obtener_global('matricula', lambda: 'viejo')
+
+        cache_estadisticas.invalidar_todo()
+
+        self.assertEqual(cache_estadisticas.obtener('dashboard', MARZO, lambda: 'nuevo'), 'nuevo')
+        self.assertEqual(cache_estadisticas.obtener_global('matricula', lambda: 'nuevo'), 'nuevo')
+
+    def test_guardar_asistencia_invalida_la_vista(self):
+        curso, (alumno,) = self.crear_curso("5A", 1)
+        guardar_lote(curso, MARZO, [{'alumno_id': alumno.id, 'presentes': 10, 'inasistentes': 10}], dias_clases=20)
+        cliente = self.cliente()
+        url = reverse('ajax_estadisticas_mes')
+        self.assertEqual(cliente.get(url, {'mes': '2025-03'}).json()['cursos'][0]['porcentaje'], 50.0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            guardar_lote(curso, MARZO, [{'alumno_id': alumno.id, 'presentes': 15, 'inasistentes': 5}])
+
+        self.assertEqual(cliente.get(url, {'mes': '2025-03'}).json()['cursos'][0]['porcentaje'], 75.0)
+
+    def test_invalida_y_sube_la_version_al_confirmar(self):
+        curso, (alumno,) = self.crear_curso("5B", 1)
+        version = versiones.version_actual()
+
+        with self.captureOnCommitCallbacks() as al_confirmar:
+            guardar_lote(curso, MARZO, [{'alumno_id': alumno.id, 'presentes': 10, 'inasistentes': 10}], dias_clases=20)
+            # Otra petición lee antes del commit y cachea lo que ve en ese momento
+            cache_estadisticas.obtener('estadisticas_mes', MARZO, lambda: 'previo al commit')
+            self.assertEqual(versiones.version_actual(), version)
+        for funcion in al_confirmar:
+            funcion()
+
+        self.assertEqual(cache_estadisticas.obtener('estadisticas_mes', MARZO, lambda: 'nuevo'), 'nuevo')
+        self.assertEqual(versiones.version_actual(), version + 1)
+
+
+class EventosTests(BaseTests):
+    def setUp(self):
+        super().setUp()
+        self.curso, self.alumnos = self.crear_curso("1A", 2)
+        self.usuario = get_user_model().objects.create_user('docente', password='x')
+        self.url = reverse('sse_estadisticas_mes')
+        # El cliente de pruebas no cierra el generador del flujo (bajo ASGI sí se cierra al
+        # desconectarse): que no queden suscriptores de un loop ya cerrado para el próximo test
+        self.addCleanup(eventos._suscriptores.clear)
+
+    async def abrir_flujo(self):
+        cliente = AsyncClient()
+        await cliente.aforce_login(self.usuario)
+        respuesta = await cliente.get(self.url, {'mes': '2025-03'})
+        self.assertEqual(respuesta['Content-Type'], 'text/event-stream')
+        flujo = respuesta.streaming_content
+        self.assertEqual(await anext(flujo), b'retry: 5000\n\n')
+        return flujo
+
+    def test_bajo_wsgi_responde_204(self):
+        self.client.force_login(self.usuario)
+
+        self.assertEqual(self.client.get(self.url, {'mes': '2025-03'}).status_code, 204)
+
+    async def test_mes_invalido(self):
+        cliente = AsyncClient()
+        await cliente.aforce_login(self.usuario)
+
+        self.assertEqual((await cliente.get(self.url, {'mes': 'marzo'})).status_code, 400)
+
+    async def test_empuja_el_cambio_al_confirmar(self):
+        flujo = await self.abrir_flujo()
+        canal = eventos.canal_mes(MARZO)
+        self.assertTrue(eventos.hay_suscriptores(canal))
+
+        def escribir():
+            with self.captureOnCommitCallbacks(execute=True):
+                guardar_lote(self.curso, MARZO, [
+                    {'alumno_id': self.alumnos[0].id, 'presentes': 15, 'inasistentes': 5},
+                ], dias_clases=20)
+        await sync_to_async(escribir)()
+
+        evento = (await anext(flujo)).decode()
+        self.assertTrue(evento.startswith('event: curso\ndata: '))
+        self.assertEqual(json.loads(evento.split('data: ', 1)[1]), {
+            'curso_id': self.curso.id, 'porcentaje': 37.5, 'alumnos': 2, 'presentes_total': 15, 'dias_clases': 20,
+        })
+        await flujo.aclose()
+
+    async def test_sin_eventos_revisa_la_version(self):
+        with mock.patch.object(views, 'INTERVALO_SSE', 0.05):
+            flujo = await self.abrir_flujo()
+            self.assertEqual(await anext(flujo), b': ping\n\n')
+
+            # Escritura de otro proceso: no pasa por `eventos`, solo sube la versión
+            def escribir_en_otro_proceso():
+                with mock.patch.object(eventos, 'hay_suscriptores', return_value=False), \
+                        self.captureOnCommitCallbacks(execute=True):
+                    guardar_lote(self.curso, MARZO, [
+                        {'alumno_id': self.alumnos[1].id, 'presentes': 20, 'inasistentes': 0},
+                    ], dias_clases=20)
+            await sync_to_async(escribir_en_otro_proceso)()
+
+            evento = (await anext(flujo)).decode()
+            await flujo.aclose()
+        datos = json.loads(evento.split('data: ', 1)[1])
+        self.assertEqual((datos['curso_id'], datos['presentes_total'], datos['porcentaje']), (self.curso.id, 20, 50.0))
+
+
+class PresupuestoConsultasTests(BaseTests):
+    def setUp(self):
+        super().setUp()
+        self.crear_curso("6A", 3)
+        perfilado.reiniciar()
+
+    @override_settings(PERFILADO_ESTRICTO=True, PERFILADO_PRESUPUESTOS={'lista_alumnos': 1})
+    def test_modo_estricto_falla_al_exceder(self):
+        with self.assertRaisesMessage(perfilado.PresupuestoExcedido, 'lista_alumnos'):
+            self.cliente().get(reverse('lista_alumnos'))
+
+    @override_settings(PERFILADO_ESTRICTO=True)
+    def test_vistas_dentro_del_presupuesto(self):
+        cliente = self.cliente()
+        for nombre in ('lista_alumnos', 'dashboard', 'ajax_lista_alumnos', 'ajax_tendencia'):
+            with self.subTest(vista=nombre):
+                respuesta = cliente.get(reverse(nombre))
+                self.assertEqual(respuesta.status_code, 200)
+                self.assertIn('db;dur=', respuesta['Server-Timing'])
+
+
+class PragmasSqliteTests(SimpleTestCase):
+    # Mismo perfil que settings_produccion (importarlo modificaría DATABASES en esta sesión)
+    PRODUCCION = {
+        'journal_mode': 'WAL', 'synchronous': 'NORMAL', 'busy_timeout': 20000,
+        'cache_size': -65536, 'mmap_size': 268435456, 'temp_store': 'MEMORY',
+    }
+
+    def setUp(self):
+        temporal = Path(tempfile.mkdtemp(prefix='tests_pragmas_'))
+        self.addCleanup(shutil.rmtree, temporal, ignore_errors=True)
+        self.archivo = temporal / 'base.sqlite3'
+
+    def conectar(self, nombre=None, **opciones):
+        conexion = DatabaseWrapper({
+            **connections['default'].settings_dict, 'NAME': nombre or str(self.archivo), 'OPTIONS': opciones,
+        }, alias='pragmas')
+        self.addCleanup(conexion.close)
+        return conexion
+
+    def leer(self, conexion, *nombres):
+        with conexion.cursor() as cursor:
+            return [cursor.execute(f"PRAGMA {n}").fetchone()[0] for n in nombres]
+
+    def test_perfil_de_produccion(self):
+        with self.settings(SQLITE_PRAGMAS=self.PRODUCCION):
+            conexion = self.conectar()
+            valores = self.leer(conexion, 'journal_mode', 'synchronous', 'busy_timeout', 'cache_size', 'temp_store')
+
+        self.assertEqual(valores, ['wal', 1, 20000, -65536, 2])
+
+    def test_sin_pragmas_no_cambia_nada(self):
+        with self.settings(SQLITE_PRAGMAS={}):
+            self.assertEqual(self.leer(self.conectar(), 'journal_mode'), ['delete'])
+
+    def test_copia_de_solo_lectura_se_salta(self):
+        self.leer(self.conectar(), 'user_version')   # crea el archivo
+        with self.settings(SQLITE_PRAGMAS={'journal_mode': 'WAL', 'cache_size': -1024}):
+            conexion = self.conectar(f'file:{self.archivo}?mode=ro', uri=True)
+            modo, cache_size = self.leer(conexion, 'journal_mode', 'cache_size')
+        self.assertEqual(modo, 'delete')
+        self.assertNotEqual(cache_size, -1024)
+
+    def test_rechaza_pragmas_invalidos(self):
+        for pragmas in ({'journal_mode': 'WAL; DROP TABLE x'}, {'Journal Mode': 'WAL'}):
+            with self.subTest(pragmas=pragmas), self.settings(SQLITE_PRAGMAS=pragmas):
+                with self.assertRaisesMessage(ValueError, 'PRAGMA inválido en SQLITE_PRAGMAS'):
+                    self.conectar().ensure_connection()
+
+
+@override_settings(
+    CACHES=CACHE_TESTS,
+    DATABASE_ROUTERS=['alumnos.routers.ReportesRouter'],
+    MIDDLEWARE=[*settings.MIDDLEWARE, 'alumnos.routers.ReportesMiddleware'],
+)
+class CopiaReportesTests(TransactionTestCase):
+    """Con el alias `reporting` apuntando a una copia (snapshot) de la base de pruebas."""
+    @classmethod
+    def setUpClass(cls):
+        # El alias se agrega recién acá (el runner no debe crearlo) y antes de que
+        # TransactionTestCase valide `databases`; como espejo de default no se vacía
+        cls.databases = {'default', routers.ALIAS}
+        cls.temporal = Path(tempfile.mkdtemp(prefix='tests_reportes_'))
+        cls.copia = cls.temporal / 'copia.sqlite3'
+        connections.settings[routers.ALIAS] = connections.configure_settings({
+            'default': dict(connections.settings['default']),
+            routers.ALIAS: {
+                'ENGINE': 'django.db.backends.sqlite3',
+                'NAME': f'file:{cls.copia}?mode=ro&immutable=1',
+                'OPTIONS': {'uri': True},
+                'TEST': {'MIRROR': 'default'},
+            },
+        })[routers.ALIAS]
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections.close_all()
+        connections.settings.pop(routers.ALIAS)
+        shutil.rmtree(cls.temporal, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.copia.unlink(missing_ok=True)
+        usuario = get_user_model().objects.create_user('docente', password='x')
+        self.client.force_login(usuario)
+
+    def cursos_del_reporte(self):
+        respuesta = self.client.get(reverse('ajax_estadisticas_mes'), {'mes': '2025-03'})
+        return [c['curso'] for c in respuesta.json()['cursos']]
+
+    def test_lee_de_la_copia_salvo_tras_escribir(self):
+        Curso.objects.create(nombre="1A")
+        snapshot(self.copia)
+        curso_b = Curso.objects.create(nombre="1B")   # después del snapshot, sin pasar por una vista
+        alumno = Alumno.objects.create(nombre_completo="ROJAS ANA", curso=curso_b)
+
+        self.assertEqual(self.cursos_del_reporte(), ["1A"])
+
+        # Esta sesión escribe: hasta que la copia llegue a su versión, lee de default
+        respuesta = self.client.post(reverse('ajax_guardar_lote'), {
+            'curso_id': curso_b.id, 'mes': '2025-03',
+            'cambios': [{'alumno_id': alumno.id, 'presentes': 1, 'inasistentes': 0}],
+        }, content_type='application/json')
+        self.assertTrue(respuesta.json()['ok'])
+        self.assertEqual(self.client.session[routers.CLAVE_SESION], versiones.version_actual())
+        self.assertEqual(self.cursos_del_reporte(), ["1A", "1B"])
+
+        snapshot(self.copia)
+        Curso.objects.create(nombre="1C")
+        self.assertEqual(self.cursos_del_reporte(), ["1A", "1B"])
+
+    def test_sin_copia_lee_de_default(self):
+        Curso.objects.create(nombre="1A")   # no hay snapshot: la copia no se puede abrir
+
+        self.assertEqual(self.cursos_del_reporte(), ["1A"])
+        self.assertIsNone(routers._alias_para(None))
+
+    def test_cola_de_trabajos_no_se_lee_de_la_copia(self):
+        snapshot(self.copia)  # sin trabajos
+        url = reverse('exportar_excel')
+
+        primero = self.client.get(url, HTTP_ACCEPT='application/json').json()['trabajo_id']
+        segundo = self.client.get(url, HTTP_ACCEPT='application/json').json()['trabajo_id']
+
+        self.assertEqual(primero, segundo)
+        self.assertEqual(Trabajo.objects.count(), 1)
+        self.assertIsNone(routers.ReportesRouter().db_for_read(Trabajo))
@@ -0,0 +1,133 @@
+# alumnos/trabajos.py
+from datetime import datetime, timedelta
+
+from django.conf import settings
+
+from django.core.files import File
+from django.utils import timezone
+
+from . import cache_exportaciones
+from .exportacion import FORMATOS
+from .importacion import importar_bloques
+from .lectura import leer_bloques
+from .models import Trabajo
+
+
+def encolar_importacion(archivo):
+    """Guarda el archivo subido y deja el trabajo pendiente para el worker."""
+    return Trabajo.objects.create(tipo=Trabajo.IMPORTACION, archivo_entrada=archivo)
+
+
+def encolar_exportacion(parametros=None):
+    """
+    Encola la exportación, o devuelve la que ya está pendiente o en curso con los mismos
+    parámetros (recargar la página o volver atrás no encola otra).
+    """
+    parametros = parametros or {}
+    activas = Trabajo.objects.filter(
+        tipo=Trabajo.EXPORTACION, estado__in=(Trabajo.PENDIENTE, Trabajo.EN_CURSO),
+    ).order_by('id')
+    for trabajo in activas:
+        propios = {k: v for k, v in trabajo.parametros.items() if k != 'reintentos'}
+        if propios == parametros:
+            return trabajo
+    return Trabajo.objects.create(tipo=Trabajo.EXPORTACION, parametros=parametros)
+
+
+def tomar_siguiente():
+    """
+    Reserva el trabajo pendiente más antiguo.
+    El UPDATE condicionado al estado evita que dos workers tomen el mismo.
+    """
+    while True:
+        trabajo = Trabajo.objects.filter(estado=Trabajo.PENDIENTE).order_by('id').first()
+        if trabajo is None:
+            return None
+        reservado = (
+            Trabajo.objects
+            .filter(pk=trabajo.pk, estado=Trabajo.PENDIENTE)
+            .update(estado=Trabajo.EN_CURSO, actualizado=timezone.now())
+        )
+        if reservado:
+            trabajo.estado = Trabajo.EN_CURSO
+            return trabajo
+
+
+def recuperar_colgados():
+    """
+    Trabajos EN_CURSO sin avance desde hace TRABAJOS_COLGADO_MINUTOS: el worker que los
+    tenía murió a mitad de camino. Vuelven a la cola una vez (importar y exportar se
+    pueden repetir sin duplicar); si ya se habían reintentado, quedan en ERROR para que
+    un archivo que tumba al worker no lo haga en cada arranque.
+    Devuelve (reencolados, fallidos).
+    """
+    limite = timezone.now() - timedelta(minutes=getattr(settings, 'TRABAJOS_COLGADO_MINUTOS', 10))
+    reencolados = fallidos = 0
+    for trabajo in Trabajo.objects.filter(estado=Trabajo.EN_CURSO, actualizado__lt=limite):
+        colgado = Trabajo.objects.filter(pk=trabajo.pk, estado=Trabajo.EN_CURSO, actualizado__lt=limite)
+        if trabajo.parametros.get('reintentos', 0) >= 1:
+            fallidos += colgado.update(
+                estado=Trabajo.ERROR, error='El proceso se interrumpió y el reintento tampoco terminó.',
+                actualizado=timezone.now(),
+            )
+        else:
+            reencolados += colgado.update(
+                estado=Trabajo.PENDIENTE, progreso=0, actualizado=timezone.now(),
+                parametros={**trabajo.parametros, 'reintentos': 1},
+            )
+    return reencolados, fallidos
+
+
+def _avance(trabajo, progreso, total=None):
+    # `actualizado` a mano: update() no pasa por auto_now y es lo que mira `recuperar_colgados`
+    campos = {'progreso': progreso, 'actualizado': timezone.now()}
+    if total is not None:
+        campos['total'] = total
+    Trabajo.objects.filter(pk=trabajo.pk).update(**campos)
+
+
+def _ejecutar_importacion(trabajo):
+    with trabajo.archivo_entrada.open('rb') as archivo:
+        resultado = importar_bloques(
+            leer_bloques(archivo),
+            al_avanzar=lambda filas: _avance(trabajo, filas),
+        )
+    trabajo.archivo_entrada.delete(save=False)
+    return resultado
+
+
+def _ejecutar_exportacion(trabajo):
+    formato = trabajo.parametros.get('formato', 'xlsx')
+    extension = FORMATOS[formato][1]
+    filename = f"asistencia_export_{datetime.now().strftime('%Y%m%d_%H%M')}.{extension}"
+    # Lo modificado desde este instante entra en la próxima exportación incremental
+    corte = timezone.now()
+    archivo, _ = cache_exportaciones.abrir(
+        formato,
+        trabajo.parametros.get('filtro'),
+        al_avanzar=lambda hechos, total: _avance(trabajo, hechos, total),
+    )
+    with archivo:
+        trabajo.archivo_resultado.save(filename, File(archivo), save=False)
+    return {'archivo': filename, 'corte': corte.isoformat()}
+
+
+EJECUTORES = {
+    Trabajo.IMPORTACION: _ejecutar_importacion,
+    Trabajo.EXPORTACION: _ejecutar_exportacion,
+}
+
+
+def ejecutar(trabajo):
+    """Ejecuta un trabajo ya reservado y deja registrado el resultado o el error."""
+    try:
+        trabajo.resultado = EJECUTORES[trabajo.tipo](trabajo)
+        trabajo.estado = Trabajo.TERMINADO
+    except Exception as e:
+        trabajo.estado = Trabajo.ERROR
+        trabajo.error = str(e)
+    # progreso/total ya se escribieron con UPDATE durante la ejecución
+    trabajo.save(update_fields=[
+        'estado', 'resultado', 'error', 'archivo_entrada', 'archivo_resultado', 'actualizado',
+    ])
+    return trabajo
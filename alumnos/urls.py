@@ -10,10 +10,19 @@ urlpatterns = [
     path('asistencia_mensual/', views.asistencia_mensual, name='asistencia_mensual'),
     path('ajax/actualizar_asistencia/', ajax_actualizar_asistencia, name='ajax_actualizar_asistencia'),
     path('ajax/actualizar_dias_clases/', ajax_actualizar_dias_clases, name='ajax_actualizar_dias_clases'),
+    path('ajax/guardar_lote/', views.ajax_guardar_lote, name='ajax_guardar_lote'),
     path('estadisticas/', estadisticas, name='estadisticas'),
     path('ajax/estadisticas_mes/', ajax_estadisticas_mes, name='ajax_estadisticas_mes'),
+    path('ajax/tendencia/', views.ajax_tendencia, name='ajax_tendencia'),
+    path('sse/estadisticas_mes/', views.sse_estadisticas_mes, name='sse_estadisticas_mes'),
+    path('ajax/cache_estadisticas/', views.ajax_cache_estadisticas, name='ajax_cache_estadisticas'),
+    path('ajax/metricas/', views.ajax_metricas, name='ajax_metricas'),
+    path('ajax/buscar_alumnos/', views.ajax_buscar_alumnos, name='ajax_buscar_alumnos'),
+    path('ajax/alumnos/', views.ajax_lista_alumnos, name='ajax_lista_alumnos'),
     path('reporte_cursos/', reporte_cursos_mes, name='reporte_cursos_mes'),
     path('exportar_excel/', views.exportar_excel, name='exportar_excel'),
+    path('ajax/trabajo/<int:trabajo_id>/', views.ajax_estado_trabajo, name='ajax_estado_trabajo'),
+    path('trabajo/<int:trabajo_id>/descargar/', views.descargar_trabajo, name='descargar_trabajo'),
     
 
 
@@ -0,0 +1,47 @@
+# alumnos/versiones.py
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import transaction
+from django.db.models import F
+
+from .models import VersionDatos
+
+
+_observador = ContextVar('observador_cambios', default=None)
+
+
+def version_actual(using=None):
+    return VersionDatos.objects.using(using).filter(pk=1).values_list('version', flat=True).first() or 0
+
+
+async def aversion_actual(using=None):
+    return await VersionDatos.objects.using(using).filter(pk=1).values_list('version', flat=True).afirst() or 0
+
+
+def incrementar():
+    """
+    Marca que los datos cambiaron. Un solo UPDATE atómico, válido con varios procesos.
+    Dentro de una transacción se aplica al confirmarla: quien vea la versión nueva
+    (caché de exportaciones, lecturas tras escritura) ya ve los datos nuevos.
+    """
+    transaction.on_commit(_incrementar)
+
+
+def _incrementar():
+    if not VersionDatos.objects.filter(pk=1).update(version=F('version') + 1):
+        VersionDatos.objects.get_or_create(pk=1, defaults={'version': 1})
+    marca = _observador.get()
+    if marca is not None:
+        marca['cambio'] = True
+
+
+@contextmanager
+def observar():
+    """Dentro del bloque, la marca devuelta queda con 'cambio' = True si se llamó a `incrementar`."""
+    marca = {'cambio': False}
+    token = _observador.set(marca)
+    try:
+        yield marca
+    finally:
+        _observador.reset(token)
@@ -1,78 +1,73 @@
 # alumnos/views.py
-import pandas as pd
-import unicodedata
+import asyncio
+import json
 from django.shortcuts import render, redirect
-from .models import Alumno, Curso, AsistenciaMensual, DiasClaseMensual
+from .models import Alumno, Curso, AsistenciaMensual, DiasClaseMensual, Trabajo
+from .trabajos import encolar_importacion, encolar_exportacion
+from .exportacion import leer_filtro, FORMATOS
+from .estadisticas import (
+    promedios_por_curso, aestadisticas_mes, resumenes_del_mes,
+    matricula_por_curso, matricula_cacheada, amatricula_cacheada,
+    atendencia, MAX_MESES_TENDENCIA,
+)
+from .resumenes import actualizar_resumen, actualizar_resumenes_curso
+from .asistencia import guardar_lote, rebalancear_asistencias, MAX_CAMBIOS_LOTE
+from . import busqueda, cache_estadisticas, cache_exportaciones, eventos, paginacion, perfilado, versiones
+from .routers import lee_de_reportes, corte as corte_datos
+from .normalizacion import normalizar, construir_nombre_completo
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.views.decorators.csrf import csrf_protect
 from datetime import datetime
 from django.urls import reverse
+from django.utils import timezone
 from django.http import JsonResponse
-from django.db.models import Sum
 from django.views.decorators.http import require_GET
 
 
-import io
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.utils.http import parse_etags
+from django.shortcuts import get_object_or_404
 from collections import defaultdict
-from django.http import HttpResponse
-from openpyxl import Workbook
-from openpyxl.styles import Alignment, Font, PatternFill, Border, Side, NamedStyle
-from openpyxl.chart import BarChart, Reference
-from openpyxl.utils import get_column_letter
 
 
 
 
 
-def normalizar(texto):
-    if pd.isna(texto):
-        return ""
-    texto = str(texto).strip().upper()
-    texto = ''.join(c for c in unicodedata.normalize('NFKD', texto) if not unicodedata.combining(c))
-    return texto
+def _quiere_json(request):
+    return (
+        request.headers.get('x-requested-with') == 'XMLHttpRequest'
+        or 'application/json' in request.headers.get('accept', '')
+    )
+
 
+@login_required
 @csrf_protect
 def cargar_excel(request):
     if request.method == 'POST':
         if 'eliminar_bd' in request.POST:
             Alumno.objects.all().delete()
             Curso.objects.all().delete()
+            cache_estadisticas.invalidar_todo()
+            versiones.incrementar()
             messages.success(request, "✅ Se eliminó toda la base de datos correctamente.")
             return redirect('cargar_excel')
 
         archivo = request.FILES.get('excel_file')
         if archivo:
-            df = pd.read_excel(archivo)
-            df = df[df['Fecha Retiro'] == pd.to_datetime('1900-01-01')]
-
-            for _, fila in df.iterrows():
-                nombre = normalizar(fila['Nombres'])
-                apellido_paterno = normalizar(fila['Apellido Paterno'])
-                apellido_materno = normalizar(fila['Apellido Materno'])
-                nombre_completo = f"{apellido_paterno} {apellido_materno} {nombre}".strip()
-
-                desc_grado = normalizar(fila['Desc Grado'])
-                letra_curso = normalizar(fila['Letra Curso'])
-                nombre_curso = f"{desc_grado} {letra_curso}".strip()
-
-                curso, _ = Curso.objects.get_or_create(nombre=nombre_curso)
-                Alumno.objects.get_or_create(nombre_completo=nombre_completo, curso=curso)
-
-            messages.success(request, "✅ Archivo Excel cargado exitosamente.")
-            return redirect('lista_alumnos')
-
-    return render(request, 'alumnos/cargar_excel.html')
-
-
-def _to_upper_clean(s: str) -> str:
-    return " ".join((s or "").strip().upper().split())
+            trabajo = encolar_importacion(archivo)
+            if _quiere_json(request):
+                return JsonResponse({'ok': True, 'trabajo_id': trabajo.id})
+            return redirect(f"{reverse('cargar_excel')}?trabajo={trabajo.id}")
+
+    trabajo_id = request.GET.get('trabajo', '')
+    trabajo = (
+        Trabajo.objects.filter(id=trabajo_id, tipo=Trabajo.IMPORTACION).first()
+        if trabajo_id.isdigit() else None
+    )
+    return render(request, 'alumnos/cargar_excel.html', {'trabajo': trabajo})
 
-def _build_nombre_completo(ap_paterno: str, ap_materno: str, nombres: str) -> str:
-    ap_paterno = _to_upper_clean(ap_paterno)
-    ap_materno = _to_upper_clean(ap_materno)
-    nombres = _to_upper_clean(nombres)
-    return " ".join([p for p in [ap_paterno, ap_materno, nombres] if p])
 
 @login_required
 def lista_alumnos(request):
@@ -83,7 +78,7 @@ def lista_alumnos(request):
     if not curso_filtrado and cursos.exists():
         curso_filtrado = cursos.first().nombre
 
-    nombre_filtrado = (request.GET.get('nombre') or '').strip().upper()
+    nombre_filtrado = normalizar(request.GET.get('nombre'))
 
     # Acciones (todo POST se maneja aquí)
     if request.method == 'POST':
@@ -97,7 +92,7 @@ def lista_alumnos(request):
             ap_paterno = request.POST.get('ap_paterno', '')
             ap_materno = request.POST.get('ap_materno', '')
             nombres = request.POST.get('nombres', '')
-            nombre_completo = _build_nombre_completo(ap_paterno, ap_materno, nombres)
+            nombre_completo = construir_nombre_completo(ap_paterno, ap_materno, nombres)
 
             if not curso_id or not nombre_completo:
                 messages.error(request, "Completa todos los campos para agregar el estudiante.")
@@ -109,7 +104,9 @@ def lista_alumnos(request):
                 messages.error(request, "El curso seleccionado no existe.")
                 return redirect(reverse('lista_alumnos') + q_params)
 
-            Alumno.objects.create(nombre_completo=nombre_completo, curso=curso)
+            alumno = Alumno.objects.create(nombre_completo=nombre_completo, curso=curso)
+            busqueda.indexar([alumno])
+            actualizar_resumenes_curso(curso.id)
             messages.success(request, f"Alumno agregado: {nombre_completo}")
             return redirect(reverse('lista_alumnos') + q_params)
 
@@ -119,7 +116,7 @@ def lista_alumnos(request):
             ap_paterno = request.POST.get('ap_paterno', '')
             ap_materno = request.POST.get('ap_materno', '')
             nombres = request.POST.get('nombres', '')
-            nombre_completo = _build_nombre_completo(ap_paterno, ap_materno, nombres)
+            nombre_completo = construir_nombre_completo(ap_paterno, ap_materno, nombres)
 
             if not alumno_id or not curso_id or not nombre_completo:
                 messages.error(request, "Completa todos los campos para editar el estudiante.")
@@ -132,9 +129,16 @@ def lista_alumnos(request):
                 messages.error(request, "Alumno o curso no encontrado.")
                 return redirect(reverse('lista_alumnos') + q_params)
 
+            curso_anterior_id = alumno.curso_id
             alumno.nombre_completo = nombre_completo
             alumno.curso = curso
             alumno.save()
+            busqueda.indexar([alumno])
+            if curso_anterior_id != curso.id:
+                actualizar_resumenes_curso(curso_anterior_id)
+                actualizar_resumenes_curso(curso.id)
+            else:
+                versiones.incrementar()  # solo cambió el nombre: los totales siguen igual
             messages.success(request, f"Alumno actualizado: {nombre_completo}")
             return redirect(reverse('lista_alumnos') + q_params)
 
@@ -143,7 +147,9 @@ def lista_alumnos(request):
             try:
                 alumno = Alumno.objects.get(id=alumno_id)
                 nombre = alumno.nombre_completo
+                curso_id = alumno.curso_id
                 alumno.delete()
+                actualizar_resumenes_curso(curso_id)
                 messages.success(request, f"Alumno eliminado: {nombre}")
             except Alumno.DoesNotExist:
                 messages.error(request, "Alumno no encontrado.")
@@ -158,15 +164,37 @@ def lista_alumnos(request):
     if curso_filtrado:
         alumnos = alumnos.filter(curso__nombre=curso_filtrado)
     if nombre_filtrado:
-        alumnos = alumnos.filter(nombre_completo__icontains=nombre_filtrado)
+        # Prefijo por palabra, con índice (ver busqueda.filtrar)
+        alumnos = busqueda.filtrar(alumnos, nombre_filtrado, acotado=bool(curso_filtrado))
 
-    alumnos = alumnos.select_related('curso').order_by('nombre_completo')
+    try:
+        alumnos, cursor_anterior, cursor_siguiente = paginacion.pagina(
+            alumnos.select_related('curso'),
+            despues=request.GET.get('despues'),
+            antes=request.GET.get('antes'),
+        )
+    except ValueError:
+        messages.error(request, "El enlace de la página no es válido; se muestra el inicio.")
+        alumnos, cursor_anterior, cursor_siguiente = paginacion.pagina(alumnos.select_related('curso'))
+
+    # Total desde la matrícula cacheada (sin COUNT por página); con búsqueda por nombre no se conoce
+    total = None
+    if not nombre_filtrado:
+        matricula = matricula_cacheada()
+        if curso_filtrado:
+            curso_id = next((c.id for c in cursos if c.nombre == curso_filtrado), None)
+            total = matricula.get(curso_id, 0)
+        else:
+            total = sum(matricula.values())
 
     return render(request, 'alumnos/lista_alumnos.html', {
         'alumnos': alumnos,
         'cursos': cursos,
         'curso_filtrado': curso_filtrado,
         'nombre_filtrado': nombre_filtrado,
+        'total': total,
+        'cursor_anterior': cursor_anterior,
+        'cursor_siguiente': cursor_siguiente,
     })
 
 
@@ -184,27 +212,14 @@ def dashboard(request):
     mes_date = datetime.strptime(mes_str, '%Y-%m').date().replace(day=1)
     umbral_critico = 85  # % mínimo deseado
 
-    resumen_cursos = []
-
-    for curso in cursos:
-        alumnos = Alumno.objects.filter(curso=curso)
-        total_porcentaje = 0
-        total_validos = 0
-
-        for alumno in alumnos:
-            asistencia = AsistenciaMensual.objects.filter(alumno=alumno, mes=mes_date).first()
-            dias = DiasClaseMensual.objects.filter(curso=curso, mes=mes_date).first()
-            dias_total = dias.dias_clases if dias else 0
-            if asistencia and dias_total:
-                porcentaje = round((asistencia.presentes / dias_total) * 100, 1)
-                total_porcentaje += porcentaje
-                total_validos += 1
-
-        promedio = round(total_porcentaje / total_validos, 1) if total_validos else 0
-        resumen_cursos.append({
-            'curso': curso,
-            'promedio': promedio,
-        })
+    def calcular_resumen():
+        promedios = promedios_por_curso(mes_date)
+        return [
+            {'curso': curso, 'promedio': promedios.get(curso.id, 0)}
+            for curso in cursos
+        ]
+
+    resumen_cursos = cache_estadisticas.obtener('dashboard', mes_date, calcular_resumen)
 
     mejores_cursos = sorted(resumen_cursos, key=lambda x: x['promedio'], reverse=True)[:3]
     cursos_criticos = [rc for rc in resumen_cursos if rc['promedio'] < umbral_critico]
@@ -232,39 +247,24 @@ def asistencia_mensual(request):
     alumnos = Alumno.objects.filter(curso=curso).order_by('nombre_completo') if curso else []
 
     if request.method == 'POST' and curso:
-        for alumno in alumnos:
-            presentes = int(request.POST.get(f'presentes_{alumno.id}', 0) or 0)
-            inasistentes = int(request.POST.get(f'inasistentes_{alumno.id}', 0) or 0)
-
-            asistencia, _ = AsistenciaMensual.objects.get_or_create(
-                alumno=alumno,
-                mes=mes_date,
-                defaults={'curso': curso}
-            )
-            asistencia.presentes = presentes
-            asistencia.inasistentes = inasistentes
-            asistencia.curso = curso
-            asistencia.save()
-
+        cambios = [
+            {
+                'alumno_id': alumno.id,
+                'presentes': int(request.POST.get(f'presentes_{alumno.id}', 0) or 0),
+                'inasistentes': int(request.POST.get(f'inasistentes_{alumno.id}', 0) or 0),
+            }
+            for alumno in alumnos
+        ]
         dias = int(request.POST.get('dias_clases', 0) or 0)
-        dcm, _ = DiasClaseMensual.objects.get_or_create(curso=curso, mes=mes_date)
-        dcm.dias_clases = dias
-        dcm.save()
 
-        # ✅ Sobrescribe los días personalizados al nuevo valor
-        asistencias = AsistenciaMensual.objects.filter(curso=curso, mes=mes_date)
-        for a in asistencias:
-            total = a.presentes + a.inasistentes
-            if total != dias:
-                a.presentes = min(a.presentes, dias)
-                a.inasistentes = dias - a.presentes
-                a.save()
+        # Upsert de todas las filas + días + rebalanceo, en una sola transacción
+        guardar_lote(curso, mes_date, cambios, dias_clases=dias)
 
         messages.success(request, '✅ Asistencia actualizada correctamente.')
         return redirect(f'/asistencia_mensual/?curso={curso_id}&mes={mes_str}')
 
     asistencias_dict = {
-        a.alumno.id: a for a in AsistenciaMensual.objects.filter(mes=mes_date, alumno__curso=curso)
+        a.alumno_id: a for a in AsistenciaMensual.objects.filter(mes=mes_date, alumno__curso=curso)
     }
     dcm = DiasClaseMensual.objects.filter(curso=curso, mes=mes_date).first()
     dias_total = dcm.dias_clases if dcm else 0
@@ -299,6 +299,7 @@ def asistencia_mensual(request):
         'alumnos_asistencia': alumnos_asistencia,
         'promedio_asistencia': promedio_asistencia,
         'total_alumnos': len(alumnos_asistencia),
+        'ahora_ms': int(timezone.now().timestamp() * 1000),
     })
 
 
@@ -322,6 +323,7 @@ def ajax_actualizar_dias_individuales(request):
             asistencia.presentes = min(asistencia.presentes, nuevos_dias)
             asistencia.inasistentes = nuevos_dias - asistencia.presentes
             asistencia.save()
+            actualizar_resumen(alumno.curso_id, mes_date)
 
             return JsonResponse({'ok': True})
         except Exception as e:
@@ -357,6 +359,7 @@ def ajax_actualizar_asistencia(request):
                 'curso': curso,
             }
         )
+        actualizar_resumen(curso.id, mes_date)
 
         # % basado en los DÍAS DEL CURSO (no en p+i)
         dcm = DiasClaseMensual.objects.filter(curso=curso, mes=mes_date).first()
@@ -393,23 +396,72 @@ def ajax_actualizar_dias_clases(request):
         dcm.save()
 
         # ✅ Sobrescribir presentes si hay menos días que antes
-        asistencias = AsistenciaMensual.objects.filter(curso=curso, mes=mes_date)
-        for a in asistencias:
-            total = a.presentes + a.inasistentes
-            if total != dias:
-                a.presentes = min(a.presentes, dias)
-                a.inasistentes = dias - a.presentes
-                a.save()
-
-        return JsonResponse({'ok': True})
+        ajustados = rebalancear_asistencias(curso, mes_date, dias)
+
+        actualizar_resumen(curso.id, mes_date)
+        return JsonResponse({'ok': True, 'ajustados': ajustados})
     except Exception as e:
         return JsonResponse({'ok': False, 'error': str(e)}, status=400)
-    
-    
-    
 
-    
-    
+
+
+# ===========================
+# AJAX: Guardado por lote de la grilla (un solo request por ráfaga de cambios)
+# ===========================
+def _entero_no_negativo(valor):
+    n = int(valor or 0)
+    if n < 0:
+        raise ValueError('Los valores no pueden ser negativos.')
+    return n
+
+
+@login_required
+def ajax_guardar_lote(request):
+    """
+    POST JSON:
+    {
+      "curso_id": 1, "mes": "YYYY-MM",
+      "dias_clases": 20,                      // opcional
+      "cambios": [{"alumno_id": 5, "presentes": 18, "inasistentes": 2, "seq": 1700000000000}, ...]
+    }
+    `seq` (opcional): marca en ms de la edición; los cambios más viejos que lo guardado se ignoran.
+    Resp JSON: {ok, guardados, ajustados, dias_clases, porcentajes: {alumno_id: %}}
+    """
+    if request.method != 'POST':
+        return JsonResponse({'ok': False, 'error': 'Método no permitido'}, status=405)
+
+    try:
+        data = json.loads(request.body or b'{}')
+        curso = Curso.objects.get(id=int(data.get('curso_id')))
+        mes_date = datetime.strptime(data.get('mes'), '%Y-%m').date().replace(day=1)
+
+        cambios = data.get('cambios') or []
+        if len(cambios) > MAX_CAMBIOS_LOTE:
+            raise ValueError(f'Máximo {MAX_CAMBIOS_LOTE} cambios por lote.')
+        cambios = [
+            {
+                'alumno_id': int(c['alumno_id']),
+                'presentes': _entero_no_negativo(c.get('presentes')),
+                'inasistentes': _entero_no_negativo(c.get('inasistentes')),
+                'seq': _entero_no_negativo(c.get('seq')),
+            }
+            for c in cambios
+        ]
+        dias = data.get('dias_clases')
+        dias = _entero_no_negativo(dias) if dias is not None else None
+
+        guardados, ajustados, dias_curso, porcentajes = guardar_lote(curso, mes_date, cambios, dias)
+        return JsonResponse({
+            'ok': True,
+            'guardados': guardados,
+            'ajustados': ajustados,
+            'dias_clases': dias_curso,
+            'porcentajes': porcentajes,
+        })
+    except Exception as e:
+        return JsonResponse({'ok': False, 'error': str(e)}, status=400)
+
+
 @login_required
 def estadisticas(request):
     """
@@ -417,14 +469,15 @@ def estadisticas(request):
     Los datos se cargan por AJAX desde `ajax_estadisticas_mes`.
     """
     mes_str = request.GET.get('mes') or datetime.today().strftime('%Y-%m')
-    return render(request, 'alumnos/estadisticas.html', {'mes': mes_str})
+    return render(request, 'alumnos/estadisticas.html', {'mes': mes_str, 'sse': _servido_por_asgi(request)})
 
 
 @login_required
 @require_GET
-def ajax_estadisticas_mes(request):
+@lee_de_reportes
+async def ajax_estadisticas_mes(request):
     """
-    Devuelve % asistencia por curso para el mes dado.
+    Devuelve % asistencia por curso para el mes dado (vista async: bajo ASGI no ocupa un hilo).
     GET: mes=YYYY-MM
     Resp JSON:
     {
@@ -442,63 +495,118 @@ def ajax_estadisticas_mes(request):
     except Exception:
         return JsonResponse({'ok': False, 'error': 'Parámetro mes inválido (YYYY-MM).'}, status=400)
 
-    cursos = Curso.objects.all().order_by('nombre')
+    data_cursos = await cache_estadisticas.aobtener(
+        'estadisticas_mes', mes_date, lambda: aestadisticas_mes(mes_date)
+    )
+    top3 = sorted(data_cursos, key=lambda x: x['porcentaje'], reverse=True)[:3]
 
-    # Mapa de días por curso en el mes
-    dias_map = {
-        d.curso_id: (d.dias_clases or 0)
-        for d in DiasClaseMensual.objects.filter(mes=mes_date)
-    }
+    return JsonResponse({'ok': True, 'cursos': data_cursos, 'top3': top3})
 
-    # Suma de presentes por curso (en el mes)
-    presentes_por_curso = (
-        AsistenciaMensual.objects
-        .filter(mes=mes_date)
-        .values('curso_id')
-        .annotate(presentes_total=Sum('presentes'))
-    )
-    presentes_map = {x['curso_id']: (x['presentes_total'] or 0) for x in presentes_por_curso}
 
-    data_cursos = []
-    for c in cursos:
-        n_alumnos = Alumno.objects.filter(curso=c).count()
-        dias = int(dias_map.get(c.id, 0) or 0)  # si no hay registro, 0
-        presentes_total = int(presentes_map.get(c.id, 0) or 0)
-
-        # Evita divisiones por cero y NaN/Infinity
-        if dias > 0 and n_alumnos > 0:
-            denom = dias * n_alumnos
-            porcentaje = (presentes_total / denom) * 100.0
+@login_required
+@require_GET
+@lee_de_reportes
+async def ajax_tendencia(request):
+    """
+    % de asistencia por curso para un rango de meses, para el gráfico de tendencia
+    (reemplaza pedir `ajax_estadisticas_mes` mes por mes).
+    GET: desde=YYYY-MM&hasta=YYYY-MM (por defecto, los 12 meses hasta el actual)
+    Resp JSON (en columnas: porcentajes[i][j] es el curso i en el mes j; null = sin datos):
+    {ok: true, meses: ["YYYY-MM", ...], curso_ids: [...], cursos: ["...", ...], porcentajes: [[...], ...]}
+    """
+    try:
+        hasta_str = request.GET.get('hasta') or datetime.today().strftime('%Y-%m')
+        hasta = datetime.strptime(hasta_str, '%Y-%m').date()
+        desde_str = request.GET.get('desde')
+        if desde_str:
+            desde = datetime.strptime(desde_str, '%Y-%m').date()
         else:
-            porcentaje = 0.0
+            desde = hasta.replace(year=hasta.year - 1 + hasta.month // 12, month=hasta.month % 12 + 1)
+    except ValueError:
+        return JsonResponse({'ok': False, 'error': 'Parámetros desde/hasta inválidos (YYYY-MM).'}, status=400)
+    n_meses = (hasta.year - desde.year) * 12 + hasta.month - desde.month + 1
+    if not 1 <= n_meses <= MAX_MESES_TENDENCIA:
+        return JsonResponse(
+            {'ok': False, 'error': f'El rango debe ir de 1 a {MAX_MESES_TENDENCIA} meses (desde <= hasta).'},
+            status=400,
+        )
 
-        # Sanitiza (por si acaso)
-        try:
-            porcentaje = float(porcentaje)
-        except Exception:
-            porcentaje = 0.0
-        if porcentaje != porcentaje or porcentaje == float('inf') or porcentaje == float('-inf'):
-            porcentaje = 0.0
+    return JsonResponse({'ok': True, **await atendencia(desde, hasta)})
 
-        # Recorta a 1 decimal y acota 0..100
-        porcentaje = round(max(0.0, min(100.0, porcentaje)), 1)
 
-        data_cursos.append({
-            'curso_id': c.id,
-            'curso': c.nombre,
-            'porcentaje': porcentaje,
-            'alumnos': n_alumnos,
-            'presentes_total': presentes_total,
-            'dias_clases': dias,
-        })
+# Cada cuánto (s) la conexión SSE revisa la versión de datos y manda un ping si no hubo cambios
+INTERVALO_SSE = 15
 
-    top3 = sorted(data_cursos, key=lambda x: x['porcentaje'], reverse=True)[:3]
 
-    return JsonResponse({'ok': True, 'cursos': data_cursos, 'top3': top3})
+def _estadisticas_cacheadas(mes_date):
+    return cache_estadisticas.aobtener('estadisticas_mes', mes_date, lambda: aestadisticas_mes(mes_date))
+
 
+async def _flujo_estadisticas(mes_date):
+    """
+    Eventos SSE de un mes: `event: curso` con la fila (parcial) de un curso que cambió.
+    - Cambios en este proceso: llegan por `eventos` apenas se confirman.
+    - Cambios de otros procesos: si la versión de datos subió, se recalcula
+      (desde la caché/resúmenes) y se envían solo las filas distintas.
+    """
+    canal = eventos.canal_mes(mes_date)
+    entrada = eventos.suscribir(canal)
+    cola = entrada[1]
+    try:
+        ultimo = {c['curso_id']: c for c in await _estadisticas_cacheadas(mes_date)}
+        version = await versiones.aversion_actual()
+        yield "retry: 5000\n\n"
+        while True:
+            try:
+                cambios = [await asyncio.wait_for(cola.get(), timeout=INTERVALO_SSE)]
+            except asyncio.TimeoutError:
+                nueva = await versiones.aversion_actual()
+                if nueva == version:
+                    yield ": ping\n\n"
+                    continue
+                version = nueva
+                cambios = [
+                    c for c in await _estadisticas_cacheadas(mes_date)
+                    if ultimo.get(c['curso_id']) != c
+                ]
+            for cambio in cambios:
+                ultimo[cambio['curso_id']] = {**ultimo.get(cambio['curso_id'], {}), **cambio}
+                yield f"event: curso\ndata: {json.dumps(cambio)}\n\n"
+    finally:
+        eventos.desuscribir(canal, entrada)
+
+
+def _servido_por_asgi(request):
+    return isinstance(request, ASGIRequest)
 
 
 @login_required
+@require_GET
+async def sse_estadisticas_mes(request):
+    """
+    Server-Sent Events con los cambios por curso del mes (GET: mes=YYYY-MM).
+    Solo funciona servido por ASGI (asistencia_escolar/asgi.py, p. ej. con uvicorn).
+    Bajo WSGI (runserver, gunicorn sync) Django consume el generador async entero antes
+    de enviar nada: como el flujo no termina, nunca llegaría un evento y el hilo quedaría
+    tomado. Ahí se responde 204, que le indica al EventSource que no reintente; la
+    página tampoco lo abre (ver `estadisticas`).
+    """
+    if not _servido_por_asgi(request):
+        return HttpResponse(status=204)
+    try:
+        mes_date = datetime.strptime(request.GET.get('mes') or '', '%Y-%m').date().replace(day=1)
+    except ValueError:
+        return JsonResponse({'ok': False, 'error': 'Parámetro mes inválido (YYYY-MM).'}, status=400)
+
+    response = StreamingHttpResponse(_flujo_estadisticas(mes_date), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # sin buffer en nginx
+    return response
+
+
+
+@login_required
+@lee_de_reportes
 def reporte_cursos_mes(request):
     """
     Muestra, por mes y por curso, dos tablas:
@@ -514,24 +622,27 @@ def reporte_cursos_mes(request):
         mes_str = mes_date.strftime('%Y-%m')
 
     cursos = Curso.objects.all().order_by('nombre')
-
-    dias_map = {
-        d.curso_id: int(d.dias_clases or 0)
-        for d in DiasClaseMensual.objects.filter(mes=mes_date)
+    resumenes = resumenes_del_mes(mes_date)
+
+    # Solo se listan alumnos de cursos con días definidos y algún perfecto/crítico
+    con_detalle = [
+        curso_id for curso_id, r in resumenes.items()
+        if r.dias_clases > 0 and (r.n_perfectos or r.n_criticos)
+    ]
+    alumnos_por_curso = defaultdict(list)
+    for al in Alumno.objects.filter(curso_id__in=con_detalle).order_by('nombre_completo'):
+        alumnos_por_curso[al.curso_id].append(al)
+    asistencia_por_alumno = {
+        a.alumno_id: a
+        for a in AsistenciaMensual.objects.filter(mes=mes_date, alumno__curso_id__in=con_detalle)
     }
 
-    asistencias_mes = (
-        AsistenciaMensual.objects
-        .filter(mes=mes_date)
-        .select_related('alumno', 'curso')
-    )
-    asistencia_por_alumno = {a.alumno_id: a for a in asistencias_mes}
-
     cursos_data = []
 
     for c in cursos:
-        dias_curso = dias_map.get(c.id, 0)
-        alumnos = list(Alumno.objects.filter(curso=c).order_by('nombre_completo'))
+        r = resumenes.get(c.id)
+        dias_curso = r.dias_clases if r else 0
+        alumnos = alumnos_por_curso.get(c.id, [])
 
         perfectos = []
         criticos = []
@@ -559,237 +670,194 @@ def reporte_cursos_mes(request):
         cursos_data.append({
             'curso': c,
             'dias_curso': dias_curso,
-            'n_alumnos': len(alumnos),
+            'n_alumnos': r.n_alumnos if r else None,
             'perfectos': perfectos,
             'criticos': criticos,
             'sin_dias': (dias_curso == 0),
         })
 
+    # Matrícula de cursos sin resumen en el mes (una sola consulta agrupada)
+    sin_resumen = [d for d in cursos_data if d['n_alumnos'] is None]
+    if sin_resumen:
+        matricula = matricula_por_curso([d['curso'].id for d in sin_resumen])
+        for d in sin_resumen:
+            d['n_alumnos'] = matricula.get(d['curso'].id, 0)
+
     return render(request, 'alumnos/reporte_cursos_mes.html', {
         'mes': mes_str,
         'cursos_data': cursos_data,
     })
-    
-    
-MESES_ES = {
-    1: "ENERO", 2: "FEBRERO", 3: "MARZO", 4: "ABRIL",
-    5: "MAYO", 6: "JUNIO", 7: "JULIO", 8: "AGOSTO",
-    9: "SEPTIEMBRE", 10: "OCTUBRE", 11: "NOVIEMBRE", 12: "DICIEMBRE"
-}
-
-def mes_label(fecha):
-    # fecha es date (día = 1)
-    return f"{MESES_ES[fecha.month]} {fecha.year}"
 
 
+# ===========================
+# Exportación y trabajos en segundo plano
+# ===========================
 @login_required
+@lee_de_reportes
 def exportar_excel(request):
-    wb = Workbook()
-    thin = Side(style="thin", color="CCCCCC")
-    border_all = Border(left=thin, right=thin, top=thin, bottom=thin)
-    header_fill = PatternFill("solid", fgColor="E9ECEF")
-    title_font = Font(bold=True)
-    encabezado_font = Font(bold=True)
-
-    # Estilo porcentaje
-    percent_style = NamedStyle(name="percent_style")
-    percent_style.number_format = "0.00%"
+    """
+    Encola la exportación (o retoma la pendiente con los mismos parámetros: recargar
+    la página no encola otra); la descarga queda disponible al terminar el trabajo.
+    Con ?modo=directo genera el archivo en la misma petición y lo envía en streaming.
+    ?formato=zip entrega un CSV por curso, sin formato (por defecto: libro .xlsx).
+    Recortes opcionales: ?desde=AAAA-MM&hasta=AAAA-MM&cursos=1,2,3 y
+    ?modificado_desde=<ISO> (solo curso/mes con cambios posteriores; para sincronizaciones).
+    El instante de corte para la siguiente sincronización viene en el header
+    X-Exportacion-Corte (directo) o en `resultado.corte` del trabajo.
+    """
+    formato = request.GET.get('formato', 'xlsx')
+    if formato not in FORMATOS:
+        return JsonResponse({'ok': False, 'error': 'Formato no soportado.'}, status=400)
     try:
-        wb.add_named_style(percent_style)
-    except ValueError:
-        # Ya existe
-        pass
-
-    # Meses con cualquier dato
-    meses_asistencia = AsistenciaMensual.objects.values_list("mes", flat=True)
-    meses_dias = DiasClaseMensual.objects.values_list("mes", flat=True)
-    meses = sorted(set(list(meses_asistencia) + list(meses_dias)))
-
-    cursos = list(Curso.objects.all().order_by("nombre"))
-
-    # Hoja de gráficos (activa)
-    ws_graficos = wb.active
-    ws_graficos.title = "Gráficos"
-
-    # ========= Hojas por curso =========
-    for curso in cursos:
-        ws = wb.create_sheet(title=curso.nombre[:31])
-
-        # Título
-        end_col = 1 + max(0, (len(meses) * 4))
-        ws.merge_cells(start_row=1, start_column=1, end_row=1, end_column=end_col or 1)
-        ws.cell(row=1, column=1, value=f"LISTA Y ASISTENCIA - {curso.nombre}").font = Font(bold=True, size=14)
-        ws.cell(row=1, column=1).alignment = Alignment(horizontal="center")
-
-        # Encabezados
-        ws.cell(row=2, column=1, value="ALUMNO").font = title_font
-        ws.cell(row=2, column=1).fill = header_fill
-        ws.cell(row=2, column=1).border = border_all
-        ws.cell(row=2, column=1).alignment = Alignment(horizontal="center")
-
-        col = 2
-        for m in meses:
-            etiqueta = mes_label(m)
-            ws.merge_cells(start_row=2, start_column=col, end_row=2, end_column=col + 3)
-            h = ws.cell(row=2, column=col, value=etiqueta)
-            h.font = title_font
-            h.fill = header_fill
-            h.alignment = Alignment(horizontal="center")
-            h.border = border_all
-            for j, txt in enumerate(["DÍAS CLASE", "PRESENTES", "INASISTENTES", "% ASISTENCIA"]):
-                c = ws.cell(row=3, column=col + j, value=txt)
-                c.font = title_font
-                c.fill = header_fill
-                c.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-                c.border = border_all
-            col += 4
-
-        # Datos por alumno
-        alumnos = Alumno.objects.filter(curso=curso).order_by("nombre_completo")
-        first_data_row = 4
-        r = first_data_row
-        for alumno in alumnos:
-            ws.cell(row=r, column=1, value=alumno.nombre_completo).border = border_all
-            ws.cell(row=r, column=1).alignment = Alignment(vertical="center")
-            col = 2
-            for m in meses:
-                dias_obj = DiasClaseMensual.objects.filter(curso=curso, mes=m).first()
-                dias = dias_obj.dias_clases if dias_obj else 0
-
-                asis = AsistenciaMensual.objects.filter(alumno=alumno, mes=m).first()
-                pres = asis.presentes if asis else 0
-                inas = asis.inasistentes if asis else 0
-
-                ws.cell(row=r, column=col,     value=dias).border = border_all
-                ws.cell(row=r, column=col + 1, value=pres).border = border_all
-                ws.cell(row=r, column=col + 2, value=inas).border = border_all
-
-                # % = IF(dias>0, presentes/dias, 0)
-                pct_cell = ws.cell(row=r, column=col + 3)
-                dias_addr = ws.cell(row=r, column=col).coordinate
-                pres_addr = ws.cell(row=r, column=col + 1).coordinate
-                pct_cell.value = f"=IF({dias_addr}>0,{pres_addr}/{dias_addr},0)"
-                pct_cell.style = "percent_style"
-                pct_cell.border = border_all
-
-                for j in range(4):
-                    ws.cell(row=r, column=col + j).alignment = Alignment(horizontal="center")
-                col += 4
-            r += 1
-
-        last_data_row = r - 1
-
-        if first_data_row <= last_data_row:
-            total_alumnos = len(alumnos)
-
-            # Fila: Total alumnos
-            resumen_row_1 = last_data_row + 2
-            ws.cell(row=resumen_row_1, column=1, value="Total alumnos").font = title_font
-            ws.cell(row=resumen_row_1, column=2, value=total_alumnos)
-
-            # Fila: Resumen por mes (DÍAS CLASE y % ASISTENCIA DEL CURSO)
-            resumen_row_2 = resumen_row_1 + 1
-            ws.cell(row=resumen_row_2, column=1, value="Resumen por mes").font = title_font
-
-            col = 2
-            for m in meses:
-                dias_obj = DiasClaseMensual.objects.filter(curso=curso, mes=m).first()
-                dias = dias_obj.dias_clases if dias_obj else 0
-
-                col_dias = col
-                col_pres = col + 1
-                col_pct  = col + 3
-
-                # DÍAS CLASE
-                ws.cell(row=resumen_row_2, column=col_dias, value=dias).border = border_all
-                ws.cell(row=resumen_row_2, column=col_dias).alignment = Alignment(horizontal="center")
-
-                # % asistencia del curso = SUM(presentes) / (dias * total_alumnos)
-                pres_col_letter = get_column_letter(col_pres)
-                sum_pres = f"=SUM({pres_col_letter}{first_data_row}:{pres_col_letter}{last_data_row})"
-                dias_addr = ws.cell(row=resumen_row_2, column=col_dias).coordinate
-                pct_cell = ws.cell(row=resumen_row_2, column=col_pct)
-                if dias > 0 and total_alumnos > 0:
-                    pct_cell.value = f"=IF({dias_addr}>0,({sum_pres})/({dias_addr}*{total_alumnos}),0)"
-                else:
-                    pct_cell.value = 0
-                pct_cell.style = "percent_style"
-                pct_cell.border = border_all
-                pct_cell.alignment = Alignment(horizontal="center")
-
-                col += 4
-
-            # Anchos y congelar
-            ws.column_dimensions['A'].width = 40
-            for c in range(2, 2 + len(meses) * 4):
-                ws.column_dimensions[get_column_letter(c)].width = 14
-            ws.freeze_panes = "A4"
+        filtro = leer_filtro(request.GET)
+    except ValueError as e:
+        return JsonResponse({'ok': False, 'error': str(e)}, status=400)
+
+    if request.GET.get('modo') == 'directo':
+        _, extension, content_type = FORMATOS[formato]
+        filename = f"asistencia_export_{datetime.now().strftime('%Y%m%d_%H%M')}.{extension}"
+        corte = corte_datos()  # con la copia de reportes: el instante del snapshot
+        # Mientras no cambien los datos, la misma petición se sirve desde el archivo ya generado
+        clave = cache_exportaciones.clave(formato, filtro)
+        etag = f'"{clave}"'
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponseNotModified()
         else:
-            ws.cell(row=4, column=1, value="(Sin alumnos en este curso)").font = Font(italic=True, color="888888")
-
-    # ========= Hoja “Gráficos” (tabla y barras) =========
-    ws = ws_graficos
-    # Limpiar por si existía contenido anterior
-    if ws.max_row > 1:
-        for _ in range(ws.max_row):
-            ws.delete_rows(1)
-
-    # Último mes con datos
-    mes_seleccionado = meses[-1] if meses else None
-    etiqueta_mes = mes_label(mes_seleccionado) if mes_seleccionado else "SIN DATOS"
-
-    ws.cell(row=1, column=1, value="Curso").font = encabezado_font
-    ws.cell(row=1, column=2, value=f"% Asistencia {etiqueta_mes}").font = encabezado_font
-
-    fila = 2
-    for curso in cursos:
-        pct = 0.0
-        if mes_seleccionado:
-            dias_obj = DiasClaseMensual.objects.filter(curso=curso, mes=mes_seleccionado).first()
-            dias = dias_obj.dias_clases if dias_obj else 0
-            if dias > 0:
-                total_alumnos = Alumno.objects.filter(curso=curso).count()
-                if total_alumnos > 0:
-                    presentes_total = 0
-                    for a in Alumno.objects.filter(curso=curso):
-                        asis = AsistenciaMensual.objects.filter(alumno=a, mes=mes_seleccionado).first()
-                        presentes_total += (asis.presentes if asis else 0)
-                    pct = presentes_total / float(dias * total_alumnos)
-
-        ws.cell(row=fila, column=1, value=curso.nombre)
-        c = ws.cell(row=fila, column=2, value=pct)
-        c.number_format = "0.00%"
-        fila += 1
-
-    # Configurar gráfico de barras (simple y funcional)
-    num_cursos = len(cursos)
-    if num_cursos > 0:
-        chart = BarChart()
-        chart.title = f"Asistencia por Curso - {etiqueta_mes}"
-        chart.y_axis.title = "Porcentaje de asistencia"
-        chart.y_axis.number_format = "0%"
-        chart.x_axis.title = "Curso"
-        chart.style = 2
-
-        data = Reference(ws, min_col=2, min_row=1, max_row=num_cursos + 1)
-        cats = Reference(ws, min_col=1, min_row=2, max_row=num_cursos + 1)
-        chart.add_data(data, titles_from_data=True)
-        chart.set_categories(cats)
-        ws.add_chart(chart, "D2")
-
-    # Ajustes visuales tabla
-    ws.column_dimensions['A'].width = 30
-    ws.column_dimensions['B'].width = 22
-
-    # ===== Responder archivo =====
-    buffer = io.BytesIO()
-    wb.save(buffer)
-    buffer.seek(0)
-
-    filename = f"asistencia_export_{datetime.now().strftime('%Y%m%d_%H%M')}.xlsx"
-    resp = HttpResponse(
-        buffer.getvalue(),
-        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
-    resp['Content-Disposition'] = f'attachment; filename="{filename}"'
-    return resp
+            archivo, _ = cache_exportaciones.abrir(formato, filtro, clave_archivo=clave)
+            response = FileResponse(archivo, as_attachment=True, filename=filename, content_type=content_type)
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        response['X-Exportacion-Corte'] = corte.isoformat()
+        return response
+
+    trabajo = encolar_exportacion({'formato': formato, 'filtro': filtro})
+    if _quiere_json(request):
+        return JsonResponse({'ok': True, 'trabajo_id': trabajo.id})
+    return render(request, 'alumnos/exportar_excel.html', {'trabajo': trabajo})
+
+
+def _trabajo_a_dict(trabajo):
+    data = {
+        'id': trabajo.id,
+        'tipo': trabajo.tipo,
+        'estado': trabajo.estado,
+        'progreso': trabajo.progreso,
+        'total': trabajo.total,
+        'resultado': trabajo.resultado,
+        'error': trabajo.error,
+        'descarga_url': None,
+    }
+    if trabajo.estado == Trabajo.TERMINADO and trabajo.archivo_resultado:
+        data['descarga_url'] = reverse('descargar_trabajo', args=[trabajo.id])
+    return data
+
+
+@login_required
+@require_GET
+async def ajax_estado_trabajo(request, trabajo_id):
+    """
+    Estado de un trabajo encolado (se consulta seguido mientras corre: vista async).
+    Resp JSON: {ok, trabajo: {id, tipo, estado, progreso, total, resultado, error, descarga_url}}
+    """
+    trabajo = await Trabajo.objects.filter(id=trabajo_id).afirst()
+    if not trabajo:
+        return JsonResponse({'ok': False, 'error': 'Trabajo no encontrado.'}, status=404)
+    return JsonResponse({'ok': True, 'trabajo': _trabajo_a_dict(trabajo)})
+
+
+@login_required
+def descargar_trabajo(request, trabajo_id):
+    trabajo = get_object_or_404(Trabajo, id=trabajo_id, estado=Trabajo.TERMINADO)
+    if not trabajo.archivo_resultado:
+        raise Http404("El trabajo no generó archivo.")
+    nombre = (trabajo.resultado or {}).get('archivo') or f"trabajo_{trabajo.id}.xlsx"
+    return FileResponse(trabajo.archivo_resultado.open('rb'), as_attachment=True, filename=nombre)
+
+
+@login_required
+@require_GET
+async def ajax_cache_estadisticas(request):
+    """Contadores de aciertos/fallos de la caché de estadísticas: {ok, hits, misses, ratio}."""
+    return JsonResponse({'ok': True, **await cache_estadisticas.acontadores()})
+
+
+@login_required
+@require_GET
+def ajax_metricas(request):
+    """
+    Métricas de perfilado por vista de este proceso (solo staff).
+    Resp JSON: {ok, vistas: {nombre: {peticiones, consultas_prom, consultas_max, db_ms_prom,
+    p50_ms, p95_ms, p99_ms, excedidas, presupuesto, repetidas: [{sql, veces}]}}}
+    """
+    if not request.user.is_staff:
+        return JsonResponse({'ok': False, 'error': 'Solo para administradores.'}, status=403)
+    return JsonResponse({'ok': True, 'vistas': perfilado.metricas()})
+
+
+@login_required
+@require_GET
+async def ajax_buscar_alumnos(request):
+    """
+    Autocompletado de alumnos por prefijo de palabra (sin tildes ni mayúsculas).
+    GET: q, curso (id, opcional), limite (opcional, máx. 50)
+    Resp JSON: {ok, resultados: [{id, nombre, curso_id, curso}]}
+    """
+    q = request.GET.get('q', '')
+    try:
+        curso_id = int(request.GET.get('curso') or 0) or None
+        limite = min(int(request.GET.get('limite') or busqueda.LIMITE_SUGERENCIAS), 50)
+    except ValueError:
+        return JsonResponse({'ok': False, 'error': 'Parámetros inválidos.'}, status=400)
+
+    resultados = [
+        {'id': a['id'], 'nombre': a['nombre_completo'], 'curso_id': a['curso_id'], 'curso': a['curso__nombre']}
+        for a in await busqueda.asugerencias(q, curso_id=curso_id, limite=max(limite, 1))
+    ]
+    return JsonResponse({'ok': True, 'resultados': resultados})
+
+
+@login_required
+@require_GET
+async def ajax_lista_alumnos(request):
+    """
+    Listado paginado por cursor, ordenado por nombre.
+    GET: curso (id, opcional), nombre (opcional), cursor (opcional), limite (opcional)
+    Resp JSON: {ok, alumnos: [{id, nombre, curso_id, curso}], siguiente, total}
+    `siguiente` es el cursor de la próxima página (null al final);
+    `total` viene de la matrícula cacheada (null si se filtra por nombre).
+    """
+    try:
+        curso_id = int(request.GET.get('curso') or 0) or None
+        limite = int(request.GET.get('limite') or paginacion.TAMANO_PAGINA)
+    except ValueError:
+        return JsonResponse({'ok': False, 'error': 'Parámetros inválidos.'}, status=400)
+    limite = max(1, min(limite, paginacion.MAX_TAMANO_PAGINA))
+    nombre = request.GET.get('nombre', '')
+
+    alumnos = Alumno.objects.all()
+    if curso_id:
+        alumnos = alumnos.filter(curso_id=curso_id)
+    if busqueda.palabras(nombre):
+        alumnos = busqueda.filtrar(alumnos, nombre, acotado=bool(curso_id))
+
+    try:
+        filas, _, siguiente = await paginacion.apagina(
+            alumnos.select_related('curso'), despues=request.GET.get('cursor'), tamano=limite
+        )
+    except ValueError as e:
+        return JsonResponse({'ok': False, 'error': str(e)}, status=400)
+
+    total = None
+    if not busqueda.palabras(nombre):
+        matricula = await amatricula_cacheada()
+        total = matricula.get(curso_id, 0) if curso_id else sum(matricula.values())
+
+    return JsonResponse({
+        'ok': True,
+        'alumnos': [
+            {'id': a.id, 'nombre': a.nombre_completo, 'curso_id': a.curso_id, 'curso': a.curso.nombre}
+            for a in filas
+        ],
+        'siguiente': siguiente,
+        'total': total,
+    })
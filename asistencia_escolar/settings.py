@@ -41,6 +41,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'alumnos.perfilado.PerfiladoMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -81,6 +82,55 @@ DATABASES = {
 }
 
 
+# Cache
+# Caché de estadísticas por mes (alumnos/cache_estadisticas.py). Tiene que ser compartida
+# entre procesos: las importaciones corren en `procesar_trabajos` y su invalidación debe
+# llegar al proceso web (con LocMemCache cada proceso tendría la suya y el web seguiría
+# sirviendo datos viejos hasta que expiren). Con varios servidores, usar Redis/Memcached.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'django',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    }
+}
+
+ESTADISTICAS_CACHE_TIMEOUT = 60 * 60 * 24        # meses pasados
+ESTADISTICAS_CACHE_TIMEOUT_MES_ACTUAL = 60       # mes en curso
+
+# Perfilado (alumnos/perfilado.py): máximo de consultas por petición de cada vista (nombre de URL).
+# Incluye las 2 de sesión/usuario. También acepta {'consultas': n, 'db_ms': t}.
+# Al excederse se registra un warning; con PERFILADO_ESTRICTO (tests) la petición falla.
+PERFILADO_PRESUPUESTOS = {
+    'dashboard': 6,
+    'lista_alumnos': 10,
+    'asistencia_mensual': 10,
+    'estadisticas': 4,
+    'ajax_estadisticas_mes': 6,
+    'ajax_tendencia': 5,
+    'ajax_buscar_alumnos': 6,
+    'ajax_lista_alumnos': 5,
+    'ajax_estado_trabajo': 4,
+    'reporte_cursos_mes': 8,
+    'exportar_excel': 12,
+}
+PERFILADO_ESTRICTO = False
+
+# Procesos que preparan en paralelo las hojas/CSV de cada curso al exportar.
+# 1 = sin pool (todo en el proceso actual); 0 = uno por CPU.
+# Se crean con 'spawn' (no fork), así que es seguro también dentro del servidor web.
+EXPORTACION_WORKERS = 1
+
+# Exportaciones ya generadas, reutilizadas mientras no cambien los datos (desalojo LRU por tamaño)
+EXPORTACION_CACHE_DIR = BASE_DIR / 'cache' / 'exportaciones'
+EXPORTACION_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# Un trabajo EN_CURSO sin avance por más de estos minutos se da por interrumpido
+# (lo recupera `procesar_trabajos` al arrancar)
+TRABAJOS_COLGADO_MINUTOS = 10
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -117,6 +167,9 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Archivos de trabajos en segundo plano (importaciones subidas / exportaciones generadas)
+MEDIA_ROOT = BASE_DIR / 'media'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
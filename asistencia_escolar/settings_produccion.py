@@ -0,0 +1,32 @@
+"""
+Perfil de base de datos para producción con SQLite (varios docentes guardando a la vez):
+
+    DJANGO_SETTINGS_MODULE=asistencia_escolar.settings_produccion
+
+- WAL: las lecturas no esperan al escritor y el escritor no espera a las lecturas.
+- transaction_mode IMMEDIATE: cada transacción toma el lock de escritura al empezar;
+  con DEFERRED, dos transacciones que leen y luego escriben se bloquean entre sí
+  y una falla al instante con "database is locked" (sin esperar el timeout).
+- busy_timeout: un escritor espera su turno (hasta 20 s) en vez de fallar.
+- Conexiones persistentes (CONN_MAX_AGE) para no reabrir ni repetir los PRAGMAs
+  en cada petición. Pensado para WSGI (gunicorn con hilos); bajo ASGI Django cierra
+  la conexión al terminar cada petición igual.
+"""
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES
+
+
+DATABASES['default'].update({
+    'CONN_MAX_AGE': 600,
+    'CONN_HEALTH_CHECKS': True,
+    'OPTIONS': {'transaction_mode': 'IMMEDIATE'},
+})
+
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',     # con WAL sigue siendo consistente ante caídas del proceso
+    'busy_timeout': 20000,       # ms
+    'cache_size': -65536,        # negativo = KiB (64 MiB por conexión)
+    'mmap_size': 268435456,      # 256 MiB
+    'temp_store': 'MEMORY',
+}
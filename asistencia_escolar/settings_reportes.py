@@ -0,0 +1,42 @@
+"""
+Perfil de producción con una copia de solo lectura para los reportes pesados
+(reporte por curso, exportación a Excel, estadísticas del mes):
+
+    DJANGO_SETTINGS_MODULE=asistencia_escolar.settings_reportes
+
+- Alias `reporting`: copia SQLite abierta como inmutable (sin locks: los reportes
+  no compiten con el autoguardado). Se renueva con `python manage.py snapshot_reportes`
+  (p. ej. `--cada 60`, o desde cron).
+- alumnos.routers.ReportesRouter manda a la copia solo las lecturas de las vistas
+  marcadas con `@lee_de_reportes`; una sesión que acaba de guardar lee de `default`
+  hasta que la copia la alcance.
+- Con una réplica real (MySQL/PostgreSQL) basta cambiar el alias, p. ej.:
+      DATABASES['reporting'] = {
+          'ENGINE': 'django.db.backends.mysql', 'NAME': 'asistencia',
+          'HOST': 'replica.interna', 'USER': 'lectura', 'PASSWORD': '...',
+          'TEST': {'MIRROR': 'default'},
+      }
+"""
+from .settings_produccion import *  # noqa: F401,F403
+from .settings_produccion import BASE_DIR, DATABASES, MIDDLEWARE
+
+
+REPORTES_COPIA = BASE_DIR / 'db_reportes.sqlite3'
+
+DATABASES['reporting'] = {
+    'ENGINE': 'django.db.backends.sqlite3',
+    # immutable: SQLite no toma locks ni mira el journal; por eso la copia se reemplaza
+    # entera (os.replace) y no se reutilizan conexiones entre peticiones.
+    'NAME': f'file:{REPORTES_COPIA}?mode=ro&immutable=1',
+    'OPTIONS': {'uri': True},
+    'CONN_MAX_AGE': 0,
+    'TEST': {'MIRROR': 'default'},
+}
+
+DATABASE_ROUTERS = ['alumnos.routers.ReportesRouter']
+
+MIDDLEWARE = list(MIDDLEWARE)
+MIDDLEWARE.insert(
+    MIDDLEWARE.index('django.contrib.auth.middleware.AuthenticationMiddleware') + 1,
+    'alumnos.routers.ReportesMiddleware',
+)